@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de los backends de parseo HTML.
+
+Mide el tiempo por artículo y por página del listado de cada parser sobre las
+fixtures y comprueba que todos extraen exactamente los mismos campos.
+
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --html_dir data/cache/http/objects
+"""
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+sys.path.insert(0, current_dir)
+
+from fixtures import article_html, listing_html, load_articles, load_html_dir
+from scraping.parsers import PARSERS, lxml
+
+
+def time_per_call(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends.")
+    parser.add_argument(
+        "--html_dir", type=str, default=None, help="Directory with saved article HTML"
+    )
+    parser.add_argument("--limit", type=int, default=200, help="Max articles to parse")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    args = parser.parse_args()
+
+    rows = load_articles()[: args.limit]
+    if args.html_dir:
+        articles = load_html_dir(args.html_dir)[: args.limit]
+    else:
+        articles = [article_html(row) for row in rows]
+    listings = [listing_html(rows[i : i + 20]) for i in range(0, len(rows), 20)]
+
+    backends = {
+        name: cls() for name, cls in PARSERS.items() if name != "lxml" or lxml
+    }
+    print(f"{len(articles)} artículos, {len(listings)} páginas de listado")
+
+    reference = None
+    results = {}
+    for name, backend in backends.items():
+        parsed = [backend.parse_article(page) for page in articles]
+        parsed_listings = [backend.parse_listing(page) for page in listings]
+        if reference is None:
+            reference = (name, parsed, parsed_listings)
+        elif (parsed, parsed_listings) != reference[1:]:
+            mismatches = sum(a != b for a, b in zip(parsed, reference[1]))
+            print(f"AVISO: {name} difiere de {reference[0]} en {mismatches} artículos")
+
+        results[name] = (
+            time_per_call(backend.parse_article, articles, args.repeat),
+            time_per_call(backend.parse_listing, listings, args.repeat),
+        )
+
+    base_article, base_listing = results["soup"]
+    print(f"{'parser':<8}{'ms/artículo':>14}{'ms/listado':>14}{'speedup':>10}")
+    for name, (per_article, per_listing) in results.items():
+        print(
+            f"{name:<8}{per_article * 1000:>14.3f}{per_listing * 1000:>14.3f}"
+            f"{base_article / per_article:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
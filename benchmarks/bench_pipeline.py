@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pipeline completo (listado -> artículos -> LLM -> almacén) sin
+acceder a Cubadebate ni a Fireworks.
+
+Un servidor HTTP local sirve las páginas del listado, el HTML de los
+artículos y las respuestas del LLM generados desde las fixtures: los
+artículos de `data/daily/*.csv` y los reportes de
+`data/datos_electricos_organizados.json`. Las fixtures son deterministas, así
+que dos ejecuciones miden exactamente el mismo trabajo.
+
+Para cada escala (1x, 10x y 100x replican los artículos) se mide:
+
+- `daily`: `DailyPipeline.run()` con el extractor concurrente, por etapas
+  (crawl, extraction, merge, feature_update) con las métricas del pipeline.
+- `analize_all`: `DailyPipeline.run(analize_all=True)` sobre el CSV de
+  artículos completo.
+
+Cada resultado se agrega a `benchmarks/results/pipeline.jsonl` y se compara
+con la ejecución anterior de la misma escala y modo.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --scales 1 10 --modes daily
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+sys.path.insert(0, current_dir)
+
+from fixtures import (
+    DAILY_CSVS,
+    RAW_CSV,
+    article_html,
+    canned_responses,
+    listing_html,
+    load_articles,
+    load_reports,
+    project_dir,
+    scaled_articles,
+)
+from scraping.daily_pipeline import DailyPipeline
+
+RESULTS_FILE = os.path.join(current_dir, "results", "pipeline.jsonl")
+TEMPLATE_PATH = os.path.join(project_dir, "template.json")
+PAGE_SIZE = 20
+
+_TITLE = re.compile(r"^Artículo(?: \d+)?:\n(.*)$", re.MULTILINE)
+
+
+class FixtureServer:
+    """
+    Servidor local con el listado, los artículos y el endpoint del LLM.
+    """
+
+    def __init__(self):
+        self.listings = {}
+        self.articles = {}
+        self.responses = {}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.llm_url = f"{self.url}/llm"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def load(self, rows, responses):
+        """
+        Publica los artículos dados; devuelve las filas con los enlaces
+        apuntando al servidor local
+
+        Args:
+            rows (list): Filas del CSV de artículos
+            responses (dict): {título: datos} de canned_responses
+
+        Returns:
+            list: Filas con `Enlace` local
+        """
+        local = []
+        for row in rows:
+            path = urlsplit(row["Enlace"]).path
+            local.append({**row, "Enlace": f"{self.url}{path}"})
+        self.articles = {urlsplit(row["Enlace"]).path: row for row in local}
+        self.listings = {
+            f"/page/{i // PAGE_SIZE + 1}/": local[i : i + PAGE_SIZE]
+            for i in range(0, len(local), PAGE_SIZE)
+        }
+        self.responses = responses
+        return local
+
+    def answer(self, prompt):
+        titles = _TITLE.findall(prompt)
+        datos = [self.responses.get(title) for title in titles]
+        if "para cada uno de los" in prompt:
+            return json.dumps(datos, ensure_ascii=False)
+        return json.dumps(datos[0] if datos else None, ensure_ascii=False)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path in server.listings:
+                    page = listing_html(server.listings[self.path])
+                elif self.path in server.articles:
+                    page = article_html(server.articles[self.path])
+                else:
+                    self._send(404, "", "text/html")
+                    return
+                self._send(200, page, "text/html; charset=utf-8")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                prompt = payload["messages"][-1]["content"]
+                content = server.answer(prompt)
+                body = {
+                    "choices": [{"message": {"content": content}}],
+                    "usage": {
+                        "prompt_tokens": len(prompt) // 4,
+                        "completion_tokens": len(content) // 4,
+                    },
+                }
+                self._send(200, json.dumps(body), "application/json")
+
+        return Handler
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def seed_articles():
+    """
+    Artículos de `data/daily` sin enlaces repetidos, del más nuevo al más viejo
+    """
+    rows = load_articles(sorted(glob.glob(DAILY_CSVS)))
+    unique = {row["Enlace"]: row for row in rows}
+    return sorted(unique.values(), key=lambda row: row["Fecha"], reverse=True)
+
+
+def _blank(value):
+    if isinstance(value, dict):
+        return {key: _blank(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return []
+    return None
+
+
+def template_path(workspace, reports):
+    """
+    Plantilla del extractor: la del proyecto o una con la forma de los reportes
+    """
+    if os.path.exists(TEMPLATE_PATH):
+        return TEMPLATE_PATH
+    path = os.path.join(workspace, "template.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(_blank(next(iter(reports.values()))), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def count_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        nested = json.load(f)
+    return sum(
+        len(records) for months in nested.values() for records in months.values()
+    )
+
+
+def run_case(server, mode, scale, seeds, reports, args):
+    """
+    Ejecuta el pipeline una vez sobre un directorio de datos vacío
+
+    Args:
+        server (FixtureServer): Servidor de fixtures
+        mode (str): "daily" o "analize_all"
+        scale (int): Veces que se replican los artículos
+        seeds (list): Artículos de seed_articles
+        reports (dict): Reportes de load_reports
+        args (Namespace): Opciones de la línea de comandos
+
+    Returns:
+        dict: Resultado de la ejecución
+    """
+    rows = scaled_articles(seeds, scale)
+    rows = server.load(rows, canned_responses(rows, reports))
+    workspace = tempfile.mkdtemp(prefix="bench_pipeline_")
+    data_dir = os.path.join(workspace, "data")
+    try:
+        if mode == "analize_all":
+            raw_dir = os.path.join(data_dir, "raw")
+            os.makedirs(raw_dir)
+            pd.DataFrame(rows).to_csv(
+                os.path.join(raw_dir, os.path.basename(RAW_CSV)),
+                index=False,
+                encoding="utf-8-sig",
+            )
+
+        start = time.perf_counter()
+        pipeline = DailyPipeline(
+            api_key="bench",
+            model="bench",
+            template_path=template_path(workspace, reports),
+            data_dir=data_dir,
+            days_lookback=len(server.listings),
+            max_workers=args.workers,
+            base_url=server.url,
+            extractor="concurrent",
+            llm_url=server.llm_url,
+            llm_workers=args.llm_workers,
+            llm_rate=1e6,
+            llm_batch_size=args.llm_batch_size,
+            shard_workers=args.shard_workers,
+            retrain=False,
+            metrics_dir=os.path.join(workspace, "metrics"),
+        )
+        init_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = pipeline.run(analize_all=mode == "analize_all")
+        wall_s = time.perf_counter() - start
+        report = pipeline.metrics.report()
+
+        if mode == "daily":
+            records = sum(1 for _ in pipeline.report_store.keys())
+        else:
+            records = count_records(
+                os.path.join(data_dir, "processed", "datos_electricos_organizados.json")
+            )
+        pipeline.url_store.close()
+        if pipeline.llm_cache is not None:
+            pipeline.llm_cache.close()
+    finally:
+        if args.keep:
+            print(f"Datos de la ejecución en {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "mode": mode,
+        "scale": scale,
+        "articles": len(rows),
+        "records": records,
+        "ok": bool(result) and result != 2,
+        "init_s": round(init_s, 4),
+        "wall_s": round(wall_s, 4),
+        "articles_per_s": round(len(rows) / wall_s, 3),
+        "stages": report["stages"],
+        "tasks": report["tasks"],
+    }
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_result(results, entry):
+    for result in reversed(results):
+        if (result["mode"], result["scale"], result["articles"]) == (
+            entry["mode"],
+            entry["scale"],
+            entry["articles"],
+        ):
+            return result
+    return None
+
+
+def print_result(entry, previous, threshold):
+    """
+    Muestra los tiempos por etapa y el cambio respecto a la ejecución anterior
+    """
+    before = {}
+    if previous is not None:
+        before = {stage["stage"]: stage["wall_s"] for stage in previous["stages"]}
+        before["total"] = previous["wall_s"]
+    print(
+        f"\n{entry['mode']} {entry['scale']}x: {entry['articles']} artículos, "
+        f"{entry['records']} registros, {entry['articles_per_s']:.1f} art/s"
+        + ("" if entry["ok"] else " (FALLÓ)")
+    )
+    print(f"{'etapa':<16}{'s':>10}{'elem/s':>12}{'anterior':>10}{'cambio':>9}")
+    rows = [(s["stage"], s["wall_s"], s["items_per_s"]) for s in entry["stages"]]
+    rows.append(("total", entry["wall_s"], entry["articles_per_s"]))
+    for name, wall_s, per_s in rows:
+        line = f"{name:<16}{wall_s:>10.3f}{per_s:>12.1f}"
+        if before.get(name):
+            change = wall_s / before[name] - 1
+            line += f"{before[name]:>10.3f}{change:>+8.0%}"
+            if change > threshold:
+                line += " REGRESIÓN"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline offline.")
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Synthetic scale factors",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["daily", "analize_all"],
+        default=["daily", "analize_all"],
+        help="Pipeline paths to benchmark",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent downloads")
+    parser.add_argument(
+        "--llm_workers", type=int, default=4, help="Concurrent LLM requests"
+    )
+    parser.add_argument(
+        "--llm_batch_size", type=int, default=1, help="Articles per LLM prompt"
+    )
+    parser.add_argument(
+        "--shard_workers",
+        type=int,
+        default=1,
+        help="Year-month shards extracted in parallel in analize_all mode",
+    )
+    parser.add_argument(
+        "--results", type=str, default=RESULTS_FILE, help="JSONL file with results"
+    )
+    parser.add_argument(
+        "--no_save", action="store_true", help="Do not append results to the file"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown vs the previous run reported as a regression",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the data directory of each run"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    seeds = seed_articles()
+    reports = load_reports()
+    results = load_results(args.results)
+    print(f"{len(seeds)} artículos semilla, {len(reports)} reportes")
+
+    server = FixtureServer()
+    try:
+        for scale in args.scales:
+            for mode in args.modes:
+                entry = run_case(server, mode, scale, seeds, reports, args)
+                print_result(entry, previous_result(results, entry), args.threshold)
+                if not args.no_save:
+                    os.makedirs(os.path.dirname(args.results), exist_ok=True)
+                    with open(args.results, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
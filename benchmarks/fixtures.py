@@ -0,0 +1,228 @@
+"""
+Fixtures HTML para los benchmarks.
+
+A falta de páginas guardadas, se generan páginas con la misma estructura que
+las de Cubadebate (cabecera, menú, barra lateral, scripts y el cuerpo de la
+nota) a partir de los artículos ya recolectados en `data/raw` y `data/daily`.
+Si se indica un directorio con archivos `.html` (por ejemplo los objetos del
+caché HTTP) se usan esos en su lugar.
+
+Las respuestas del LLM se toman de los reportes ya extraídos
+(`data/datos_electricos_organizados.json`), y `scaled_articles` replica los
+artículos con enlaces y contenidos distintos para medir a escala sintética.
+"""
+import csv
+import glob
+import html
+import json
+import os
+import zlib
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RAW_CSV = os.path.join(
+    project_dir, "data", "raw", "afectaciones_electricas_cubadebate_filter_2025.csv"
+)
+DAILY_CSVS = os.path.join(project_dir, "data", "daily", "articulos_*.csv")
+REPORTS_JSON = os.path.join(project_dir, "data", "datos_electricos_organizados.json")
+
+_CHROME_HEAD = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="UTF-8"><title>{title} | Cubadebate</title>
+<link rel="stylesheet" href="/wp-content/themes/cubadebate/style.css">
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+<style>.note_content p {{ margin: 0 0 1em; }}</style>
+</head><body class="single">
+<header id="header"><nav id="menu"><ul>{menu}</ul></nav></header>
+<div id="content">"""
+
+_CHROME_FOOT = """</div>
+<aside id="sidebar"><div class="widget"><ul>{sidebar}</ul></div></aside>
+<footer id="footer"><p>Cubadebate. Contra el Terrorismo Mediático.</p></footer>
+<script src="/wp-includes/js/jquery/jquery.min.js"></script>
+</body></html>"""
+
+_MENU = "".join(
+    f'<li><a href="/categoria/{name.lower()}/">{name}</a></li>'
+    for name in ["Noticias", "Especiales", "Opinión", "Fotorreportajes", "Cultura"]
+    * 4
+)
+_SIDEBAR = "".join(
+    f'<li><a href="/noticias/2025/01/{i:02d}/nota-{i}/">Nota relacionada {i}</a></li>'
+    for i in range(1, 31)
+)
+
+
+def load_articles(paths=None):
+    """
+    Carga los artículos recolectados como lista de dicts
+
+    Args:
+        paths (list): CSVs a leer; por defecto el raw y los diarios
+
+    Returns:
+        list: Filas de los CSV
+    """
+    if paths is None:
+        paths = [RAW_CSV] + sorted(glob.glob(DAILY_CSVS))
+    rows = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def article_html(row):
+    """
+    Genera el HTML de la página de un artículo
+
+    Args:
+        row (dict): Fila del CSV de artículos
+
+    Returns:
+        str: HTML de la página
+    """
+    title = html.escape(row["Título"])
+    paragraphs = "".join(
+        f"<p>{html.escape(sentence.strip())}.</p>"
+        for sentence in row["Contenido"].split(". ")
+        if sentence.strip()
+    )
+    tags = "".join(
+        f'<a href="/etiqueta/{html.escape(tag.strip())}/" rel="tag">{html.escape(tag.strip())}</a>'
+        for tag in row["Etiquetas"].split(",")
+        if tag.strip()
+    )
+    date = row["Fecha"].replace(" ", "T")
+    body = f"""<div class="note">
+<h2 class="title">{title}</h2>
+<div class="meta"><time datetime="{date}">{row["Fecha"]}</time></div>
+<div class="note_content">
+<header class="note_header"><span>Compartir</span></header>
+{paragraphs}
+<script type="text/javascript">var addthis_config = {{"data_track_clickback": true}};</script>
+<ins class="adsbygoogle"></ins><iframe src="https://www.youtube.com/embed/x"></iframe>
+<nav class="pagination"><a href="#">1</a></nav>
+</div>
+<div id="taxonomies">{tags}</div>
+<span class="comment_count">{row["Número de Comentarios"]}</span>
+</div>"""
+    return (
+        _CHROME_HEAD.format(title=title, menu=_MENU)
+        + body
+        + _CHROME_FOOT.format(sidebar=_SIDEBAR)
+    )
+
+
+def listing_html(rows):
+    """
+    Genera el HTML de una página del listado con los artículos dados
+
+    Args:
+        rows (list): Filas del CSV de artículos
+
+    Returns:
+        str: HTML de la página del listado
+    """
+    posts = []
+    for i, row in enumerate(rows):
+        css = "bigimage_post" if i == 0 else "image_post"
+        posts.append(
+            f"""<div class="{css}"><div class="image"><img src="/img/{i}.jpg"></div>
+<div class="title"><a href="{html.escape(row["Enlace"])}">{html.escape(row["Título"])}</a></div>
+<div class="excerpt"><p>{html.escape(row["Contenido"][:200])}</p></div></div>"""
+        )
+    return (
+        _CHROME_HEAD.format(title="Portada", menu=_MENU)
+        + "".join(posts)
+        + _CHROME_FOOT.format(sidebar=_SIDEBAR)
+    )
+
+
+def load_html_dir(directory):
+    """
+    Lee los archivos HTML guardados en un directorio (recursivo)
+
+    Args:
+        directory (str): Directorio con páginas guardadas
+
+    Returns:
+        list: Contenido de cada archivo
+    """
+    pages = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(".tmp"):
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                pages.append(f.read().decode("utf-8", errors="replace"))
+    return pages
+
+
+def load_reports(path=REPORTS_JSON):
+    """
+    Carga los datos extraídos por el LLM del JSON anidado año -> mes
+
+    Args:
+        path (str): JSON organizado por el extractor
+
+    Returns:
+        dict: {enlace o fecha: datos}; los registros con `id` en lugar de
+            enlace se identifican por la fecha del artículo
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        nested = json.load(f)
+    return {
+        record.get("enlace") or record["fecha"]: record["datos"]
+        for months in nested.values()
+        for records in months.values()
+        for record in records
+        if isinstance(record, dict) and record.get("datos")
+    }
+
+
+def canned_responses(rows, reports):
+    """
+    Asocia a cada título la respuesta del LLM para su artículo (por enlace o
+    por fecha); los artículos sin reporte reciben uno de los existentes,
+    siempre el mismo
+
+    Args:
+        rows (list): Filas del CSV de artículos
+        reports (dict): Reportes de load_reports
+
+    Returns:
+        dict: {título: datos}
+    """
+    fallback = list(reports.values())
+    responses = {}
+    for row in rows:
+        datos = reports.get(row["Enlace"]) or reports.get(row["Fecha"])
+        if datos is None:
+            datos = fallback[zlib.crc32(row["Título"].encode()) % len(fallback)]
+        responses.setdefault(row["Título"], datos)
+    return responses
+
+
+def scaled_articles(rows, scale):
+    """
+    Replica los artículos `scale` veces; cada réplica tiene otro enlace y una
+    frase más en el contenido, para que no coincida en los cachés
+
+    Args:
+        rows (list): Filas del CSV de artículos
+        scale (int): Veces que se repite cada artículo
+
+    Returns:
+        list: Filas, primero las originales y luego cada réplica
+    """
+    scaled = [dict(row) for row in rows]
+    for k in range(1, scale):
+        for row in rows:
+            scaled.append(
+                {
+                    **row,
+                    "Enlace": f"{row['Enlace'].rstrip('/')}-r{k}/",
+                    "Contenido": f"{row['Contenido']} Réplica {k}.",
+                }
+            )
+    return scaled
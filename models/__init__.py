@@ -0,0 +1,10 @@
+"""
+Entrenamiento de los modelos de predicción.
+"""
+
+from models.forecasting import DirectForecaster
+from models.retraining import retrain_all
+from models.serving import PredictionService
+from models.training import TARGETS, train_all
+
+__all__ = ['DirectForecaster', 'PredictionService', 'TARGETS', 'retrain_all', 'train_all']
\ No newline at end of file
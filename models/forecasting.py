@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Pronóstico a varios días de demanda, déficit y disponibilidad.
+
+Los modelos de models.training predicen el valor del mismo día a partir de
+variables del mismo reporte (`demanda_07am`, `deficit_real`, ...), que solo
+se conocen cuando ese día ya empezó. Aquí, en cambio, desde cada día de
+origen t se pronostican los días t+1 ... t+H de los tres objetivos a la vez
+(estrategia directa: un modelo por horizonte y objetivo), usando solo lo que
+se sabe al cierre del día t:
+
+- rezagos de 0 a 6 días y medias de 7 y 30 días de los tres objetivos,
+- plantas en avería y en mantenimiento, limitación térmica y motores del
+  último reporte, y los días transcurridos desde ese reporte,
+- el día de la semana y la época del año del origen (con el horizonte fijo,
+  equivalen a los del día pronosticado).
+
+Los días sin reporte quedan vacíos como objetivo y se rellenan con el último
+valor conocido como variable.
+
+Cada modelo es una regresión ridge con variables estandarizadas, resuelta
+en forma cerrada: todos los coeficientes forman una matriz
+(variables x horizontes·objetivos), y el pronóstico de todos los orígenes,
+horizontes y objetivos es un solo producto de matrices. Como las matrices
+de Gram son sumas por fila, sus sumas acumuladas dan el modelo que se
+habría ajustado en cada origen con los datos disponibles hasta ese día (sin
+usar objetivos posteriores al origen), así que el backtesting sobre todos
+los orígenes del historial se resuelve con operaciones vectorizadas y sin
+recorrer los días en Python.
+
+    python models/forecasting.py outlook --horizon 7
+    python models/forecasting.py backtest --horizon 7 --output backtest.csv
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.training import TARGETS
+from processing.columnar import load_features
+from processing.feature_store import add_derived_features, daily_series
+
+logger = logging.getLogger("forecasting")
+
+DEFAULT_HORIZON = 7
+DEFAULT_ALPHA = 1.0
+DEFAULT_MIN_TRAIN = 60
+
+LAG_DAYS = range(7)
+WINDOWS = (7, 30)
+EXOGENOUS = [
+    "plantas_averiadas",
+    "plantas_mantenimiento",
+    "mw_limitacion_termica",
+    "mw_motores_problemas",
+]
+
+
+def daily_frame(table):
+    """
+    Serie diaria continua (un día por fila, vacío si no hubo reporte)
+
+    Args:
+        table (DataFrame): Tabla de variables (un reporte por fila)
+
+    Returns:
+        DataFrame: Columnas base y derivadas indexadas por día
+    """
+    daily = daily_series(table)
+    return add_derived_features(daily.asfreq("D"))
+
+
+def origin_features(daily):
+    """
+    Variables conocidas al cierre de cada día, para pronosticar los siguientes
+
+    Args:
+        daily (DataFrame): Serie de daily_frame
+
+    Returns:
+        DataFrame: Una fila por día de origen; vacía donde falta historia
+    """
+    columns = [target.column for target in TARGETS.values()]
+    filled = daily[columns + EXOGENOUS].ffill()
+    features = {}
+    for column in columns:
+        for lag in LAG_DAYS:
+            features[f"{column}_lag{lag}"] = filled[column].shift(lag)
+        for window in WINDOWS:
+            features[f"{column}_mean{window}"] = (
+                filled[column].rolling(window, min_periods=1).mean()
+            )
+    for column in EXOGENOUS:
+        # Sin dato de motores o limitación en el reporte: sin afectación
+        features[column] = filled[column].fillna(0.0)
+
+    reported = daily[columns[0]].notna().to_numpy()
+    positions = np.arange(len(daily))
+    last_report = np.maximum.accumulate(np.where(reported, positions, -1))
+    features["dias_sin_reporte"] = np.where(
+        last_report >= 0, positions - last_report, np.nan
+    )
+
+    index = daily.index
+    for day in range(1, 7):
+        features[f"dia_semana_{day}"] = (index.dayofweek == day).astype("float64")
+    angle = 2 * np.pi * index.dayofyear.to_numpy() / 365.25
+    features["estacion_sin"] = np.sin(angle)
+    features["estacion_cos"] = np.cos(angle)
+    return pd.DataFrame(features, index=index).astype("float64")
+
+
+def horizon_targets(daily, horizon):
+    """
+    Matriz de objetivos por origen y horizonte
+
+    Args:
+        daily (DataFrame): Serie de daily_frame
+        horizon (int): Días pronosticados desde cada origen
+
+    Returns:
+        ndarray: (orígenes, horizonte, objetivos); NaN si el día no tuvo reporte
+    """
+    values = daily[[target.column for target in TARGETS.values()]].to_numpy("float64")
+    padded = np.vstack([values, np.full((horizon, values.shape[1]), np.nan)])
+    return np.stack([padded[h : h + len(values)] for h in range(1, horizon + 1)], 1)
+
+
+def _ridge(gram, moments, alpha):
+    """
+    Resuelve a la vez varias regresiones ridge con intercepto
+
+    Args:
+        gram (ndarray): (..., p, p) sumas de x̃x̃ᵀ, con x̃ = [1, x]
+        moments (ndarray): (..., p) sumas de x̃·y
+        alpha (float): Penalización sobre las variables estandarizadas
+
+    Returns:
+        ndarray: (..., p) intercepto y coeficientes en la escala original
+    """
+    count = np.maximum(gram[..., 0, 0], 1.0)
+    mean = gram[..., 0, :] / count[..., None]
+    square = np.diagonal(gram, axis1=-2, axis2=-1) / count[..., None]
+    variance = np.maximum(square - mean**2, 0.0)
+    # Penalizar β_j con α·σ_j² equivale a ridge sobre variables estandarizadas
+    penalty = alpha * variance * count[..., None] + 1e-9 * (1.0 + mean**2)
+    penalty[..., 0] = 0.0
+    system = gram + penalty[..., None] * np.eye(gram.shape[-1])
+    return np.linalg.solve(system, moments[..., None])[..., 0]
+
+
+class DirectForecaster:
+    """
+    Pronóstico directo a varios días de los objetivos de TARGETS.
+    """
+
+    def __init__(
+        self,
+        horizon=DEFAULT_HORIZON,
+        alpha=DEFAULT_ALPHA,
+        min_train=DEFAULT_MIN_TRAIN,
+    ):
+        """
+        Args:
+            horizon (int): Días pronosticados desde cada origen
+            alpha (float): Penalización ridge
+            min_train (int): Filas de entrenamiento mínimas de cada modelo
+        """
+        self.horizon = horizon
+        self.alpha = alpha
+        self.min_train = min_train
+        self.targets = list(TARGETS)
+        self.features = None
+        self.coef = None
+
+    def _design(self, daily):
+        """
+        Returns:
+            tuple: (x̃ = [1, x] por origen, orígenes con todas las variables,
+                último valor conocido de cada objetivo en el origen)
+        """
+        X = origin_features(daily)
+        self.features = list(X.columns)
+        values = X.to_numpy()
+        valid = ~np.isnan(values).any(axis=1)
+        design = np.hstack([np.ones((len(values), 1)), np.nan_to_num(values)])
+        base = X[[f"{t.column}_lag0" for t in TARGETS.values()]].to_numpy()
+        return design, valid, base
+
+    def _systems(self, design, valid, Y):
+        """
+        Aportes de cada origen a las matrices de Gram de cada modelo
+
+        Returns:
+            tuple: (pesos (orígenes, modelos), x̃x̃ᵀ (orígenes, p, p),
+                x̃·y (orígenes, modelos, p))
+        """
+        n = len(design)
+        targets = Y.reshape(n, -1)
+        weights = (valid[:, None] & ~np.isnan(targets)).astype("float64")
+        outer = np.einsum("si,sj->sij", design, design)
+        moments = np.einsum("sc,si->sci", np.nan_to_num(targets) * weights, design)
+        return weights, outer, moments
+
+    def fit(self, daily):
+        """
+        Ajusta los modelos de todos los horizontes y objetivos con todo el
+        historial
+
+        Args:
+            daily (DataFrame): Serie de daily_frame
+
+        Returns:
+            DirectForecaster: self
+        """
+        design, valid, base = self._design(daily)
+        Y = horizon_targets(daily, self.horizon) - base[:, None, :]
+        weights, outer, moments = self._systems(design, valid, Y)
+        gram = np.einsum("sc,sij->cij", weights, outer)
+        coef = _ridge(gram, moments.sum(axis=0), self.alpha)
+        coef[weights.sum(axis=0) < self.min_train] = np.nan
+        self.coef = coef.reshape(self.horizon, len(self.targets), -1)
+        return self
+
+    def predict(self, daily):
+        """
+        Pronóstico desde cada día de la serie
+
+        Args:
+            daily (DataFrame): Serie de daily_frame
+
+        Returns:
+            ndarray: (orígenes, horizonte, objetivos)
+        """
+        design, valid, base = self._design(daily)
+        predictions = np.einsum("sp,htp->sht", design, self.coef) + base[:, None, :]
+        predictions[~valid] = np.nan
+        return predictions
+
+    def forecast(self, daily):
+        """
+        Pronóstico de los próximos días desde el último día de la serie
+
+        Args:
+            daily (DataFrame): Serie de daily_frame
+
+        Returns:
+            DataFrame: Una fila por día pronosticado, una columna por objetivo
+        """
+        predictions = self.predict(daily)[-1]
+        index = pd.date_range(
+            daily.index[-1] + pd.Timedelta(days=1),
+            periods=self.horizon,
+            freq="D",
+            name="fecha",
+        )
+        return pd.DataFrame(predictions, index=index, columns=self.targets)
+
+    def backtest(self, daily, refit_every=1):
+        """
+        Pronóstico desde cada origen del historial con los modelos que se
+        habrían ajustado en ese origen: el ejemplo (s, h) entra al
+        entrenamiento recién en el origen s + h, cuando su objetivo ya se
+        conoce
+
+        Args:
+            daily (DataFrame): Serie de daily_frame
+            refit_every (int): Reajustar cada tantos orígenes; entre medio se
+                usa el último ajuste (1 para ajustar en todos)
+
+        Returns:
+            ndarray: (orígenes, horizonte, objetivos)
+        """
+        design, valid, base = self._design(daily)
+        Y = horizon_targets(daily, self.horizon) - base[:, None, :]
+        weights, outer, moments = self._systems(design, valid, Y)
+        n, p = design.shape
+        n_targets = len(self.targets)
+        refit = np.arange(n) % refit_every == 0
+        coef = np.full((n, weights.shape[1], p), np.nan)
+        for lag in range(1, self.horizon + 1):
+            # Modelos del horizonte (en el orden de horizon_targets); los que
+            # se entrenan con los mismos días comparten la matriz de Gram
+            groups = {}
+            for model in range((lag - 1) * n_targets, lag * n_targets):
+                groups.setdefault(weights[:, model].tobytes(), []).append(model)
+            for models in groups.values():
+                # Sumas hasta el origen t de los ejemplos con s + h <= t
+                used = weights[: n - lag, models[0], None, None] * outer[: n - lag]
+                gram = np.zeros((n, p, p))
+                moment = np.zeros((n, len(models), p))
+                gram[lag:] = np.cumsum(used, axis=0)
+                moment[lag:] = np.cumsum(moments[: n - lag, models], axis=0)
+                ready = np.flatnonzero(refit & (gram[:, 0, 0] >= self.min_train))
+                if len(ready):
+                    coef[ready[:, None], models] = _ridge(
+                        gram[ready, None], moment[ready], self.alpha
+                    )
+
+        coef = coef[np.arange(n) // refit_every * refit_every]
+        predictions = np.einsum("sp,scp->sc", design, coef)
+        predictions = predictions.reshape(n, self.horizon, n_targets) + base[:, None, :]
+        predictions[~valid] = np.nan
+        return predictions
+
+
+def backtest_frame(daily, predictions):
+    """
+    Pronósticos del backtesting en formato largo, con el valor observado y
+    el de persistencia (último valor conocido en el origen)
+
+    Args:
+        daily (DataFrame): Serie de daily_frame
+        predictions (ndarray): Resultado de DirectForecaster.backtest
+
+    Returns:
+        DataFrame: origen, fecha, horizonte, objetivo, prediccion, real,
+            persistencia; solo filas con pronóstico y valor observado
+    """
+    n, horizon, n_targets = predictions.shape
+    columns = [target.column for target in TARGETS.values()]
+    actual = horizon_targets(daily, horizon)
+    naive = daily[columns].ffill().to_numpy("float64")
+    origins = daily.index.to_numpy()
+    steps = np.arange(1, horizon + 1)
+    frame = pd.DataFrame(
+        {
+            "origen": np.repeat(origins, horizon * n_targets),
+            "horizonte": np.tile(np.repeat(steps, n_targets), n),
+            "objetivo": np.tile(list(TARGETS), n * horizon),
+            "prediccion": predictions.reshape(-1),
+            "real": actual.reshape(-1),
+            "persistencia": np.repeat(naive, horizon, axis=0).reshape(-1),
+        }
+    )
+    frame.insert(1, "fecha", frame["origen"] + pd.to_timedelta(frame["horizonte"], "D"))
+    return frame.dropna(subset=["prediccion", "real"]).reset_index(drop=True)
+
+
+def backtest_metrics(frame):
+    """
+    Args:
+        frame (DataFrame): Resultado de backtest_frame
+
+    Returns:
+        DataFrame: MAE y RMSE del modelo y MAE de persistencia por objetivo
+            y horizonte
+    """
+    errors = frame.assign(
+        error=(frame["prediccion"] - frame["real"]).abs(),
+        error2=(frame["prediccion"] - frame["real"]) ** 2,
+        error_persistencia=(frame["persistencia"] - frame["real"]).abs(),
+    )
+    metrics = errors.groupby(["objetivo", "horizonte"]).agg(
+        n=("error", "size"),
+        mae=("error", "mean"),
+        rmse=("error2", "mean"),
+        mae_persistencia=("error_persistencia", "mean"),
+    )
+    metrics["rmse"] = np.sqrt(metrics["rmse"])
+    return metrics.round(2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-day forecasts of the targets.")
+    parser.add_argument("command", choices=["outlook", "backtest"])
+    parser.add_argument("--data_dir", type=str, default="data", help="Data directory")
+    parser.add_argument(
+        "--horizon", type=int, default=DEFAULT_HORIZON, help="Days to forecast"
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=DEFAULT_ALPHA, help="Ridge penalty"
+    )
+    parser.add_argument(
+        "--min_train",
+        type=int,
+        default=DEFAULT_MIN_TRAIN,
+        help="Minimum training rows per model",
+    )
+    parser.add_argument(
+        "--refit_every",
+        type=int,
+        default=1,
+        help="In backtest mode, refit every N origins (1 refits at every origin)",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="CSV for the forecasts"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    daily = daily_frame(load_features(args.data_dir))
+    forecaster = DirectForecaster(args.horizon, args.alpha, args.min_train)
+    start = time.perf_counter()
+    if args.command == "outlook":
+        result = forecaster.fit(daily).forecast(daily).round(1)
+        print(result.to_string())
+    else:
+        predictions = forecaster.backtest(daily, refit_every=args.refit_every)
+        result = backtest_frame(daily, predictions)
+        logger.info(
+            f"Backtesting de {result['origen'].nunique()} orígenes en "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+        print(backtest_metrics(result).to_string())
+    if args.output:
+        result.to_csv(args.output, index=args.command == "outlook")
+        logger.info(f"Pronósticos guardados en {args.output}")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Reentrenamiento incremental de los modelos guardados por models.training.
+
+Pensado para correr tras cada actualización diaria de los datos:
+
+- Si un objetivo tiene menos de `min_new_rows` filas nuevas desde su último
+  entrenamiento, se deja como está.
+- La validación es de origen móvil: los datos se ordenan por fecha y el
+  modelo se evalúa prediciendo siempre filas posteriores a las de ajuste
+  (TimeSeriesSplit), en lugar de una división aleatoria.
+- RandomForest y GradientBoosting se actualizan con warm_start, agregando
+  árboles ajustados con todos los datos en vez de empezar de cero. Cuando el
+  modelo llega a `max_growth` veces su tamaño original se vuelve a ajustar
+  completo. SVR no admite warm_start y se ajusta de nuevo, lo que con estos
+  volúmenes cuesta milisegundos.
+
+La búsqueda de hiperparámetros no se repite: para eso está models.training.
+
+    python models/retraining.py --min_new_rows 5
+"""
+import argparse
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.model_selection import TimeSeriesSplit
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.training import (
+    DEFAULT_OUTPUT_DIR,
+    TARGETS,
+    build_model,
+    prepare_data,
+    regression_metrics,
+    save_model,
+    target_data,
+)
+from processing.columnar import load_features
+
+logger = logging.getLogger("retraining")
+
+DEFAULT_MIN_NEW_ROWS = 5
+
+
+def rolling_origin_metrics(model, params, X, y, n_splits=3, horizon=30):
+    """
+    Métricas de validación de origen móvil de una configuración. Con pocas
+    filas se reducen el horizonte y los orígenes a los que caben
+
+    Args:
+        model (str): Modelo de CANDIDATES
+        params (dict): Hiperparámetros
+        X (DataFrame): Variables ordenadas por fecha
+        y (Series): Objetivo ordenado por fecha
+        n_splits (int): Orígenes de la validación
+        horizon (int): Filas que se predicen desde cada origen
+
+    Returns:
+        dict: Métricas sobre todas las predicciones fuera de muestra, o None
+            si no caben al menos dos orígenes
+    """
+    horizon = max(1, min(horizon, len(X) // (n_splits + 1)))
+    # Cada origen necesita al menos una fila de ajuste antes de sus `horizon`
+    n_splits = min(n_splits, (len(X) - 1) // horizon)
+    if n_splits < 2:
+        logger.info(
+            f"{len(X)} filas no alcanzan para la validación de origen móvil, "
+            "se omiten las métricas"
+        )
+        return None
+    splits = TimeSeriesSplit(n_splits=n_splits, test_size=horizon)
+    y_true, y_pred = [], []
+    for train_idx, test_idx in splits.split(X):
+        estimator = build_model(model, params).fit(X.iloc[train_idx], y.iloc[train_idx])
+        y_true.append(y.iloc[test_idx].to_numpy())
+        y_pred.append(estimator.predict(X.iloc[test_idx]))
+    return regression_metrics(np.concatenate(y_true), np.concatenate(y_pred))
+
+
+def update_estimator(bundle, X, y, add_fraction=0.1, max_growth=2.0):
+    """
+    Actualiza el modelo de un objetivo con los datos completos
+
+    Args:
+        bundle (dict): Modelo guardado por models.training
+        X (DataFrame): Variables
+        y (Series): Objetivo
+        add_fraction (float): Árboles a agregar, como fracción del tamaño original
+        max_growth (float): Tamaño máximo, en veces el original, antes de
+            ajustar de nuevo desde cero
+
+    Returns:
+        tuple: (modelo, True si se usó warm_start)
+    """
+    estimator = bundle["model"]
+    params = bundle["params"]
+    current = estimator.get_params()
+    if "warm_start" in current and "n_estimators" in current:
+        base = params.get("n_estimators", current["n_estimators"])
+        grown = current["n_estimators"] + max(1, math.ceil(base * add_fraction))
+        if grown <= base * max_growth:
+            estimator.set_params(warm_start=True, n_estimators=grown)
+            estimator.fit(X, y)
+            estimator.set_params(warm_start=False)
+            return estimator, True
+    return build_model(bundle["model_name"], params).fit(X, y), False
+
+
+def retrain_target(df, bundle, min_new_rows=DEFAULT_MIN_NEW_ROWS, n_splits=3):
+    """
+    Reentrena el modelo de un objetivo si hay suficientes filas nuevas
+
+    Args:
+        df (DataFrame): Datos preparados con prepare_data
+        bundle (dict): Modelo guardado por models.training
+        min_new_rows (int): Filas nuevas mínimas para reentrenar
+        n_splits (int): Orígenes de la validación de origen móvil
+
+    Returns:
+        dict: Modelo actualizado o None si no hacía falta
+    """
+    target = TARGETS[bundle["target"]]
+    df = df.sort_values("fecha", kind="stable")
+    X, y = target_data(df, target)
+    fechas = df.loc[X.index, "fecha"]
+
+    if bundle.get("last_fecha") is not None:
+        new_rows = int((fechas > np.datetime64(bundle["last_fecha"])).sum())
+    else:
+        new_rows = len(X) - bundle.get("n_rows", bundle["n_train"] + bundle["n_test"])
+    if new_rows < min_new_rows:
+        logger.info(
+            f"{target.name}: {new_rows} filas nuevas (mínimo {min_new_rows}), "
+            "no se reentrena"
+        )
+        return None
+
+    start = time.perf_counter()
+    metrics = rolling_origin_metrics(
+        bundle["model_name"], bundle["params"], X, y, n_splits=n_splits
+    )
+    estimator, warm = update_estimator(bundle, X, y)
+    bundle = dict(bundle)
+    bundle.update(
+        {
+            "model": estimator,
+            "rolling_metrics": metrics,
+            "n_rows": len(X),
+            "last_fecha": str(fechas.max()),
+            "retrained_at": datetime.now().isoformat(timespec="seconds"),
+            "warm_started": warm,
+        }
+    )
+    mode = "warm_start" if warm else "desde cero"
+    validation = (
+        "sin RMSE de origen móvil"
+        if metrics is None
+        else f"RMSE de origen móvil {metrics['rmse']:.1f}"
+    )
+    logger.info(
+        f"{target.name}: reentrenado con {new_rows} filas nuevas en "
+        f"{time.perf_counter() - start:.1f}s ({mode}), {validation}"
+    )
+    return bundle
+
+
+def retrain_all(
+    data_dir="data",
+    output_dir=DEFAULT_OUTPUT_DIR,
+    targets=None,
+    min_new_rows=DEFAULT_MIN_NEW_ROWS,
+):
+    """
+    Reentrena los modelos guardados que tengan datos nuevos suficientes
+
+    Args:
+        data_dir (str): Directorio de datos del pipeline
+        output_dir (str): Directorio de los modelos
+        targets (list): Nombres de TARGETS (None para todos)
+        min_new_rows (int): Filas nuevas mínimas para reentrenar
+
+    Returns:
+        list: Objetivos reentrenados
+    """
+    df = None
+    retrained = []
+    for name in targets or TARGETS:
+        path = os.path.join(output_dir, f"{name}.joblib")
+        if not os.path.exists(path):
+            logger.info(f"{name}: no hay modelo en {path}, ejecutar models/training.py")
+            continue
+        if df is None:
+            df = prepare_data(load_features(data_dir))
+        bundle = retrain_target(df, joblib.load(path), min_new_rows=min_new_rows)
+        if bundle is not None:
+            save_model(bundle, output_dir)
+            retrained.append(name)
+    return retrained
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally retrain the models.")
+    parser.add_argument("--data_dir", type=str, default="data", help="Data directory")
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory with the trained models",
+    )
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        choices=list(TARGETS),
+        default=None,
+        help="Targets to retrain (all by default)",
+    )
+    parser.add_argument(
+        "--min_new_rows",
+        type=int,
+        default=DEFAULT_MIN_NEW_ROWS,
+        help="Skip targets with fewer new rows than this",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    retrain_all(
+        data_dir=args.data_dir,
+        output_dir=args.output_dir,
+        targets=args.targets,
+        min_new_rows=args.min_new_rows,
+    )
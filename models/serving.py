@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Servicio de predicción de demanda, déficit y disponibilidad.
+
+Los modelos guardados por models.training se cargan una sola vez, la primera
+vez que se piden, con `joblib.load(mmap_mode="r")`: los arreglos de los
+árboles quedan mapeados en memoria en lugar de copiarse. Si un modelo se
+reentrena, el archivo cambia y se vuelve a cargar en la siguiente petición.
+
+Los RandomForest y GradientBoosting se compilan al cargarlos a arreglos
+planos de nodos (CompiledForest) que recorren todos los árboles a la vez con
+numpy: `predict` de scikit-learn recorre los árboles uno por uno en Python y
+para una fila tarda decenas de milisegundos; el recorrido vectorizado da el
+mismo resultado en fracciones de milisegundo.
+
+Las predicciones de una sola fila que llegan a la vez se agrupan
+(micro-batching): un hilo por objetivo junta hasta `max_batch` filas o espera
+`max_wait_ms` y llama a `predict` una vez para todas, que es lo que cuesta
+en RandomForest/GradientBoosting. Cada petición registra su latencia para el
+reporte p50/p99.
+
+Una fila puede traer solo `fecha`: las variables que falten se toman del
+almacén de variables (processing.feature_store), las mismas con las que se
+entrenó.
+
+Uso:
+
+    python models/serving.py serve --port 8765
+    curl -X POST localhost:8765/predict/demanda \\
+        -d '{"rows": [{"plantas_mantenimiento": 2, "demanda_07am": 1800, ...}]}'
+    curl -X POST localhost:8765/predict/demanda \\
+        -d '{"rows": [{"fecha": "2025-05-01"}]}'
+    curl localhost:8765/stats
+
+    python models/serving.py predict --target demanda --csv filas.csv
+    python models/serving.py bench --target demanda --requests 2000 --clients 8
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.training import DEFAULT_OUTPUT_DIR, TARGETS
+
+logger = logging.getLogger("serving")
+
+# Los modelos se ajustaron con DataFrames; aquí se predice con arreglos
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+class LatencyTracker:
+    """
+    Latencias recientes de un tipo de petición, para el reporte p50/p99.
+    """
+
+    def __init__(self, size=10000):
+        self._samples = deque(maxlen=size)
+        self._rows = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds, rows=1):
+        with self._lock:
+            self._samples.append(seconds)
+            self._rows.append(rows)
+            self.count += 1
+
+    def report(self):
+        """
+        Returns:
+            dict: Peticiones, filas y percentiles de latencia en milisegundos
+        """
+        with self._lock:
+            samples = np.array(self._samples)
+            rows = np.array(self._rows)
+        if not len(samples):
+            return {"requests": self.count}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {
+            "requests": self.count,
+            "p50_ms": round(float(p50), 4),
+            "p99_ms": round(float(p99), 4),
+            "max_ms": round(float(samples.max()) * 1000, 4),
+            "ms_per_row": round(float(samples.sum() / rows.sum()) * 1000, 4),
+        }
+
+
+class CompiledForest:
+    """
+    Ensamble de árboles de regresión como arreglos planos de nodos.
+
+    Los nodos de todos los árboles se concatenan; las hojas apuntan a sí
+    mismas con umbral infinito, así que tras `depth` pasos cada fila está en
+    una hoja de cada árbol sin comprobar cuáles terminaron antes.
+    """
+
+    def __init__(self, trees, scale, offset):
+        """
+        Args:
+            trees (list): Árboles ajustados (`tree_` de scikit-learn)
+            scale (float): Factor de la suma de las hojas (1/n en RandomForest,
+                learning_rate en GradientBoosting)
+            offset (float): Valor inicial que se suma a la predicción
+        """
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        start = 0
+        depth = 0
+        for tree in trees:
+            n = tree.node_count
+            nodes = np.arange(start, start + n)
+            leaf = tree.children_left < 0
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            left.append(np.where(leaf, nodes, tree.children_left + start))
+            right.append(np.where(leaf, nodes, tree.children_right + start))
+            value.append(tree.value[:, 0, 0])
+            roots.append(start)
+            depth = max(depth, tree.max_depth)
+            start += n
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.depth = depth
+        self.scale = scale
+        self.offset = offset
+
+    def predict(self, X):
+        # scikit-learn compara las variables en float32
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.offset + self.scale * self.value[node].sum(axis=1)
+
+
+def compile_model(model):
+    """
+    Compila un RandomForest o GradientBoosting a CompiledForest
+
+    Args:
+        model: Modelo ajustado
+
+    Returns:
+        CompiledForest o el mismo modelo si no es un ensamble compilable
+    """
+    if isinstance(model, RandomForestRegressor):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        return CompiledForest(trees, 1.0 / len(trees), 0.0)
+    if isinstance(model, GradientBoostingRegressor) and model.loss == "squared_error":
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        compiled = CompiledForest(trees, model.learning_rate, 0.0)
+        # El valor inicial (la media del objetivo) sale de comparar con predict
+        probe = np.zeros((1, model.n_features_in_))
+        compiled.offset = float(model.predict(probe)[0] - compiled.predict(probe)[0])
+        return compiled
+    return model
+
+
+class ModelRegistry:
+    """
+    Modelos guardados, cargados bajo demanda con memory-map.
+    """
+
+    def __init__(self, models_dir=DEFAULT_OUTPUT_DIR):
+        """
+        Args:
+            models_dir (str): Directorio con los `<objetivo>.joblib`
+        """
+        self.models_dir = models_dir
+        self._bundles = {}
+        self._lock = threading.Lock()
+
+    def get(self, target):
+        """
+        Args:
+            target (str): Nombre del objetivo
+
+        Returns:
+            dict: Modelo y metadatos guardados por models.training, con el
+                modelo compilado en `predictor`
+        """
+        if target not in TARGETS:
+            raise KeyError(f"Objetivo desconocido: {target}")
+        path = os.path.join(self.models_dir, f"{target}.joblib")
+        mtime = os.path.getmtime(path)
+        cached = self._bundles.get(target)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with self._lock:
+            cached = self._bundles.get(target)
+            if cached is None or cached[0] != mtime:
+                bundle = joblib.load(path, mmap_mode="r")
+                bundle["predictor"] = compile_model(bundle["model"])
+                self._bundles[target] = (mtime, bundle)
+                logger.info(f"Modelo {target} cargado desde {path}")
+            return self._bundles[target][1]
+
+    def available(self):
+        return [
+            target
+            for target in TARGETS
+            if os.path.exists(os.path.join(self.models_dir, f"{target}.joblib"))
+        ]
+
+
+class MicroBatcher:
+    """
+    Agrupa predicciones de una fila que llegan a la vez en una sola llamada
+    a `predict`.
+    """
+
+    def __init__(self, predict, max_batch=64, max_wait_ms=1.0):
+        """
+        Args:
+            predict (callable): Recibe una matriz de filas y devuelve predicciones
+            max_batch (int): Filas máximas por llamada
+            max_wait_ms (float): Espera máxima por más filas antes de predecir
+        """
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """
+        Args:
+            row (ndarray): Fila de variables
+
+        Returns:
+            Future: Predicción de la fila
+        """
+        future = Future()
+        with self._lock:
+            self._in_flight += 1
+        self._queue.put((row, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            # Solo se espera si hay otras peticiones en curso que puedan sumarse
+            while len(batch) < min(self.max_batch, self._in_flight):
+                timeout = deadline - time.perf_counter()
+                try:
+                    batch.append(
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._in_flight -= len(batch)
+            rows = np.vstack([row for row, _ in batch])
+            try:
+                predictions = self.predict(rows)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), value in zip(batch, predictions):
+                future.set_result(float(value))
+
+
+class PredictionService:
+    """
+    Predicciones individuales (con micro-batching) y por lotes para los
+    objetivos entrenados.
+    """
+
+    def __init__(
+        self,
+        models_dir=DEFAULT_OUTPUT_DIR,
+        max_batch=64,
+        max_wait_ms=1.0,
+        feature_store=None,
+    ):
+        """
+        Args:
+            models_dir (str): Directorio con los modelos entrenados
+            max_batch (int): Filas máximas por llamada agrupada a `predict`
+            max_wait_ms (float): Espera máxima para agrupar filas individuales
+            feature_store (FeatureStore): Almacén de variables por fecha para
+                completar las filas que traen `fecha` (opcional)
+        """
+        self.registry = ModelRegistry(models_dir)
+        self.feature_store = feature_store
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._batchers = {}
+        self._lock = threading.Lock()
+        self.latency = {"single": LatencyTracker(), "batch": LatencyTracker()}
+
+    def features(self, target):
+        return self.registry.get(target)["features"]
+
+    def to_matrix(self, target, rows):
+        """
+        Convierte filas (diccionarios o listas en el orden de las variables) en
+        una matriz para el modelo
+
+        Raises:
+            ValueError: Si a una fila le faltan variables
+        """
+        features = self.features(target)
+        matrix = []
+        for row in rows:
+            if isinstance(row, dict):
+                row = self._fill_from_store(row, features)
+                missing = [f for f in features if f not in row]
+                if missing:
+                    raise ValueError(f"Faltan variables: {', '.join(missing)}")
+                row = [row[f] for f in features]
+            elif len(row) != len(features):
+                raise ValueError(f"Se esperaban {len(features)} variables: {features}")
+            matrix.append(row)
+        return np.asarray(matrix, dtype="float64")
+
+    def _fill_from_store(self, row, features):
+        """
+        Completa las variables que faltan en una fila con las del almacén de
+        variables para su `fecha`; las que trae la fila tienen prioridad
+        """
+        if self.feature_store is None or "fecha" not in row:
+            return row
+        if all(f in row for f in features):
+            return row
+        stored = self.feature_store.get(row["fecha"])
+        if stored is None:
+            return row
+        return {**stored[stored.index.intersection(features)].to_dict(), **row}
+
+    def _predict_matrix(self, target, matrix):
+        return self.registry.get(target)["predictor"].predict(matrix)
+
+    def _batcher(self, target):
+        batcher = self._batchers.get(target)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.setdefault(
+                    target,
+                    MicroBatcher(
+                        lambda m: self._predict_matrix(target, m),
+                        max_batch=self.max_batch,
+                        max_wait_ms=self.max_wait_ms,
+                    ),
+                )
+        return batcher
+
+    def predict_one(self, target, row):
+        """
+        Predicción de una fila, agrupada con las que lleguen a la vez
+
+        Returns:
+            float: Valor predicho en MW
+        """
+        start = time.perf_counter()
+        matrix = self.to_matrix(target, [row])
+        value = self._batcher(target).submit(matrix[0]).result()
+        self.latency["single"].record(time.perf_counter() - start)
+        return value
+
+    def predict_batch(self, target, rows):
+        """
+        Predicciones de varias filas en una sola llamada al modelo
+
+        Returns:
+            list: Valores predichos en MW
+        """
+        start = time.perf_counter()
+        matrix = self.to_matrix(target, rows)
+        values = self._predict_matrix(target, matrix).tolist()
+        self.latency["batch"].record(time.perf_counter() - start, rows=len(rows))
+        return values
+
+    def predict(self, target, rows):
+        if len(rows) == 1:
+            return [self.predict_one(target, rows[0])]
+        return self.predict_batch(target, rows)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Reporte de latencias de peticiones individuales y por lotes
+        """
+        return {name: tracker.report() for name, tracker in self.latency.items()}
+
+
+def request_rows(payload):
+    """
+    Filas de una petición POST /predict/<objetivo>
+
+    Args:
+        payload: Cuerpo JSON de la petición, {"rows": [...]} o {"row": {...}}
+
+    Returns:
+        list: Filas (diccionarios de variables), al menos una
+
+    Raises:
+        ValueError: Si el cuerpo no tiene esa forma
+    """
+    if not isinstance(payload, dict):
+        raise ValueError(
+            'El cuerpo debe ser un objeto {"rows": [...]} o {"row": {...}}'
+        )
+    if "rows" in payload:
+        rows = payload["rows"]
+    elif "row" in payload:
+        rows = [payload["row"]]
+    else:
+        raise ValueError('Falta "rows" o "row" en el cuerpo')
+    if not isinstance(rows, list) or not rows:
+        raise ValueError('"rows" debe ser una lista no vacía de objetos')
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Cada fila debe ser un objeto {variable: valor}")
+    return rows
+
+
+def make_handler(service):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, service.stats())
+            elif self.path == "/health":
+                self._send(200, {"models": service.registry.available()})
+            else:
+                self._send(404, {"error": "Ruta desconocida"})
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "predict":
+                self._send(404, {"error": "Ruta desconocida"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                rows = request_rows(payload)
+                values = service.predict(parts[1], rows)
+            except (KeyError, ValueError, TypeError, FileNotFoundError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(200, {"target": parts[1], "predictions": values})
+
+    return PredictionHandler
+
+
+def serve(service, host="127.0.0.1", port=8765):
+    """
+    Atiende predicciones por HTTP hasta que se interrumpa el proceso
+
+    Rutas: POST /predict/<objetivo> con {"rows": [...]} o {"row": {...}},
+    GET /stats y GET /health
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logger.info(f"Servicio de predicción en http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Latencias: {json.dumps(service.stats())}")
+
+
+def bench(service, target, requests=2000, clients=8, data_dir="data"):
+    """
+    Mide la latencia de predicciones individuales concurrentes con filas de
+    la tabla de variables
+
+    Returns:
+        dict: Reporte de latencias
+    """
+    from models.training import prepare_data, target_data
+    from processing.columnar import load_features
+
+    X, _ = target_data(prepare_data(load_features(data_dir)), TARGETS[target])
+    rows = X.to_numpy()
+    service.predict_one(target, rows[0])  # carga el modelo fuera de la medición
+    service.latency["single"] = LatencyTracker()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(
+            executor.map(
+                lambda i: service.predict_one(target, rows[i % len(rows)]),
+                range(requests),
+            )
+        )
+    report = service.stats()["single"]
+    report["rows_per_s"] = round(requests / (time.perf_counter() - start), 1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the forecasting models.")
+    parser.add_argument("command", choices=["serve", "predict", "bench"])
+    parser.add_argument(
+        "--models_dir",
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory with the trained models",
+    )
+    parser.add_argument(
+        "--data_dir",
+        type=str,
+        default="data",
+        help="Data directory (feature store and bench rows)",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="HTTP host")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP port")
+    parser.add_argument("--target", type=str, choices=list(TARGETS), default="demanda")
+    parser.add_argument(
+        "--row", type=str, default=None, help="JSON object with one row of features"
+    )
+    parser.add_argument(
+        "--csv", type=str, default=None, help="CSV file with rows to predict"
+    )
+    parser.add_argument(
+        "--max_batch", type=int, default=64, help="Rows per micro-batch"
+    )
+    parser.add_argument(
+        "--max_wait_ms",
+        type=float,
+        default=1.0,
+        help="Milliseconds to wait for more rows before predicting",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="Requests for the benchmark"
+    )
+    parser.add_argument(
+        "--clients", type=int, default=8, help="Concurrent clients for the benchmark"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    from processing.feature_store import FeatureStore
+
+    service = PredictionService(
+        args.models_dir,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        feature_store=FeatureStore(os.path.join(args.data_dir, "processed")),
+    )
+    if args.command == "serve":
+        serve(service, args.host, args.port)
+    elif args.command == "bench":
+        report = bench(
+            service, args.target, args.requests, args.clients, args.data_dir
+        )
+        print(json.dumps(report))
+    else:
+        if args.csv:
+            rows = pd.read_csv(args.csv).to_dict("records")
+        elif args.row:
+            rows = [json.loads(args.row)]
+        else:
+            parser.error("predict necesita --row o --csv")
+        for value in service.predict(args.target, rows):
+            print(f"{value:.1f}")
+        print(json.dumps(service.stats()), file=sys.stderr)
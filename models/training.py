@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+Entrenamiento de los modelos de demanda, déficit y disponibilidad.
+
+Reemplaza las búsquedas GridSearchCV de los notebooks de `models/` con un
+único punto de entrada para los tres objetivos:
+
+- La preparación de datos (variables derivadas, limpieza y división
+  entrenamiento/prueba) es común y se hace una sola vez.
+- Los candidatos (RandomForest, SVR con escalado y GradientBoosting, con las
+  mismas grillas de los notebooks) compiten por successive halving: primero
+  se evalúan todos con una parte de los datos de entrenamiento y solo el
+  mejor tercio pasa a la ronda siguiente, hasta usar todos los datos.
+- Cada evaluación con validación cruzada corre en un pool de procesos y se
+  guarda en `trials.sqlite` en cuanto termina, así que una búsqueda
+  interrumpida continúa donde quedó.
+- Las evaluaciones y los modelos ajustados se guardan por hash de los datos,
+  modelo e hiperparámetros, no por objetivo: un reentrenamiento nocturno sin
+  datos nuevos no repite ajustes.
+
+Uso:
+
+    python models/training.py --targets demanda deficit --workers 4
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import NamedTuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import (
+    mean_absolute_error,
+    mean_absolute_percentage_error,
+    mean_squared_error,
+    median_absolute_error,
+    r2_score,
+)
+from sklearn.model_selection import KFold, cross_val_score, train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVR
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.columnar import load_features
+from processing.feature_store import add_derived_features
+
+logger = logging.getLogger("training")
+
+DEFAULT_OUTPUT_DIR = os.path.join("data", "models")
+RANDOM_STATE = 42
+
+
+class Target(NamedTuple):
+    name: str
+    column: str
+    features: list
+
+
+TARGETS = {
+    "demanda": Target(
+        "demanda",
+        "demanda_maxima",
+        [
+            "plantas_mantenimiento",
+            "demanda_07am",
+            "año",
+            "deficit_real",
+            "mes",
+            "mw_limitacion_termica",
+        ],
+    ),
+    "deficit": Target(
+        "deficit",
+        "deficit_real",
+        ["demanda_maxima", "demanda_07am", "plantas_mantenimiento", "año"],
+    ),
+    "disponibilidad": Target(
+        "disponibilidad",
+        "disponibilidad_total",
+        [
+            "disponibilidad_07am",
+            "mw_motores_problemas",
+            "mw_limitacion_termica",
+            "mes",
+            "plantas_averiadas",
+        ],
+    ),
+}
+
+
+def _random_forest():
+    return RandomForestRegressor(random_state=RANDOM_STATE)
+
+
+def _svr():
+    # El escalado va dentro del modelo para que la predicción no lo olvide
+    return make_pipeline(StandardScaler(), SVR())
+
+
+def _gradient_boosting():
+    return GradientBoostingRegressor(random_state=RANDOM_STATE)
+
+
+# Modelo -> (constructor, grilla de hiperparámetros)
+CANDIDATES = {
+    "random_forest": (
+        _random_forest,
+        {
+            "n_estimators": [50, 100, 200],
+            "max_depth": [None, 10, 20],
+            "min_samples_split": [2, 5, 10],
+        },
+    ),
+    "svr": (
+        _svr,
+        {
+            "svr__C": [0.1, 1, 10, 100],
+            "svr__epsilon": [0.1, 1, 10],
+            "svr__kernel": ["rbf", "linear"],
+        },
+    ),
+    "gradient_boosting": (
+        _gradient_boosting,
+        {
+            "n_estimators": [100, 200],
+            "learning_rate": [0.05, 0.1, 0.2],
+            "max_depth": [3, 5, 7],
+        },
+    ),
+}
+
+
+def prepare_data(df):
+    """
+    Agrega las variables derivadas que usan los modelos
+
+    Args:
+        df (DataFrame): Tabla de variables (cleaned_energy_data)
+
+    Returns:
+        DataFrame: Copia con deficit_real, margen_seguridad, eficiencia_07am,
+            utilizacion_07am y tipo_dia
+    """
+    df = df.copy()
+    for column in ("mes", "dia_semana"):
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("float64")
+    add_derived_features(df)
+    df["tipo_dia"] = df["dia_semana"].map(
+        {
+            0: "Lunes",
+            1: "Martes",
+            2: "Miércoles",
+            3: "Jueves",
+            4: "Viernes",
+            5: "Sábado",
+            6: "Domingo",
+        }
+    )
+    return df
+
+
+def target_data(df, target):
+    """
+    Matriz de variables y objetivo sin filas incompletas
+
+    Args:
+        df (DataFrame): Datos preparados con prepare_data
+        target (Target): Objetivo a entrenar
+
+    Returns:
+        tuple: (X, y) como float64
+    """
+    data = df[target.features + [target.column]].astype("float64").dropna()
+    return data[target.features], data[target.column]
+
+
+def data_hash(X, y):
+    """
+    Hash del contenido de los datos de entrenamiento
+
+    Returns:
+        str: sha256 en hexadecimal
+    """
+    digest = hashlib.sha256()
+    digest.update(",".join(map(str, X.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def candidate_pool(models=None, max_candidates=None, seed=RANDOM_STATE):
+    """
+    Combinaciones de modelo e hiperparámetros a evaluar
+
+    Args:
+        models (list): Modelos de CANDIDATES a incluir (None para todos)
+        max_candidates (int): Tomar al azar solo esta cantidad (None para todas)
+        seed (int): Semilla del muestreo
+
+    Returns:
+        list: Pares (modelo, hiperparámetros)
+    """
+    pool = []
+    for model in models or CANDIDATES:
+        grid = CANDIDATES[model][1]
+        for values in itertools.product(*grid.values()):
+            pool.append((model, dict(zip(grid, values))))
+    if max_candidates is not None and max_candidates < len(pool):
+        pool = random.Random(seed).sample(pool, max_candidates)
+    return pool
+
+
+def build_model(model, params):
+    return CANDIDATES[model][0]().set_params(**params)
+
+
+def evaluate_candidate(model, params, X, y, cv):
+    """
+    Error cuadrático medio con validación cruzada de un candidato. Se ejecuta
+    en los procesos del pool.
+
+    Returns:
+        tuple: (mse, segundos)
+    """
+    start = time.perf_counter()
+    scores = cross_val_score(
+        build_model(model, params),
+        X,
+        y,
+        cv=KFold(n_splits=cv),
+        scoring="neg_mean_squared_error",
+        n_jobs=1,
+    )
+    return float(-scores.mean()), time.perf_counter() - start
+
+
+def halving_schedule(n_samples, n_candidates, factor=3, min_resources=100):
+    """
+    Cantidad de filas de entrenamiento de cada ronda de successive halving
+
+    Args:
+        n_samples (int): Filas de entrenamiento disponibles
+        n_candidates (int): Candidatos de la primera ronda
+        factor (int): Proporción de candidatos descartados en cada ronda
+        min_resources (int): Filas mínimas de la primera ronda
+
+    Returns:
+        list: Filas por ronda, de menor a mayor; la última usa todas
+    """
+    rounds = 1 + int(math.log(max(n_candidates, 1), factor))
+    schedule = []
+    for i in range(rounds):
+        resources = n_samples // factor ** (rounds - 1 - i)
+        if resources >= min(min_resources, n_samples):
+            schedule.append(resources)
+    return schedule or [n_samples]
+
+
+class TrialStore:
+    """
+    Evaluaciones y modelos ajustados, guardados por hash de los datos, modelo
+    e hiperparámetros. Hace de checkpoint de las búsquedas y de caché entre
+    objetivos y entre ejecuciones.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Directorio del checkpoint (`trials.sqlite` y `fits/`)
+        """
+        self.root = root
+        os.makedirs(os.path.join(root, "fits"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(root, "trials.sqlite"), check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trials (
+                data_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                params TEXT NOT NULL,
+                n_samples INTEGER NOT NULL,
+                cv INTEGER NOT NULL,
+                mse REAL NOT NULL,
+                seconds REAL NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (data_hash, model, params, n_samples, cv)
+            )
+            """
+        )
+        self._db.commit()
+
+    def get(self, data_hash, model, params, n_samples, cv):
+        """
+        Returns:
+            float: MSE guardado o None si la evaluación no se hizo
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mse FROM trials WHERE data_hash = ? AND model = ? "
+                "AND params = ? AND n_samples = ? AND cv = ?",
+                (data_hash, model, _params_key(params), n_samples, cv),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, data_hash, model, params, n_samples, cv, mse, seconds):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    data_hash,
+                    model,
+                    _params_key(params),
+                    n_samples,
+                    cv,
+                    mse,
+                    seconds,
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def _fit_path(self, data_hash, model, params):
+        key = hashlib.sha256(
+            f"{data_hash}|{model}|{_params_key(params)}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.root, "fits", f"{key}.joblib")
+
+    def fit(self, model, params, X, y, data_hash):
+        """
+        Ajusta un modelo o lo recupera si ya se ajustó con los mismos datos
+
+        Returns:
+            estimator: Modelo ajustado
+        """
+        path = self._fit_path(data_hash, model, params)
+        if os.path.exists(path):
+            return joblib.load(path)
+        estimator = build_model(model, params).fit(X, y)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(estimator, tmp_path)
+        os.replace(tmp_path, path)
+        return estimator
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def successive_halving(
+    X, y, pool, store, executor, cv=5, factor=3, min_resources=100, label=""
+):
+    """
+    Elige el mejor candidato por successive halving
+
+    Args:
+        X (DataFrame): Variables de entrenamiento
+        y (Series): Objetivo de entrenamiento
+        pool (list): Pares (modelo, hiperparámetros)
+        store (TrialStore): Checkpoint y caché de evaluaciones
+        executor (Executor): Pool donde se evalúan los candidatos
+        cv (int): Particiones de la validación cruzada
+        factor (int): Se conserva 1/factor de los candidatos en cada ronda
+        min_resources (int): Filas mínimas de la primera ronda
+        label (str): Nombre del objetivo para los logs
+
+    Returns:
+        tuple: (modelo, hiperparámetros, mse) del mejor candidato
+    """
+    order = np.random.RandomState(RANDOM_STATE).permutation(len(X))
+    schedule = halving_schedule(len(X), len(pool), factor, min_resources)
+    survivors = list(pool)
+    for round_num, n_samples in enumerate(schedule):
+        rows = np.sort(order[:n_samples])
+        X_round, y_round = X.iloc[rows], y.iloc[rows]
+        round_hash = data_hash(X_round, y_round)
+
+        scores = {}
+        futures = {}
+        for i, (model, params) in enumerate(survivors):
+            cached = store.get(round_hash, model, params, n_samples, cv)
+            if cached is not None:
+                scores[i] = cached
+            else:
+                future = executor.submit(
+                    evaluate_candidate, model, params, X_round, y_round, cv
+                )
+                futures[future] = i
+        reused = len(scores)
+        for future in as_completed(futures):
+            i = futures[future]
+            model, params = survivors[i]
+            mse, seconds = future.result()
+            store.put(round_hash, model, params, n_samples, cv, mse, seconds)
+            scores[i] = mse
+
+        ranked = sorted(scores, key=scores.get)
+        logger.info(
+            f"{label} ronda {round_num + 1}/{len(schedule)}: {len(survivors)} "
+            f"candidatos con {n_samples} filas ({reused} del checkpoint), "
+            f"mejor MSE {scores[ranked[0]]:.1f}"
+        )
+        if round_num == len(schedule) - 1:
+            model, params = survivors[ranked[0]]
+            return model, params, scores[ranked[0]]
+        keep = max(1, math.ceil(len(survivors) / factor))
+        survivors = [survivors[i] for i in ranked[:keep]]
+
+
+def regression_metrics(y_true, y_pred):
+    """
+    Returns:
+        dict: MSE, RMSE, MAE, R², MAPE y MedAE, como en los notebooks
+    """
+    mse = mean_squared_error(y_true, y_pred)
+    return {
+        "mse": float(mse),
+        "rmse": float(np.sqrt(mse)),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "r2": float(r2_score(y_true, y_pred)),
+        "mape": float(mean_absolute_percentage_error(y_true, y_pred)),
+        "medae": float(median_absolute_error(y_true, y_pred)),
+    }
+
+
+def save_model(bundle, output_dir):
+    """
+    Guarda el modelo de un objetivo (`<objetivo>.joblib`) y sus métricas
+    (`<objetivo>.json`)
+
+    Args:
+        bundle (dict): Modelo y metadatos devueltos por train_target
+        output_dir (str): Directorio de salida
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{bundle['target']}.joblib")
+    joblib.dump(bundle, f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    report = {k: v for k, v in bundle.items() if k != "model"}
+    with open(os.path.join(output_dir, f"{bundle['target']}.json"), "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Modelo guardado en {path}")
+
+
+def train_target(
+    df,
+    target,
+    store,
+    executor,
+    models=None,
+    max_candidates=None,
+    cv=5,
+    factor=3,
+    min_resources=100,
+):
+    """
+    Busca y ajusta el mejor modelo para un objetivo
+
+    Args:
+        df (DataFrame): Datos preparados con prepare_data
+        target (Target): Objetivo a entrenar
+        store (TrialStore): Checkpoint y caché de evaluaciones y ajustes
+        executor (Executor): Pool donde se evalúan los candidatos
+        models (list): Modelos de CANDIDATES a considerar (None para todos)
+        max_candidates (int): Candidatos tomados al azar de las grillas
+            (None para todos)
+        cv (int): Particiones de la validación cruzada
+        factor (int): Se conserva 1/factor de los candidatos en cada ronda
+        min_resources (int): Filas mínimas de la primera ronda
+
+    Returns:
+        dict: Modelo ajustado con sus hiperparámetros y métricas de prueba
+    """
+    X, y = target_data(df, target)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=RANDOM_STATE
+    )
+    pool = candidate_pool(models, max_candidates)
+    model, params, cv_mse = successive_halving(
+        X_train,
+        y_train,
+        pool,
+        store,
+        executor,
+        cv=cv,
+        factor=factor,
+        min_resources=min_resources,
+        label=target.name,
+    )
+    estimator = store.fit(model, params, X_train, y_train, data_hash(X_train, y_train))
+    metrics = regression_metrics(y_test, estimator.predict(X_test))
+    logger.info(
+        f"{target.name}: {model} {params} - RMSE {metrics['rmse']:.1f}, "
+        f"R² {metrics['r2']:.3f}"
+    )
+    return {
+        "target": target.name,
+        "column": target.column,
+        "features": list(target.features),
+        "model_name": model,
+        "params": params,
+        "model": estimator,
+        "cv_mse": cv_mse,
+        "metrics": metrics,
+        "n_train": len(X_train),
+        "n_test": len(X_test),
+        "n_rows": len(X),
+        "last_fecha": str(df.loc[X.index, "fecha"].max()),
+        "data_hash": data_hash(X, y),
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def train_all(
+    data_dir="data",
+    targets=None,
+    output_dir=DEFAULT_OUTPUT_DIR,
+    workers=None,
+    models=None,
+    max_candidates=None,
+    cv=5,
+    factor=3,
+    min_resources=100,
+):
+    """
+    Entrena los objetivos pedidos y guarda sus modelos
+
+    Args:
+        data_dir (str): Directorio de datos del pipeline
+        targets (list): Nombres de TARGETS a entrenar (None para todos)
+        output_dir (str): Directorio de los modelos y del checkpoint
+        workers (int): Procesos del pool (None para uno por CPU)
+        models (list): Modelos de CANDIDATES a considerar (None para todos)
+        max_candidates (int): Candidatos tomados al azar de las grillas
+        cv (int): Particiones de la validación cruzada
+        factor (int): Se conserva 1/factor de los candidatos en cada ronda
+        min_resources (int): Filas mínimas de la primera ronda
+
+    Returns:
+        dict: Resultado de train_target por objetivo
+    """
+    df = prepare_data(load_features(data_dir))
+    store = TrialStore(os.path.join(output_dir, "checkpoint"))
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for name in targets or TARGETS:
+                start = time.perf_counter()
+                bundle = train_target(
+                    df,
+                    TARGETS[name],
+                    store,
+                    executor,
+                    models=models,
+                    max_candidates=max_candidates,
+                    cv=cv,
+                    factor=factor,
+                    min_resources=min_resources,
+                )
+                save_model(bundle, output_dir)
+                results[name] = bundle
+                logger.info(f"{name} entrenado en {time.perf_counter() - start:.1f}s")
+    finally:
+        store.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the forecasting models.")
+    parser.add_argument("--data_dir", type=str, default="data", help="Data directory")
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        choices=list(TARGETS),
+        default=None,
+        help="Targets to train (all by default)",
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=list(CANDIDATES),
+        default=None,
+        help="Model families to search (all by default)",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory for trained models and the search checkpoint",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (one per CPU)"
+    )
+    parser.add_argument(
+        "--max_candidates",
+        type=int,
+        default=None,
+        help="Randomly sample this many candidates from the grids",
+    )
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument(
+        "--factor", type=int, default=3, help="Successive halving reduction factor"
+    )
+    parser.add_argument(
+        "--min_resources",
+        type=int,
+        default=100,
+        help="Training rows in the first halving round",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    train_all(
+        data_dir=args.data_dir,
+        targets=args.targets,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        models=args.models,
+        max_candidates=args.max_candidates,
+        cv=args.cv,
+        factor=args.factor,
+        min_resources=args.min_resources,
+    )
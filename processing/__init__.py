@@ -0,0 +1,22 @@
+"""
+Módulo de almacenamiento y procesamiento de los reportes extraídos.
+"""
+
+from processing.columnar import load_articles, load_features
+from processing.feature_store import FeatureStore
+from processing.feature_table import FeatureTable
+from processing.query import ReportIndex
+from processing.records import RecordError, Report, load_reports
+from processing.report_store import ReportStore
+
+__all__ = [
+    'FeatureStore',
+    'FeatureTable',
+    'RecordError',
+    'Report',
+    'ReportIndex',
+    'ReportStore',
+    'load_articles',
+    'load_features',
+    'load_reports',
+]
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Almacenamiento columnar con tipos de los CSV de artículos y de variables.
+
+Cada CSV tiene al lado una copia en formato Arrow IPC (`.feather`, sin
+compresión) con tipos reducidos: fechas como datetime, valores en MW como
+float32, conteos y calendario como enteros pequeños y `dia_semana`/`mes`
+como categorías. Los cargadores abren esa copia con memory-map, así que
+leer el historial no vuelve a parsear texto UTF-8 y solo se trae a memoria
+lo que se usa. La copia se regenera sola cuando el CSV es más reciente.
+
+    from processing.columnar import load_articles, load_features
+
+    df = load_features("data")
+    enlaces = load_articles("data", columns=["Enlace", "Fecha"])
+"""
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger("columnar")
+
+ARTICLES_CSV = os.path.join("raw", "afectaciones_electricas_cubadebate_filter_2025.csv")
+FEATURES_CSV = os.path.join("processed", "cleaned_energy_data.csv")
+
+DIAS_SEMANA = list(range(7))
+MESES_NUM = list(range(1, 13))
+
+FEATURE_TYPES = {
+    "año": "Int16",
+    "mes": pd.CategoricalDtype(MESES_NUM, ordered=True),
+    "dia": "Int8",
+    "dia_semana": pd.CategoricalDtype(DIAS_SEMANA, ordered=True),
+    "es_fin_semana": "Int8",
+    "demanda_maxima": "float32",
+    "disponibilidad_total": "float32",
+    "afectacion_predicha": "float32",
+    "deficit_predicho": "float32",
+    "respaldo": "float32",
+    "disponibilidad_07am": "float32",
+    "demanda_07am": "float32",
+    "plantas_averiadas": "int8",
+    "plantas_mantenimiento": "int8",
+    "mw_limitacion_termica": "float32",
+    "mw_motores_problemas": "float32",
+    "horas_afectacion": "float32",
+    "max_afectacion_mw": "float32",
+}
+
+ARTICLE_TYPES = {
+    "Título": "string",
+    "Contenido": "string",
+    "Etiquetas": "string",
+    "Número de Comentarios": "Int32",
+    "Enlace": "string",
+}
+
+
+def _typed(df, types, date_column):
+    df = df.copy()
+    if date_column in df.columns:
+        text = df[date_column].astype("string").str.slice(0, 19)
+        df[date_column] = pd.to_datetime(
+            text.str.replace("T", " ", regex=False),
+            format="%Y-%m-%d %H:%M:%S",
+            errors="coerce",
+        )
+    for column, dtype in types.items():
+        if column not in df.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+        elif dtype == "string":
+            df[column] = df[column].astype(dtype)
+        else:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+    return df
+
+
+def typed_features(df):
+    """
+    Convierte la tabla de variables a sus tipos reducidos
+
+    Args:
+        df (DataFrame): Tabla con las columnas de cleaned_energy_data
+
+    Returns:
+        DataFrame: Copia con fecha datetime, MW en float32, enteros pequeños
+            y `dia_semana`/`mes` categóricos
+    """
+    return _typed(df, FEATURE_TYPES, "fecha")
+
+
+def typed_articles(df):
+    """
+    Convierte el CSV de artículos a sus tipos
+
+    Args:
+        df (DataFrame): Artículos con las columnas del scraper
+
+    Returns:
+        DataFrame: Copia con `Fecha` datetime, textos como string y el número
+            de comentarios como entero
+    """
+    return _typed(df, ARTICLE_TYPES, "Fecha")
+
+
+def write_arrow(df, path):
+    """
+    Escribe un DataFrame en Arrow IPC sin compresión, de forma atómica, para
+    poder abrirlo luego con memory-map
+
+    Args:
+        df (DataFrame): Datos a guardar
+        path (str): Archivo destino
+    """
+    tmp_path = f"{path}.tmp"
+    df.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_arrow(path, columns=None, memory_map=True):
+    """
+    Lee un archivo Arrow IPC
+
+    Args:
+        path (str): Archivo a leer
+        columns (list): Columnas a cargar (None para todas)
+        memory_map (bool): Abrir el archivo con memory-map en lugar de leerlo
+
+    Returns:
+        DataFrame: Datos del archivo
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+    with source:
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+
+def arrow_path(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}.feather"
+
+
+def load_dataset(csv_path, typed, columns=None, memory_map=True):
+    """
+    Carga un CSV desde su copia columnar, regenerándola si falta o si el CSV
+    cambió después de escribirla
+
+    Args:
+        csv_path (str): CSV original
+        typed (callable): Conversión de tipos (typed_articles o typed_features)
+        columns (list): Columnas a cargar (None para todas)
+        memory_map (bool): Abrir la copia con memory-map
+
+    Returns:
+        DataFrame: Datos con sus tipos
+    """
+    path = arrow_path(csv_path)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logger.warning("pyarrow no está instalado, se lee el CSV directamente")
+        df = typed(pd.read_csv(csv_path, encoding="utf-8-sig"))
+        return df if columns is None else df[columns]
+
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(csv_path):
+        df = typed(pd.read_csv(csv_path, encoding="utf-8-sig"))
+        write_arrow(df, path)
+        logger.info(f"Copia columnar generada en {path}")
+    return read_arrow(path, columns=columns, memory_map=memory_map)
+
+
+def load_articles(data_dir="data", columns=None, memory_map=True):
+    """
+    Carga el CSV de artículos filtrados con tipos y memory-map
+
+    Args:
+        data_dir (str): Directorio de datos del pipeline
+        columns (list): Columnas a cargar (None para todas)
+        memory_map (bool): Abrir la copia con memory-map
+
+    Returns:
+        DataFrame: Artículos
+    """
+    return load_dataset(
+        os.path.join(data_dir, ARTICLES_CSV), typed_articles, columns, memory_map
+    )
+
+
+def load_features(data_dir="data", columns=None, memory_map=True):
+    """
+    Carga la tabla de variables (cleaned_energy_data) con tipos y memory-map
+
+    Args:
+        data_dir (str): Directorio de datos del pipeline
+        columns (list): Columnas a cargar (None para todas)
+        memory_map (bool): Abrir la copia con memory-map
+
+    Returns:
+        DataFrame: Tabla de variables
+    """
+    return load_dataset(
+        os.path.join(data_dir, FEATURES_CSV), typed_features, columns, memory_map
+    )
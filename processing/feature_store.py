@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Variables derivadas, de calendario, rezagos y ventanas móviles por fecha.
+
+A partir de la tabla de variables (un reporte por fila) se arma una serie
+diaria, con el último reporte de cada día, y se calculan por columnas:
+
+- las variables derivadas de los notebooks (`deficit_real`,
+  `margen_seguridad`, `eficiencia_07am`, `utilizacion_07am`),
+- variables de calendario,
+- rezagos de 1 a 7 observaciones de `demanda_maxima` y otros objetivos,
+- medias y sumas móviles de observaciones anteriores (sin incluir el día).
+
+El resultado se guarda indexado por fecha. Cuando llegan días nuevos o cambia
+un día ya guardado solo se recalcula la cola: las filas desde el primer día
+nuevo o modificado, usando como contexto las últimas MAX_LOOKBACK filas ya
+guardadas. Entrenamiento y servicio leen las mismas variables sin
+recalcular el historial.
+
+    python processing/feature_store.py --data_dir data
+"""
+import argparse
+import logging
+import os
+import sys
+
+import pandas as pd
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.columnar import load_features, read_arrow, write_arrow
+
+logger = logging.getLogger("feature_store")
+
+BASE_COLUMNS = [
+    "demanda_maxima",
+    "disponibilidad_total",
+    "afectacion_predicha",
+    "deficit_predicho",
+    "disponibilidad_07am",
+    "demanda_07am",
+    "plantas_averiadas",
+    "plantas_mantenimiento",
+    "mw_limitacion_termica",
+    "mw_motores_problemas",
+]
+
+# Columna -> rezagos, en observaciones (como `shift` en notebooks/01_Demanda)
+LAGS = {
+    "demanda_maxima": range(1, 8),
+    "disponibilidad_total": (1, 7),
+    "deficit_real": (1, 7),
+}
+
+# (columna, ventana en observaciones, agregación) sobre los días anteriores
+ROLLING = [
+    ("demanda_maxima", 7, "mean"),
+    ("demanda_maxima", 30, "mean"),
+    ("demanda_maxima", 7, "std"),
+    ("disponibilidad_total", 7, "mean"),
+    ("deficit_real", 7, "mean"),
+    ("deficit_real", 30, "mean"),
+    ("plantas_averiadas", 7, "sum"),
+    ("plantas_averiadas", 30, "mean"),
+]
+
+MAX_LOOKBACK = max(
+    max(max(lags) for lags in LAGS.values()),
+    max(window for _, window, _ in ROLLING) + 1,
+)
+
+
+def add_derived_features(df):
+    """
+    Agrega las variables derivadas que usan los notebooks y los modelos
+
+    Args:
+        df (DataFrame): Datos con demanda_maxima, disponibilidad_total,
+            disponibilidad_07am y demanda_07am
+
+    Returns:
+        DataFrame: El mismo DataFrame con deficit_real, margen_seguridad,
+            eficiencia_07am y utilizacion_07am
+    """
+    df["deficit_real"] = df["demanda_maxima"] - df["disponibilidad_total"]
+    df["margen_seguridad"] = df["disponibilidad_total"] - df["demanda_maxima"]
+    df["eficiencia_07am"] = df["disponibilidad_07am"] / df["disponibilidad_total"] * 100
+    df["utilizacion_07am"] = df["demanda_07am"] / df["disponibilidad_07am"] * 100
+    return df
+
+
+def daily_series(table):
+    """
+    Serie diaria con el último reporte de cada día
+
+    Args:
+        table (DataFrame): Tabla de variables (un reporte por fila)
+
+    Returns:
+        DataFrame: Columnas BASE_COLUMNS indexadas por fecha (sin hora)
+    """
+    table = table.dropna(subset=["fecha"]).sort_values("fecha", kind="stable")
+    daily = table[BASE_COLUMNS].astype("float64")
+    daily.index = pd.DatetimeIndex(table["fecha"]).normalize().rename("fecha")
+    return daily[~daily.index.duplicated(keep="last")]
+
+
+def compute_features(daily):
+    """
+    Calcula todas las variables de una serie diaria
+
+    Args:
+        daily (DataFrame): Serie de daily_series, ordenada por fecha
+
+    Returns:
+        DataFrame: Columnas base, derivadas, de calendario, rezagos y ventanas
+    """
+    df = add_derived_features(daily.copy())
+    index = df.index
+    df["año"] = index.year
+    df["mes"] = index.month
+    df["dia"] = index.day
+    df["dia_semana"] = index.dayofweek
+    df["es_fin_semana"] = (index.dayofweek >= 5).astype("int64")
+    df["dia_del_año"] = index.dayofyear
+
+    extra = {}
+    for column, lags in LAGS.items():
+        for lag in lags:
+            extra[f"{column}_lag{lag}"] = df[column].shift(lag)
+    for column, window, agg in ROLLING:
+        # Solo días anteriores, para no usar el valor que se quiere predecir
+        past = df[column].shift(1).rolling(window, min_periods=1)
+        extra[f"{column}_{agg}{window}"] = getattr(past, agg)()
+    return pd.concat([df, pd.DataFrame(extra, index=index)], axis=1)
+
+
+def _pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FeatureStore:
+    """
+    Variables por fecha guardadas en disco y actualizadas por la cola.
+    """
+
+    def __init__(self, root, name="feature_store"):
+        """
+        Args:
+            root (str): Directorio del almacén
+            name (str): Nombre base del archivo
+        """
+        self.root = root
+        fmt = "feather" if _pyarrow_available() else "csv"
+        self.path = os.path.join(root, f"{name}.{fmt}")
+        self._cache = (None, None)
+
+    def load(self, columns=None):
+        """
+        Args:
+            columns (list): Columnas a cargar (None para todas)
+
+        Returns:
+            DataFrame: Variables indexadas por fecha (vacío si no hay almacén)
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="fecha"))
+        if self.path.endswith(".feather"):
+            read = None if columns is None else ["fecha", *columns]
+            df = read_arrow(self.path, columns=read).set_index("fecha")
+        else:
+            df = pd.read_csv(self.path, parse_dates=["fecha"], index_col="fecha")
+            if columns is not None:
+                df = df[columns]
+        return df
+
+    def get(self, fecha):
+        """
+        Variables de un día, o del último día guardado anterior a él. El
+        almacén se mantiene en memoria hasta que cambia el archivo
+
+        Args:
+            fecha (str | Timestamp): Fecha a consultar
+
+        Returns:
+            Series: Variables del día o None si no hay datos anteriores
+        """
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if self._cache[0] != mtime:
+            self._cache = (mtime, self.load())
+        df = self._cache[1]
+        position = df.index.searchsorted(pd.Timestamp(fecha).normalize(), side="right")
+        if position == 0:
+            return None
+        return df.iloc[position - 1]
+
+    def _write(self, df):
+        os.makedirs(self.root, exist_ok=True)
+        if self.path.endswith(".feather"):
+            write_arrow(df.reset_index(), self.path)
+        else:
+            tmp_path = f"{self.path}.tmp"
+            df.to_csv(tmp_path)
+            os.replace(tmp_path, self.path)
+
+    def _first_changed(self, daily, stored):
+        """
+        Primer día de la serie que es nuevo, cambió (p. ej. un segundo reporte
+        del mismo día) o ya no está en ella
+
+        Returns:
+            Timestamp: Primer día a recalcular, o None si no hay cambios
+        """
+        common = daily.index.intersection(stored.index)
+        current = daily.loc[common, BASE_COLUMNS]
+        previous = stored.loc[common, BASE_COLUMNS]
+        same = (current == previous) | (current.isna() & previous.isna())
+        changed = common[~same.all(axis=1).to_numpy()]
+        days = (
+            daily.index.difference(stored.index)
+            .union(stored.index.difference(daily.index))
+            .union(changed)
+        )
+        return days.min() if len(days) else None
+
+    def update(self, table):
+        """
+        Recalcula las variables desde el primer día nuevo o modificado de la
+        tabla: los rezagos y ventanas de los días siguientes también cambian
+
+        Args:
+            table (DataFrame): Tabla de variables completa
+
+        Returns:
+            int: Días recalculados
+        """
+        daily = daily_series(table)
+        stored = self.load()
+        if stored.empty or not set(BASE_COLUMNS) <= set(stored.columns):
+            result = compute_features(daily)
+            fresh = result
+        else:
+            start = self._first_changed(daily, stored)
+            if start is None:
+                return 0
+            history = stored.loc[stored.index < start, BASE_COLUMNS]
+            context = pd.concat(
+                [history.tail(MAX_LOOKBACK), daily.loc[daily.index >= start]]
+            )
+            fresh = compute_features(context).loc[start:]
+            result = pd.concat([stored.loc[stored.index < start], fresh])
+        self._write(result)
+        logger.info(
+            f"Almacén de variables: {len(fresh)} días recalculados, "
+            f"{len(result)} en total"
+        )
+        return len(fresh)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the feature store.")
+    parser.add_argument("--data_dir", type=str, default="data", help="Data directory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    store = FeatureStore(os.path.join(args.data_dir, "processed"))
+    store.update(load_features(args.data_dir))
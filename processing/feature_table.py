@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Tabla de variables para el entrenamiento a partir de los reportes procesados.
+
+Aplana los registros del JSON anidado año -> mes (`prediccion`,
+`info_matutina`, listas de plantas, `impacto`, ...) a una fila por reporte
+con las columnas de `cleaned_energy_data.csv`. La conversión se hace por
+columnas sobre todos los registros a la vez con `pd.json_normalize`, y la
+tabla se actualiza de forma incremental: solo se aplanan y agregan los
+registros cuya clave (enlace o id) no está todavía en la tabla.
+
+La tabla se guarda en CSV y, si pyarrow está instalado, también en Parquet
+y en Feather con tipos reducidos (ver processing.columnar). Cada fila lleva
+la columna `clave` con el enlace o id del reporte.
+
+Uso como comando para regenerar la tabla desde un JSON anidado:
+
+    python processing/feature_table.py --json data/raw/datos_electricos_organizados.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+import pandas as pd
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.columnar import typed_features, write_arrow
+from processing.report_store import record_key
+
+logger = logging.getLogger("feature_table")
+
+KEY_COLUMN = "clave"
+KEY_COLUMNS = (KEY_COLUMN, "fecha")
+
+CALENDAR_COLUMNS = ["año", "mes", "dia", "dia_semana", "es_fin_semana"]
+
+# Columna -> (ruta dentro del registro, conversión)
+#   "numero": primer número del valor ("85 MW" -> 85)
+#   "estricto": solo valores numéricos ("1 hora y 39 minutos" -> vacío)
+#   "conteo": longitud de una lista
+FIELDS = {
+    "demanda_maxima": ("datos.prediccion.demanda_maxima", "numero"),
+    "disponibilidad_total": ("datos.prediccion.disponibilidad", "numero"),
+    "afectacion_predicha": ("datos.prediccion.afectacion", "numero"),
+    "deficit_predicho": ("datos.prediccion.deficit", "numero"),
+    "respaldo": ("datos.prediccion.respaldo", "numero"),
+    "disponibilidad_07am": ("datos.info_matutina.disponibilidad", "numero"),
+    "demanda_07am": ("datos.info_matutina.demanda", "numero"),
+    "plantas_averiadas": ("datos.plantas.averia", "conteo"),
+    "plantas_mantenimiento": ("datos.plantas.mantenimiento", "conteo"),
+    "mw_limitacion_termica": (
+        "datos.plantas.limitacion_termica.mw_afectados",
+        "numero",
+    ),
+    "mw_motores_problemas": (
+        "datos.distribuida.motores_con_problemas.impacto_mw",
+        "numero",
+    ),
+    "horas_afectacion": ("datos.impacto.horas_totales", "estricto"),
+    "max_afectacion_mw": ("datos.impacto.maximo.mw", "numero"),
+}
+
+COLUMNS = ["fecha", *CALENDAR_COLUMNS, *FIELDS, KEY_COLUMN]
+
+NUMBER_PATTERN = r"(-?\d+(?:[.,]\d+)?)"
+
+
+def _to_number(values):
+    """
+    Primer número de cada valor, sea numérico o texto
+    """
+    text = values.astype("string").str.extract(NUMBER_PATTERN, expand=False)
+    return pd.to_numeric(text.str.replace(",", ".", regex=False), errors="coerce")
+
+
+def _to_count(values):
+    return values.map(lambda v: len(v) if isinstance(v, list) else 0).astype("int64")
+
+
+def _to_datetime(values):
+    # "2024-06-30 09:26:00" o "2025-05-16T09:00:00-04:00": se usa la hora local
+    text = values.astype("string").str.slice(0, 19).str.replace("T", " ", regex=False)
+    return pd.to_datetime(text, format="%Y-%m-%d %H:%M:%S", errors="coerce")
+
+
+def flatten_records(records):
+    """
+    Convierte registros procesados en filas de la tabla de variables
+
+    Args:
+        records (list): Registros con `fecha`, `datos` y `enlace` o `id`
+
+    Returns:
+        DataFrame: Una fila por registro con las columnas de COLUMNS
+    """
+    if not records:
+        return empty_table()
+
+    flat = pd.json_normalize(records)
+    flat = flat.reindex(columns=["fecha", *(path for path, _ in FIELDS.values())])
+
+    table = pd.DataFrame({"fecha": _to_datetime(flat["fecha"])})
+    fecha = table["fecha"].dt
+    table["año"] = fecha.year.astype("Int64")
+    table["mes"] = fecha.month.astype("Int64")
+    table["dia"] = fecha.day.astype("Int64")
+    table["dia_semana"] = fecha.dayofweek.astype("Int64")
+    table["es_fin_semana"] = (table["dia_semana"] >= 5).astype("Int64")
+
+    for column, (path, kind) in FIELDS.items():
+        values = flat[path]
+        if kind == "conteo":
+            table[column] = _to_count(values)
+        elif kind == "estricto":
+            table[column] = pd.to_numeric(values, errors="coerce").astype("float64")
+        else:
+            table[column] = _to_number(values).astype("float64")
+
+    table[KEY_COLUMN] = [record_key(record) for record in records]
+    return table
+
+
+def empty_table():
+    """
+    Returns:
+        DataFrame: Tabla sin filas con las columnas y tipos de la tabla de variables
+    """
+    return flatten_records([{"fecha": None, "datos": {}, "id": 0}]).iloc[0:0]
+
+
+def _columnar_formats():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ()
+    return ("parquet", "feather")
+
+
+class FeatureTable:
+    """
+    Tabla de variables en disco, actualizada de forma incremental.
+    """
+
+    def __init__(self, root, name="cleaned_energy_data"):
+        """
+        Args:
+            root (str): Directorio donde se guardan los archivos de la tabla
+            name (str): Nombre base de los archivos (`<name>.csv`, `<name>.parquet`)
+        """
+        self.root = root
+        self.name = name
+        self.formats = (*_columnar_formats(), "csv")
+        if "parquet" not in self.formats:
+            logger.warning("pyarrow no está instalado, la tabla se guardará en CSV")
+
+    def path(self, fmt):
+        return os.path.join(self.root, f"{self.name}.{fmt}")
+
+    def _keyed(self, fmt):
+        """
+        Returns:
+            bool: True si el archivo del formato existe y tiene las columnas
+                clave de la tabla (`clave` y `fecha`)
+        """
+        path = self.path(fmt)
+        if fmt not in self.formats or not os.path.exists(path):
+            return False
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            columns = pq.read_schema(path).names
+        else:
+            columns = pd.read_csv(path, nrows=0).columns
+        return all(column in columns for column in KEY_COLUMNS)
+
+    def exists(self):
+        """
+        Returns:
+            bool: True si hay una tabla con claves en disco. Un CSV sin la
+                columna `clave` (generado por los notebooks) no cuenta.
+        """
+        return self._keyed("parquet") or self._keyed("csv")
+
+    def load(self):
+        """
+        Lee la tabla desde el formato más rápido disponible que tenga las
+        columnas clave. La copia Feather no se usa: es de processing.columnar,
+        que la regenera desde el CSV aunque este no tenga la columna `clave`.
+
+        Returns:
+            DataFrame: Tabla de variables (vacía si no existe)
+        """
+        if self._keyed("parquet"):
+            return pd.read_parquet(self.path("parquet"))
+        if os.path.exists(self.path("parquet")):
+            logger.warning("El Parquet de la tabla no tiene claves, se lee el CSV")
+        if not self._keyed("csv"):
+            return empty_table()
+        table = pd.read_csv(self.path("csv"), parse_dates=["fecha"])
+        return table.astype(empty_table().dtypes.to_dict())
+
+    def update(self, records):
+        """
+        Agrega a la tabla los registros cuya clave no está en ella
+
+        Args:
+            records (list): Registros procesados
+
+        Returns:
+            int: Número de filas agregadas
+
+        Raises:
+            ValueError: Si reemplazaría un CSV sin claves (el histórico de los
+                notebooks) por una tabla sin todos sus reportes
+        """
+        table = self.load()
+        known = set(table[KEY_COLUMN])
+        new_records = []
+        for record in records:
+            key = record_key(record)
+            if key is not None and key not in known:
+                known.add(key)
+                new_records.append(record)
+        if not new_records:
+            return 0
+
+        rows = flatten_records(new_records)
+        appended = self._keyed("csv")
+        table = pd.concat([table, rows], ignore_index=True) if len(table) else rows
+        if not appended and os.path.exists(self.path("csv")):
+            self._check_covers(self.path("csv"), table)
+        os.makedirs(self.root, exist_ok=True)
+        if appended:
+            rows.to_csv(self.path("csv"), mode="a", header=False, index=False)
+        else:
+            self._replace(self.path("csv"), lambda p: table.to_csv(p, index=False))
+        # Después del CSV, para que la copia columnar no quede más vieja que él
+        self._write_columnar(table)
+        logger.info(
+            f"Tabla de variables: {len(rows)} filas nuevas, {len(table)} en total"
+        )
+        return len(rows)
+
+    @staticmethod
+    def _check_covers(csv_path, table):
+        """
+        El CSV sin claves es el histórico de los notebooks: solo se reemplaza
+        por una tabla que tenga todos sus reportes, nunca por un subconjunto.
+        Sus filas no tienen enlace, así que se comparan por fecha
+
+        Raises:
+            ValueError: Si a la tabla nueva le faltan reportes del CSV
+        """
+        if "fecha" not in pd.read_csv(csv_path, nrows=0).columns:
+            return
+        historical = pd.to_datetime(
+            pd.read_csv(csv_path, usecols=["fecha"])["fecha"], errors="coerce"
+        )
+        missing = set(historical.dropna()) - set(table["fecha"].dropna())
+        if missing:
+            raise ValueError(
+                f"A la tabla nueva le faltan {len(missing)} de los reportes de "
+                f"{csv_path}; se conserva el CSV existente"
+            )
+
+    def rebuild(self, records):
+        """
+        Regenera la tabla completa a partir de todos los registros
+
+        Returns:
+            int: Número de filas de la tabla
+        """
+        for fmt in self.formats:
+            if os.path.exists(self.path(fmt)):
+                os.remove(self.path(fmt))
+        return self.update(records)
+
+    def _write_columnar(self, table):
+        # Parquet y Feather no admiten agregar filas: se reescriben completos,
+        # lo que para unas miles de filas cuesta milisegundos
+        if "parquet" in self.formats:
+            self._replace(
+                self.path("parquet"), lambda p: table.to_parquet(p, index=False)
+            )
+        if "feather" in self.formats:
+            # Con tipos reducidos y sin comprimir: es la copia que abre
+            # columnar.load_features con memory-map
+            write_arrow(typed_features(table), self.path("feather"))
+
+    @staticmethod
+    def _replace(path, write):
+        tmp_path = f"{path}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+
+def records_from_nested(data):
+    """
+    Args:
+        data (dict): JSON anidado {año: {mes: [registros]}}
+
+    Returns:
+        list: Registros en orden de año y mes
+    """
+    return [
+        record
+        for months in data.values()
+        for records in months.values()
+        for record in records
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the training feature table.")
+    parser.add_argument(
+        "--json",
+        type=str,
+        default=os.path.join("data", "processed", "datos_electricos_organizados.json"),
+        help="Nested JSON with the processed reports",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=os.path.join("data", "processed"),
+        help="Directory for the feature table files",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Rebuild the table from scratch"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    with open(args.json, "r", encoding="utf-8") as f:
+        records = records_from_nested(json.load(f))
+    table = FeatureTable(args.output_dir)
+    if args.rebuild:
+        table.rebuild(records)
+    else:
+        table.update(records)
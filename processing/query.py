@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Consultas por rango de fechas y por métrica sobre los reportes procesados.
+
+`ReportIndex` toma de la tabla de variables (processing.columnar, con
+memory-map) solo la fecha y las métricas pedidas, y mantiene:
+
+- las fechas de los reportes ordenadas: un rango se ubica con búsqueda
+  binaria, O(log n), y sus filas se devuelven como vistas de los arreglos;
+- un arreglo float64 por métrica alineado con las fechas;
+- por métrica, una tabla dispersa de posiciones del máximo (y otra del
+  mínimo), construida la primera vez que se pide. Con ella los k mayores de
+  un rango, o todos los valores por encima de un umbral, salen en
+  O(log n + k log k) sin recorrer el rango.
+
+Las agregaciones por día, semana (lunes a domingo) o mes recorren una sola
+vez las filas del rango, que ya están en orden.
+
+    from processing.query import ReportIndex
+
+    index = ReportIndex.load("data", metrics=["deficit", "disponibilidad"])
+    index.above("deficit", 1500, "2025-01-01", "2025-03-31")
+    index.last("disponibilidad", days=30)
+    index.aggregate("deficit", "M", "max")
+    index.top_k("deficit", 10, start="2024-01-01")
+
+    python processing/query.py --metric deficit --start 2025-01-01 --end 2025-03-31 --above 1500
+"""
+import argparse
+import heapq
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.columnar import load_features
+from processing.feature_table import FIELDS
+
+logger = logging.getLogger("query")
+
+METRICS = list(FIELDS)
+
+# Nombres cortos de las métricas de la predicción
+ALIASES = {
+    "disponibilidad": "disponibilidad_total",
+    "afectacion": "afectacion_predicha",
+    "deficit": "deficit_predicho",
+}
+
+FREQUENCIES = ("D", "W", "M")
+AGGREGATIONS = ("mean", "sum", "min", "max", "count", "last")
+
+
+def resolve(metric):
+    """
+    Args:
+        metric (str): Columna de la tabla de variables o su nombre corto
+
+    Returns:
+        str: Columna de la tabla de variables
+    """
+    column = ALIASES.get(metric, metric)
+    if column not in METRICS:
+        raise ValueError(f"Métrica desconocida: {metric}")
+    return column
+
+
+class _RangeMax:
+    """
+    Tabla dispersa con la posición del máximo de cada tramo de 2^j filas:
+    el máximo de cualquier rango se obtiene en O(1).
+    """
+
+    def __init__(self, values):
+        # Los vacíos nunca son máximos
+        self.values = np.where(np.isnan(values), -np.inf, values)
+        n = len(values)
+        self.levels = [np.arange(n)]
+        width = 1
+        while 2 * width <= n:
+            previous = self.levels[-1]
+            left = previous[: n - 2 * width + 1]
+            right = previous[width : n - width + 1]
+            self.levels.append(
+                np.where(self.values[left] >= self.values[right], left, right)
+            )
+            width *= 2
+
+    def argmax(self, lo, hi):
+        level = (hi - lo).bit_length() - 1
+        table = self.levels[level]
+        a, b = int(table[lo]), int(table[hi - (1 << level)])
+        return a if self.values[a] >= self.values[b] else b
+
+    def top(self, lo, hi, k=None, floor=-np.inf):
+        """
+        Posiciones de [lo, hi) con valor mayor que `floor`, de mayor a menor
+
+        Args:
+            lo (int): Primera posición del rango
+            hi (int): Posición siguiente a la última
+            k (int): Máximo de posiciones (None para todas)
+            floor (float): Solo valores estrictamente mayores
+
+        Returns:
+            list: Posiciones; a igual valor, la más antigua primero
+        """
+        heap = []
+
+        def push(a, b):
+            if a < b:
+                position = self.argmax(a, b)
+                value = self.values[position]
+                if value > floor:
+                    heapq.heappush(heap, (-value, position, a, b))
+
+        push(lo, hi)
+        found = []
+        while heap and (k is None or len(found) < k):
+            _, position, a, b = heapq.heappop(heap)
+            found.append(position)
+            push(a, position)
+            push(position + 1, b)
+        return found
+
+
+class ReportIndex:
+    """
+    Fechas ordenadas y arreglos por métrica de los reportes procesados.
+    """
+
+    def __init__(self, dates, values):
+        """
+        Args:
+            dates (ndarray): Fechas de los reportes (datetime64), en orden
+            values (dict): {métrica: ndarray float64 alineado con las fechas}
+        """
+        self.dates = dates
+        self._values = values
+        self._tables = {}
+
+    @classmethod
+    def from_frame(cls, df, metrics=None):
+        """
+        Args:
+            df (DataFrame): Tabla de variables con la columna `fecha`
+            metrics (list): Métricas a indexar (None para todas las de la tabla)
+
+        Returns:
+            ReportIndex: Índice de los reportes con fecha
+        """
+        columns = [
+            resolve(m) for m in (metrics or [c for c in METRICS if c in df.columns])
+        ]
+        dates = df["fecha"].to_numpy(dtype="datetime64[s]")
+        order = np.argsort(dates, kind="stable")
+        order = order[~np.isnat(dates[order])]
+        values = {
+            column: df[column].to_numpy(dtype="float64", na_value=np.nan)[order]
+            for column in columns
+        }
+        return cls(dates[order], values)
+
+    @classmethod
+    def load(cls, data_dir="data", metrics=None):
+        """
+        Carga solo la fecha y las métricas pedidas de la tabla de variables
+
+        Args:
+            data_dir (str): Directorio de datos del pipeline
+            metrics (list): Métricas a indexar (None para todas)
+
+        Returns:
+            ReportIndex: Índice de los reportes
+        """
+        columns = [resolve(m) for m in (metrics or METRICS)]
+        df = load_features(data_dir, columns=["fecha", *dict.fromkeys(columns)])
+        return cls.from_frame(df, columns)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def metrics(self):
+        return list(self._values)
+
+    def values(self, metric):
+        """
+        Returns:
+            ndarray: Valores de la métrica en orden de fecha (NaN si falta)
+        """
+        column = resolve(metric)
+        if column not in self._values:
+            raise ValueError(f"La métrica {column} no está en el índice")
+        return self._values[column]
+
+    def _table(self, metric, largest):
+        column = resolve(metric)
+        key = (column, largest)
+        if key not in self._tables:
+            values = self.values(column)
+            self._tables[key] = _RangeMax(values if largest else -values)
+        return self._tables[key]
+
+    def bounds(self, start=None, end=None):
+        """
+        Posiciones del rango de fechas, con búsqueda binaria
+
+        Args:
+            start (str | Timestamp): Fecha inicial, incluida (None desde el
+                primer reporte)
+            end (str | Timestamp): Fecha final, incluida; sin hora incluye
+                todo el día (None hasta el último reporte)
+
+        Returns:
+            tuple: (primera posición, posición siguiente a la última)
+        """
+        lo, hi = 0, len(self.dates)
+        if start is not None:
+            start = np.datetime64(pd.Timestamp(start).to_datetime64(), "s")
+            lo = int(np.searchsorted(self.dates, start, side="left"))
+        if end is not None:
+            end = pd.Timestamp(end)
+            if end == end.normalize():
+                end += pd.Timedelta(days=1)
+                side = "left"
+            else:
+                side = "right"
+            end = np.datetime64(end.to_datetime64(), "s")
+            hi = int(np.searchsorted(self.dates, end, side=side))
+        return lo, max(lo, hi)
+
+    def _series(self, metric, positions):
+        column = resolve(metric)
+        return pd.Series(
+            self.values(column)[positions],
+            index=pd.DatetimeIndex(self.dates[positions], name="fecha"),
+            name=column,
+        )
+
+    def between(self, start=None, end=None, metrics=None):
+        """
+        Reportes de un rango de fechas
+
+        Args:
+            start (str | Timestamp): Fecha inicial, incluida
+            end (str | Timestamp): Fecha final, incluida
+            metrics (list): Métricas a devolver (None para todas las del índice)
+
+        Returns:
+            DataFrame: Una fila por reporte, indexada por fecha
+        """
+        lo, hi = self.bounds(start, end)
+        columns = [resolve(m) for m in metrics] if metrics else self.metrics
+        return pd.DataFrame(
+            {column: self.values(column)[lo:hi] for column in columns},
+            index=pd.DatetimeIndex(self.dates[lo:hi], name="fecha"),
+        )
+
+    def last(self, metric, days=30):
+        """
+        Valores de los últimos días con reportes
+
+        Args:
+            metric (str): Métrica
+            days (int): Días, contando el del último reporte
+
+        Returns:
+            Series: Valores indexados por fecha
+        """
+        if not len(self.dates):
+            return self._series(metric, slice(0, 0))
+        last_day = pd.Timestamp(self.dates[-1]).normalize()
+        lo, hi = self.bounds(last_day - pd.Timedelta(days=days - 1), None)
+        return self._series(metric, slice(lo, hi))
+
+    def top_k(self, metric, k, start=None, end=None, largest=True):
+        """
+        Los k reportes con mayor (o menor) valor de un rango
+
+        Args:
+            metric (str): Métrica
+            k (int): Cantidad de reportes
+            start (str | Timestamp): Fecha inicial, incluida
+            end (str | Timestamp): Fecha final, incluida
+            largest (bool): Mayores (True) o menores (False)
+
+        Returns:
+            Series: Valores de mayor a menor (o de menor a mayor)
+        """
+        lo, hi = self.bounds(start, end)
+        positions = self._table(metric, largest).top(lo, hi, k=k)
+        return self._series(metric, np.array(positions, dtype="int64"))
+
+    def above(self, metric, threshold, start=None, end=None):
+        """
+        Reportes de un rango con valor mayor que un umbral
+
+        Args:
+            metric (str): Métrica
+            threshold (float): Umbral, excluido
+            start (str | Timestamp): Fecha inicial, incluida
+            end (str | Timestamp): Fecha final, incluida
+
+        Returns:
+            Series: Valores en orden de fecha
+        """
+        lo, hi = self.bounds(start, end)
+        positions = self._table(metric, True).top(lo, hi, floor=threshold)
+        return self._series(metric, np.sort(np.array(positions, dtype="int64")))
+
+    def below(self, metric, threshold, start=None, end=None):
+        """
+        Reportes de un rango con valor menor que un umbral
+
+        Args:
+            metric (str): Métrica
+            threshold (float): Umbral, excluido
+            start (str | Timestamp): Fecha inicial, incluida
+            end (str | Timestamp): Fecha final, incluida
+
+        Returns:
+            Series: Valores en orden de fecha
+        """
+        lo, hi = self.bounds(start, end)
+        positions = self._table(metric, False).top(lo, hi, floor=-threshold)
+        return self._series(metric, np.sort(np.array(positions, dtype="int64")))
+
+    def aggregate(self, metric, freq="D", how="mean", start=None, end=None):
+        """
+        Agrega una métrica por día, semana o mes
+
+        Args:
+            metric (str): Métrica
+            freq (str): "D" (día), "W" (semana de lunes a domingo) o "M" (mes)
+            how (str): "mean", "sum", "min", "max", "count" (reportes con
+                valor) o "last" (último reporte del periodo)
+            start (str | Timestamp): Fecha inicial, incluida
+            end (str | Timestamp): Fecha final, incluida
+
+        Returns:
+            Series: Un valor por periodo con reportes, indexado por su
+                primer día
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Frecuencia desconocida: {freq}")
+        if how not in AGGREGATIONS:
+            raise ValueError(f"Agregación desconocida: {how}")
+        lo, hi = self.bounds(start, end)
+        column = resolve(metric)
+        values = self.values(column)[lo:hi]
+        days = self.dates[lo:hi].astype("datetime64[D]")
+        if freq == "W":
+            # El 1970-01-01 fue jueves: se retrocede hasta el lunes
+            keys = days - (days.astype("int64") + 3) % 7
+        elif freq == "M":
+            keys = days.astype("datetime64[M]").astype("datetime64[D]")
+        else:
+            keys = days
+
+        if not len(keys):
+            empty = pd.DatetimeIndex([], name="fecha")
+            return pd.Series([], index=empty, name=column, dtype="float64")
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        valid = ~np.isnan(values)
+        count = np.add.reduceat(valid.astype("int64"), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if how == "count":
+                result = count.astype("float64")
+            elif how == "last":
+                result = values[np.r_[starts[1:], len(values)] - 1]
+            elif how == "min":
+                result = np.fmin.reduceat(values, starts)
+            elif how == "max":
+                result = np.fmax.reduceat(values, starts)
+            else:
+                total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+                result = total if how == "sum" else total / count
+                result = np.where(count > 0, result, np.nan)
+        return pd.Series(
+            result, index=pd.DatetimeIndex(keys[starts], name="fecha"), name=column
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the processed reports.")
+    parser.add_argument("--data_dir", type=str, default="data", help="Data directory")
+    parser.add_argument(
+        "--metric", type=str, required=True, help="Metric (column or short name)"
+    )
+    parser.add_argument("--start", type=str, default=None, help="First date (included)")
+    parser.add_argument("--end", type=str, default=None, help="Last date (included)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--above", type=float, help="Reports above this value")
+    group.add_argument("--below", type=float, help="Reports below this value")
+    group.add_argument("--top", type=int, help="The k largest values")
+    group.add_argument("--last", type=int, help="The last N days with reports")
+    group.add_argument(
+        "--freq", choices=FREQUENCIES, help="Aggregate by day, week or month"
+    )
+    parser.add_argument(
+        "--agg", choices=AGGREGATIONS, default="mean", help="Aggregation with --freq"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    index = ReportIndex.load(args.data_dir, metrics=[args.metric])
+    if args.above is not None:
+        result = index.above(args.metric, args.above, args.start, args.end)
+    elif args.below is not None:
+        result = index.below(args.metric, args.below, args.start, args.end)
+    elif args.top is not None:
+        result = index.top_k(args.metric, args.top, args.start, args.end)
+    elif args.last is not None:
+        result = index.last(args.metric, days=args.last)
+    elif args.freq is not None:
+        result = index.aggregate(args.metric, args.freq, args.agg, args.start, args.end)
+    else:
+        result = index.between(args.start, args.end, metrics=[args.metric])
+    print(result.to_string())
@@ -0,0 +1,641 @@
+"""
+Modelo tipado de los reportes extraídos.
+
+Los registros que devuelve el extractor son diccionarios anidados sin tipos:
+números como texto ("85 MW"), horas en varios formatos ("7:00 a.m.",
+"07:00 horas"), listas de plantas con `unidad` y `unidades` a la vez. Aquí
+cada registro se valida y normaliza una sola vez al entrar, en un `Report`
+(dataclass con `__slots__`):
+
+- potencias en MW como números (primer número del texto, "1 020" -> 1020),
+  rechazando negativos o valores imposibles;
+- horas como "HH:MM" (texto que no es una hora queda vacío);
+- duraciones como horas decimales ("18 horas y 52 minutos" -> 18.87);
+- la fecha de publicación como datetime;
+- plantas como tuplas de `Plant` inmutables.
+
+Un registro que no se puede interpretar (no es un objeto, sin enlace ni id,
+fecha inválida, un campo con otro tipo de estructura, un número fuera de
+rango) lanza `RecordError` y no llega al almacén. Los campos de la plantilla
+que no se modelan (zonas, patanas, paneles solares, ...) se conservan en
+`extra`, sin los valores vacíos, y `to_record` devuelve el registro completo
+con la forma de la plantilla.
+
+`dumps`/`loads` usan orjson si está instalado y json si no.
+"""
+import json
+import logging
+import math
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("records")
+
+# Cota muy por encima de la capacidad instalada del SEN: solo descarta
+# errores de extracción (años, números pegados)
+MAX_MW = 10000
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Atributo -> ruta dentro de `datos`
+MW_FIELDS = {
+    "disponibilidad": ("prediccion", "disponibilidad"),
+    "demanda_maxima": ("prediccion", "demanda_maxima"),
+    "afectacion": ("prediccion", "afectacion"),
+    "deficit": ("prediccion", "deficit"),
+    "respaldo": ("prediccion", "respaldo"),
+    "disponibilidad_07am": ("info_matutina", "disponibilidad"),
+    "demanda_07am": ("info_matutina", "demanda"),
+    "deficit_07am": ("info_matutina", "deficit"),
+    "afectacion_mediodia": (
+        "info_matutina",
+        "proyeccion_mediodia",
+        "afectacion_estimada",
+    ),
+    "mw_limitacion_termica": ("plantas", "limitacion_termica", "mw_afectados"),
+    "mw_motores": ("distribuida", "motores_con_problemas", "impacto_mw"),
+    "max_afectacion_mw": ("impacto", "maximo", "mw"),
+}
+HOUR_FIELDS = {
+    "hora_07am": ("info_matutina", "hora"),
+    "max_afectacion_hora": ("impacto", "maximo", "hora"),
+}
+TEXT_FIELDS = {
+    "horario_pico": ("prediccion", "horario_pico"),
+}
+COUNT_FIELDS = {
+    "motores_total": ("distribuida", "motores_con_problemas", "total"),
+}
+DURATION_FIELDS = {
+    "horas_afectacion": ("impacto", "horas_totales"),
+}
+PLANT_FIELDS = {
+    "averias": ("plantas", "averia"),
+    "mantenimientos": ("plantas", "mantenimiento"),
+}
+
+# "1 020", "1 020" (espacio duro), "1.020" y "1,020" son miles, como en
+# scraping.rule_extraction; "941,4" es un decimal
+_NUMBER = re.compile(
+    r"(?P<miles>-?[1-9]\d{0,2}(?:[ \u00a0.,]\d{3})+)(?![\d.,])|-?\d+(?:[.,]\d+)?"
+)
+_SEPARATORS = re.compile(r"[ \u00a0.,]")
+_HOUR = re.compile(
+    r"^\s*(\d{1,2})(?::(\d{2}))?\s*(?:(a|p)\.?\s*m\.?|horas?|h)?\s*$", re.IGNORECASE
+)
+_DURATION = re.compile(
+    r"^\s*(\d+)\s*horas?(?:\s*y\s*(\d+)\s*minutos?)?\s*$"
+    r"|^\s*(\d{1,2}):(\d{2})\s*(?:horas?|h)?\s*$",
+    re.IGNORECASE,
+)
+_UNITS = re.compile(r"\d+")
+
+
+class RecordError(ValueError):
+    """
+    Registro del extractor que no cumple el esquema.
+    """
+
+
+def empty_report():
+    """
+    Returns:
+        dict: Estructura de la plantilla con todos los campos vacíos
+    """
+    return {
+        "zonas_con_problemas": [],
+        "fecha_reporte": None,
+        "prediccion": {
+            "disponibilidad": None,
+            "demanda_maxima": None,
+            "afectacion": None,
+            "deficit": None,
+            "respaldo": None,
+            "horario_pico": None,
+        },
+        "info_matutina": {
+            "hora": None,
+            "disponibilidad": None,
+            "demanda": None,
+            "deficit": None,
+            "proyeccion_mediodia": {"afectacion_estimada": None, "hora_estimada": None},
+        },
+        "plantas": {
+            "averia": [],
+            "mantenimiento": [],
+            "limitacion_termica": {"mw_afectados": None, "tipo": None},
+        },
+        "distribuida": {
+            "motores_con_problemas": {"total": None, "impacto_mw": None, "causa": None},
+            "problemas_lubricantes": {"mw_afectados": None, "unidades_afectadas": ""},
+            "patanas_con_problemas": [],
+        },
+        "paneles_solares": {
+            "cantidad_parques": None,
+            "produccion_mwh": None,
+            "nuevos_parques": None,
+            "capacidad_instalada": None,
+            "periodo_produccion": "",
+        },
+        "impacto": {
+            "horas_totales": None,
+            "continuidad_afectacion": None,
+            "maximo": {"mw": None, "hora": None, "fecha": None, "nota": None},
+            "tendencia": None,
+        },
+    }
+
+
+def _number(value, name):
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise RecordError(f"{name}: valor booleano {value}")
+    if isinstance(value, (int, float)):
+        number = value
+    elif isinstance(value, str):
+        match = _NUMBER.search(value)
+        if match is None:
+            return None
+        if match["miles"]:
+            number = float(_SEPARATORS.sub("", match["miles"]))
+        else:
+            number = float(match.group().replace(",", "."))
+    else:
+        raise RecordError(f"{name}: se esperaba un número y llegó {type(value).__name__}")
+    if not math.isfinite(number) or number < 0:
+        raise RecordError(f"{name}: valor inválido {value!r}")
+    if isinstance(number, float) and number.is_integer():
+        return int(number)
+    return number
+
+
+def parse_mw(value, name="mw"):
+    """
+    Potencia en MW de un valor numérico o de texto
+
+    Args:
+        value: Valor del extractor (2650, "85 MW", "1 020 MW", None)
+        name (str): Campo, para el mensaje de error
+
+    Returns:
+        int | float: MW, o None si el valor está vacío o no tiene número
+
+    Raises:
+        RecordError: Si el valor es negativo, mayor que MAX_MW o no es un
+            número ni texto
+    """
+    number = _number(value, name)
+    if number is not None and number > MAX_MW:
+        raise RecordError(f"{name}: {value!r} supera {MAX_MW} MW")
+    return number
+
+
+def parse_hour(value, name="hora"):
+    """
+    Hora del día en formato "HH:MM"
+
+    Args:
+        value: "07:00", "7:00 a.m.", "07:00 horas", "6:20 p.m.", "18 h"
+        name (str): Campo, para el mensaje de error
+
+    Returns:
+        str: "HH:MM", o None si el valor está vacío o no es una hora
+            ("horario pico", "18:01-19:07")
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise RecordError(f"{name}: se esperaba texto y llegó {type(value).__name__}")
+    match = _HOUR.match(value)
+    if match is None:
+        return None
+    hour, minute, meridiem = match.groups()
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == "p" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def parse_hours(value, name="horas"):
+    """
+    Duración en horas decimales
+
+    Args:
+        value: 14.5, "18 horas y 52 minutos", "01:08 horas"
+        name (str): Campo, para el mensaje de error
+
+    Returns:
+        float: Horas, o None si el valor está vacío o no es una duración
+    """
+    if isinstance(value, str):
+        match = _DURATION.match(value)
+        if match is None:
+            return None
+        hours, minutes, clock_hours, clock_minutes = match.groups()
+        if hours is None:
+            hours, minutes = clock_hours, clock_minutes
+        return round(int(hours) + int(minutes or 0) / 60, 3)
+    return _number(value, name)
+
+
+def parse_article_date(fecha):
+    """
+    Convierte la fecha de un artículo ("2024-06-30 09:26:00" o ISO con "T")
+
+    Returns:
+        datetime: Fecha del artículo o None si no se puede interpretar
+    """
+    try:
+        return datetime.fromisoformat(str(fecha)[:19].replace("T", " "))
+    except ValueError:
+        return None
+
+
+def parse_fecha(value):
+    """
+    Fecha de publicación del reporte
+
+    Args:
+        value (str): "2023-03-31 08:17:00" o ISO 8601
+
+    Returns:
+        datetime: Fecha sin zona horaria
+
+    Raises:
+        RecordError: Si falta o no se puede interpretar
+    """
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if not isinstance(value, str) or not value:
+        raise RecordError(f"fecha inválida: {value!r}")
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        raise RecordError(f"fecha inválida: {value!r}") from None
+
+
+def _text(value, name="texto"):
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise RecordError(f"{name}: se esperaba texto y llegó {type(value).__name__}")
+    return sys.intern(value.strip()) or None
+
+
+@dataclass(slots=True, frozen=True)
+class Plant:
+    """
+    Planta (o unidades de una planta) fuera de servicio.
+    """
+
+    planta: str | None
+    unidades: tuple = ()
+    tipo: str | None = None
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        Args:
+            item (dict | str): {planta, unidad, unidades, tipo} o solo el nombre
+
+        Returns:
+            Plant: Entrada normalizada; `unidad` se une a `unidades`
+
+        Raises:
+            RecordError: Si la entrada no es un objeto ni texto
+        """
+        if isinstance(item, str):
+            return cls(_text(item, "planta"))
+        if not isinstance(item, dict):
+            raise RecordError(f"planta: entrada inválida {item!r}")
+        units = []
+        for value in (item.get("unidad"), item.get("unidades")):
+            if isinstance(value, bool):
+                raise RecordError(f"planta: unidad inválida {value!r}")
+            if isinstance(value, int):
+                units.append(value)
+            elif isinstance(value, str):
+                units.extend(int(n) for n in _UNITS.findall(value))
+            elif isinstance(value, list):
+                for unit in value:
+                    if isinstance(unit, int) and not isinstance(unit, bool):
+                        units.append(unit)
+                    elif isinstance(unit, str):
+                        units.extend(int(n) for n in _UNITS.findall(unit))
+            elif value is not None:
+                raise RecordError(f"planta: unidad inválida {value!r}")
+        return cls(
+            _text(item.get("planta"), "planta"),
+            tuple(dict.fromkeys(units)),
+            _text(item.get("tipo"), "tipo"),
+        )
+
+    def to_item(self):
+        """
+        Returns:
+            dict: Entrada con la forma de la plantilla
+        """
+        return {
+            "planta": self.planta,
+            "unidad": self.unidades[0] if len(self.unidades) == 1 else None,
+            "unidades": list(self.unidades),
+            "tipo": self.tipo or "",
+        }
+
+
+def _plants(value, name):
+    if value is None:
+        return ()
+    if not isinstance(value, list):
+        raise RecordError(f"{name}: se esperaba una lista y llegó {value!r}")
+    return tuple(Plant.from_item(item) for item in value)
+
+
+# Atributo -> (ruta, conversión), y las rutas como árbol para separar los
+# campos modelados de `extra` en una sola pasada
+_PARSERS = {
+    **{name: (path, parse_mw) for name, path in MW_FIELDS.items()},
+    **{name: (path, parse_hour) for name, path in HOUR_FIELDS.items()},
+    **{name: (path, _number) for name, path in COUNT_FIELDS.items()},
+    **{name: (path, parse_hours) for name, path in DURATION_FIELDS.items()},
+    **{name: (path, _text) for name, path in TEXT_FIELDS.items()},
+    **{name: (path, _plants) for name, path in PLANT_FIELDS.items()},
+}
+_MODELED = {}
+for _name, (_path, _) in _PARSERS.items():
+    _node = _MODELED
+    for _part in _path[:-1]:
+        _node = _node.setdefault(_part, {})
+    _node[_path[-1]] = _name
+
+
+def _prune(value):
+    """
+    Quita de un árbol los valores vacíos; None si no queda nada
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = _prune(item)
+            if item is not None:
+                pruned[key] = item
+        return pruned or None
+    if value == "" or value == []:
+        return None
+    return value
+
+
+def _split(node, modeled, values):
+    """
+    Separa los campos modelados de `node` (a `values`) del resto del árbol,
+    sin los valores vacíos
+    """
+    extra = {}
+    for key, value in node.items():
+        target = modeled.get(key)
+        if isinstance(target, str):
+            values[target] = value
+            continue
+        if target is not None and value is not None:
+            if not isinstance(value, dict):
+                raise RecordError(f"{key}: se esperaba un objeto y llegó {value!r}")
+            value = _split(value, target, values)
+        else:
+            value = _prune(value)
+        if value is not None:
+            extra[key] = value
+    return extra or None
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _overlay(base, extra):
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _overlay(base[key], value)
+        else:
+            base[key] = _copy(value)
+
+
+def _set(datos, path, value):
+    node = datos
+    for part in path[:-1]:
+        node = node.setdefault(part, {})
+    node[path[-1]] = value
+
+
+@dataclass(slots=True)
+class Report:
+    """
+    Reporte validado de la UNE: campos tipados y el resto de `datos` en
+    `extra`.
+    """
+
+    fecha: datetime
+    enlace: str | None = None
+    id: int | str | None = None
+    disponibilidad: int | float | None = None
+    demanda_maxima: int | float | None = None
+    afectacion: int | float | None = None
+    deficit: int | float | None = None
+    respaldo: int | float | None = None
+    horario_pico: str | None = None
+    hora_07am: str | None = None
+    disponibilidad_07am: int | float | None = None
+    demanda_07am: int | float | None = None
+    deficit_07am: int | float | None = None
+    afectacion_mediodia: int | float | None = None
+    averias: tuple = ()
+    mantenimientos: tuple = ()
+    mw_limitacion_termica: int | float | None = None
+    motores_total: int | float | None = None
+    mw_motores: int | float | None = None
+    horas_afectacion: float | None = None
+    max_afectacion_mw: int | float | None = None
+    max_afectacion_hora: str | None = None
+    extra: dict | None = None
+
+    @property
+    def key(self):
+        """
+        Clave única: el enlace o, si no tiene, "id:<id>" (como record_key)
+        """
+        return self.enlace if self.enlace else f"id:{self.id}"
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Valida y normaliza un registro del extractor
+
+        Args:
+            record (dict): {enlace | id, fecha, datos}
+
+        Returns:
+            Report: Registro tipado
+
+        Raises:
+            RecordError: Si el registro no cumple el esquema
+        """
+        if not isinstance(record, dict):
+            raise RecordError(f"se esperaba un objeto y llegó {type(record).__name__}")
+        enlace = record.get("enlace") or None
+        if enlace is not None and not isinstance(enlace, str):
+            raise RecordError(f"enlace inválido: {enlace!r}")
+        if enlace is None and record.get("id") is None:
+            raise RecordError("el registro no tiene enlace ni id")
+        datos = record.get("datos")
+        if datos is None:
+            datos = {}
+        if not isinstance(datos, dict):
+            raise RecordError(f"datos: se esperaba un objeto y llegó {datos!r}")
+
+        values = {}
+        extra = _split(datos, _MODELED, values)
+        fields = {
+            name: parse(values.get(name), name)
+            for name, (_, parse) in _PARSERS.items()
+        }
+        return cls(
+            fecha=parse_fecha(record.get("fecha")),
+            enlace=enlace,
+            id=record.get("id"),
+            extra=extra,
+            **fields,
+        )
+
+    def to_record(self):
+        """
+        Returns:
+            dict: Registro {enlace | id, fecha, datos} con la forma de la
+                plantilla
+        """
+        datos = empty_report()
+        if self.extra:
+            _overlay(datos, self.extra)
+        for name, (path, parse) in _PARSERS.items():
+            value = getattr(self, name)
+            if parse is _plants:
+                value = [plant.to_item() for plant in value]
+            _set(datos, path, value)
+
+        record = {}
+        if self.id is not None:
+            record["id"] = self.id
+        if self.enlace is not None:
+            record["enlace"] = self.enlace
+        record["fecha"] = self.fecha.strftime(DATE_FORMAT)
+        record["datos"] = datos
+        return record
+
+
+def validate_records(records, require_link=False):
+    """
+    Valida una lista de registros del extractor
+
+    Args:
+        records (list): Registros sin validar
+        require_link (bool): Rechazar también los registros sin enlace
+
+    Returns:
+        tuple: (lista de Report válidos, cantidad de rechazados)
+    """
+    valid = []
+    rejected = 0
+    for record in records:
+        try:
+            report = Report.from_record(record)
+            if require_link and report.enlace is None:
+                raise RecordError("el registro no tiene enlace")
+        except RecordError as e:
+            rejected += 1
+            link = record.get("enlace") if isinstance(record, dict) else None
+            logger.warning(f"Registro rechazado ({link or 'sin enlace'}): {e}")
+            continue
+        valid.append(report)
+    return valid, rejected
+
+
+def validate_nested(data, require_link=False):
+    """
+    Valida y normaliza todos los registros de un JSON anidado año -> mes
+
+    Args:
+        data (dict): {año: {mes: [registros]}}
+        require_link (bool): Rechazar también los registros sin enlace
+
+    Returns:
+        tuple: ({año: {mes: [registros normalizados]}}, cantidad de rechazados)
+    """
+    nested = {}
+    rejected = 0
+    for year, months in data.items():
+        for month, records in months.items():
+            reports, bad = validate_records(records, require_link=require_link)
+            nested.setdefault(year, {})[month] = [r.to_record() for r in reports]
+            rejected += bad
+    return nested, rejected
+
+
+def dumps(obj, indent=False):
+    """
+    Args:
+        obj: Valor serializable a JSON
+        indent (bool): Indentar con dos espacios en lugar de una sola línea
+
+    Returns:
+        str: JSON sin escapar caracteres no ASCII
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads(text):
+    """
+    Args:
+        text (str | bytes): JSON
+
+    Returns:
+        Valor del JSON
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load_reports(path):
+    """
+    Lee un JSON anidado año -> mes y valida sus registros
+
+    Args:
+        path (str): JSON del extractor o del almacén exportado
+
+    Returns:
+        list: Report válidos, en el orden del archivo
+    """
+    with open(path, "rb") as f:
+        data = loads(f.read())
+    reports = []
+    for months in data.values():
+        for records in months.values():
+            reports.extend(validate_records(records)[0])
+    return reports
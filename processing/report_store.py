@@ -0,0 +1,236 @@
+"""
+Almacén incremental de los reportes procesados.
+
+Los registros se guardan en JSON Lines particionado por año y mes
+(`<root>/<año>/<mes>.jsonl`). Una actualización solo reescribe las
+particiones que cambian, siempre a un archivo temporal que luego reemplaza
+al original, así que el costo no crece con el historial y una caída a mitad
+de escritura no deja archivos corruptos. `export_nested` genera bajo demanda
+el JSON anidado año -> mes que consumen los notebooks. Las particiones y el
+JSON exportado se leen y escriben con orjson si está instalado (ver
+processing.records).
+"""
+import logging
+import os
+
+from processing.records import dumps, loads, validate_nested
+
+logger = logging.getLogger("report_store")
+
+MESES = [
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+]
+
+
+def record_key(record):
+    """
+    Clave única de un registro: su enlace o, si no tiene, su id
+
+    Args:
+        record (dict): Registro procesado
+
+    Returns:
+        str: Clave del registro o None si no tiene enlace ni id
+    """
+    if record.get("enlace"):
+        return record["enlace"]
+    if record.get("id") is not None:
+        return f"id:{record['id']}"
+    return None
+
+
+def atomic_write(path, write):
+    """
+    Escribe un archivo de forma atómica: primero a un temporal y luego lo
+    renombra sobre el destino
+
+    Args:
+        path (str): Archivo destino
+        write (callable): Función que recibe el archivo abierto y escribe en él
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ReportStore:
+    """
+    Registros procesados en JSON Lines particionados por año y mes.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Directorio raíz del almacén
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _partition_path(self, year, month):
+        return os.path.join(self.root, str(year), f"{month}.jsonl")
+
+    def partitions(self):
+        """
+        Returns:
+            list: Pares (año, mes) con datos, en orden cronológico
+        """
+        found = []
+        for year in sorted(os.listdir(self.root)):
+            year_dir = os.path.join(self.root, year)
+            if not os.path.isdir(year_dir):
+                continue
+            for month in MESES:
+                if os.path.exists(os.path.join(year_dir, f"{month}.jsonl")):
+                    found.append((year, month))
+        return found
+
+    def read_partition(self, year, month):
+        """
+        Lee los registros de un mes
+
+        Returns:
+            list: Registros en orden de inserción
+        """
+        path = self._partition_path(year, month)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [loads(line) for line in f if line.strip()]
+
+    def is_empty(self):
+        return not self.partitions()
+
+    def upsert(self, year, month, records):
+        """
+        Inserta o reemplaza registros de un mes según su enlace o id
+
+        Args:
+            year (str): Año de la partición
+            month (str): Mes de la partición (nombre en español)
+            records (list): Registros a guardar
+
+        Returns:
+            tuple: (registros nuevos, registros reemplazados)
+        """
+        if month not in MESES:
+            raise ValueError(f"Mes desconocido: {month}")
+
+        existing = self.read_partition(year, month)
+        positions = {record_key(r): i for i, r in enumerate(existing)}
+        added = replaced = 0
+        for record in records:
+            key = record_key(record)
+            if key is None:
+                raise ValueError("El registro no tiene enlace ni id")
+            if key in positions:
+                if existing[positions[key]] != record:
+                    existing[positions[key]] = record
+                    replaced += 1
+                continue
+            positions[key] = len(existing)
+            existing.append(record)
+            added += 1
+
+        if added or replaced:
+            atomic_write(
+                self._partition_path(year, month),
+                lambda f: f.writelines(
+                    dumps(r) + "\n" for r in existing
+                ),
+            )
+        return added, replaced
+
+    def upsert_nested(self, data):
+        """
+        Inserta o reemplaza todos los registros de un JSON anidado año -> mes
+
+        Args:
+            data (dict): {año: {mes: [registros]}}
+
+        Returns:
+            tuple: (registros nuevos, registros reemplazados)
+        """
+        added = replaced = 0
+        for year, months in data.items():
+            for month, records in months.items():
+                if records:
+                    a, r = self.upsert(year, month, records)
+                    added += a
+                    replaced += r
+        return added, replaced
+
+    def seed(self, paths):
+        """
+        Carga en el almacén vacío los JSON anidados que ya existen (el JSON
+        principal y el histórico de data/raw), para que el primer merge
+        incremental no parta de cero. Con el almacén no vacío no hace nada
+
+        Args:
+            paths (list): JSON anidados año -> mes; se omiten los que no existen
+
+        Returns:
+            int: Registros incorporados
+        """
+        if not self.is_empty():
+            return 0
+        total = 0
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                data, rejected = validate_nested(loads(f.read()))
+            added, _ = self.upsert_nested(data)
+            total += added
+            logger.info(
+                f"Migrados {added} registros de {path} a {self.root}"
+                + (f" ({rejected} rechazados)" if rejected else "")
+            )
+        return total
+
+    def keys(self):
+        """
+        Returns:
+            set: Claves (enlace o id) de todos los registros guardados
+        """
+        return {
+            record_key(record)
+            for year, month in self.partitions()
+            for record in self.read_partition(year, month)
+        }
+
+    def to_nested(self):
+        """
+        Returns:
+            dict: Todos los registros en el formato anidado año -> mes
+        """
+        data = {}
+        for year, month in self.partitions():
+            months = data.setdefault(year, {m: [] for m in MESES})
+            months[month] = self.read_partition(year, month)
+        return data
+
+    def export_nested(self, path):
+        """
+        Escribe de forma atómica el JSON anidado año -> mes
+
+        Args:
+            path (str): Archivo JSON destino
+        """
+        data = self.to_nested()
+        atomic_write(path, lambda f: f.write(dumps(data, indent=True)))
+        logger.info(f"JSON anidado exportado a {path}")
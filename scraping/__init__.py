@@ -2,6 +2,7 @@
 Módulo de scraping para artículos sobre afectaciones eléctricas en Cuba.
 """
 
+from scraping.http_client import HttpClient
 from scraping.scraping import scrape_article_content
 
-__all__ = ['scrape_article_content']
+__all__ = ['HttpClient', 'scrape_article_content']
\ No newline at end of file
@@ -0,0 +1,339 @@
+"""
+Backfill reanudable de rangos grandes de páginas del listado.
+
+Recorrer cientos de páginas con `get_latest_articles` acumula todos los
+artículos en memoria y no guarda nada hasta el final. Aquí, en cambio:
+
+- cada página se procesa completa (descarga de sus artículos, escritura al
+  CSV de artículos y al registro de enlaces) y se marca como terminada en un
+  checkpoint SQLite, junto con los enlaces que aportó;
+- los artículos se pasan al extractor por lotes de `chunk_size` a través de
+  una cola acotada: un hilo extrae y fusiona un lote con el LLM mientras el
+  principal sigue descargando páginas;
+- al reanudar se saltan las páginas terminadas y se vuelven a extraer primero
+  los artículos del checkpoint cuyo reporte aún no está en el almacén.
+
+El listado se desplaza cuando se publican artículos nuevos, así que reanudar
+por número de página es aproximado; el registro de enlaces evita descargar
+dos veces el mismo artículo.
+
+    python scraping/daily_pipeline.py --backfill --a 1 --b 400
+"""
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from scraping.llm_extraction import find_output_json
+
+logger = logging.getLogger("backfill")
+
+
+class BackfillCheckpoint:
+    """
+    Páginas terminadas y enlaces descargados por el backfill.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Archivo SQLite del checkpoint
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                page INTEGER PRIMARY KEY,
+                articles INTEGER,
+                done_at REAL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                page INTEGER,
+                scraped_at REAL
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.commit()
+
+    def completed_pages(self):
+        """
+        Returns:
+            set: Páginas terminadas
+        """
+        with self._lock:
+            return {page for (page,) in self._db.execute("SELECT page FROM pages")}
+
+    def add_articles(self, page, urls):
+        """
+        Registra los enlaces descargados de una página, antes de escribirlos
+
+        Args:
+            page (int): Número de página
+            urls (list): Enlaces de la página
+        """
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO articles (url, page, scraped_at) "
+                "VALUES (?, ?, ?)",
+                [(url, page, now) for url in urls],
+            )
+            self._db.commit()
+
+    def complete_page(self, page, articles):
+        """
+        Marca una página como terminada
+
+        Args:
+            page (int): Número de página
+            articles (int): Artículos nuevos que aportó
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (page, articles, done_at) "
+                "VALUES (?, ?, ?)",
+                (page, articles, time.time()),
+            )
+            self._db.commit()
+
+    def articles(self):
+        """
+        Returns:
+            list: Enlaces descargados por el backfill, en orden de página
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM articles ORDER BY page, scraped_at"
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Backfill:
+    """
+    Recorre un rango de páginas con descarga y extracción solapadas,
+    guardando el avance para poder reanudar.
+    """
+
+    def __init__(self, pipeline, pages, chunk_size=20, checkpoint_path=None):
+        """
+        Args:
+            pipeline (DailyPipeline): Pipeline con el cliente HTTP, el
+                registro de enlaces, el extractor y el almacén de reportes
+            pages (iterable): Números de página a recorrer
+            chunk_size (int): Artículos por lote de extracción
+            checkpoint_path (str): SQLite del checkpoint (por defecto
+                data_dir/processed/backfill.sqlite)
+        """
+        self.pipeline = pipeline
+        self.pages = list(pages)
+        self.chunk_size = max(1, chunk_size)
+        processed_dir = os.path.join(pipeline.data_dir, "processed")
+        self.checkpoint = BackfillCheckpoint(
+            checkpoint_path or os.path.join(processed_dir, "backfill.sqlite")
+        )
+        self.work_dir = os.path.join(processed_dir, "backfill")
+        self.years = (2021, datetime.now().year)
+        self._queue = queue.Queue(maxsize=2)
+        self.stats = {
+            "pages": 0,
+            "empty_pages": 0,
+            "articles": 0,
+            "merged_chunks": 0,
+            "failed_chunks": 0,
+        }
+
+    def pending_articles(self):
+        """
+        Artículos descargados por el backfill cuyo reporte aún no está en el
+        almacén (extracción fallida o interrumpida)
+
+        Returns:
+            DataFrame: Filas del CSV de artículos
+        """
+        url_store = self.pipeline.url_store
+        urls = [
+            url for url in self.checkpoint.articles() if not url_store.is_merged(url)
+        ]
+        raw_csv_path = self.pipeline.raw_csv_path
+        if not urls or not os.path.exists(raw_csv_path):
+            return pd.DataFrame()
+        df = pd.read_csv(raw_csv_path, encoding="utf-8-sig")
+        return df[df["Enlace"].isin(urls)].drop_duplicates("Enlace", keep="last")
+
+    def scrape_page(self, executor, page_num, entries):
+        """
+        Descarga los artículos nuevos de una página y los escribe al CSV de
+        artículos y al registro de enlaces
+
+        Args:
+            executor (ThreadPoolExecutor): Pool de descargas
+            page_num (int): Número de página
+            entries (list): Pares (título, enlace) de la página
+
+        Returns:
+            DataFrame: Artículos descargados
+        """
+        pipeline = self.pipeline
+        scheduled = {}
+        for title, link in entries:
+            if link in scheduled or link in pipeline.url_store:
+                continue
+            if pipeline.title_matcher.match(title) is None:
+                continue
+            scheduled[link] = executor.submit(pipeline._fetch_article, link)
+
+        articles = [future.result() for future in scheduled.values()]
+        df = pd.DataFrame([article for article in articles if article])
+        if not df.empty:
+            # Primero el checkpoint: si el proceso muere antes de terminar la
+            # página, estos enlaces se extraen al reanudar
+            self.checkpoint.add_articles(page_num, list(df["Enlace"]))
+            pipeline.append_raw_articles(df)
+            pipeline.url_store.add(df["Enlace"], df["Fecha"])
+        self.checkpoint.complete_page(page_num, len(df))
+        return df
+
+    def _put(self, df):
+        for start in range(0, len(df), self.chunk_size):
+            self._queue.put(df.iloc[start : start + self.chunk_size])
+
+    def _consume(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            self.extract_chunk(chunk)
+
+    def extract_chunk(self, df):
+        """
+        Extrae un lote con el LLM y lo incorpora al almacén de reportes
+
+        Args:
+            df (DataFrame): Artículos del lote
+
+        Returns:
+            bool: True si el lote se incorporó
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        chunk_dir = tempfile.mkdtemp(prefix="chunk_", dir=self.work_dir)
+        csv_path = os.path.join(chunk_dir, "articulos.csv")
+        try:
+            df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+            extractor = self.pipeline._make_extractor(csv_path, *self.years)
+            with self.pipeline.metrics.timed("extraction_chunk"):
+                result = extractor.run_pipeline(
+                    delay=2, output_dir=chunk_dir, save_individual=False
+                )
+            json_path = find_output_json(chunk_dir)
+            if result == 0 and json_path is not None:
+                if self.pipeline.merge_json(json_path, export_json=False):
+                    self.stats["merged_chunks"] += 1
+                    shutil.rmtree(chunk_dir, ignore_errors=True)
+                    return True
+            logger.error(f"No se pudo extraer el lote de {len(df)} artículos")
+        except Exception as e:
+            logger.error(f"Error al extraer el lote de {len(df)} artículos: {e}")
+        self.stats["failed_chunks"] += 1
+        return False
+
+    def run(self):
+        """
+        Ejecuta o reanuda el backfill
+
+        Returns:
+            bool: True si se recorrieron todas las páginas y se extrajeron
+                todos los lotes
+        """
+        pipeline = self.pipeline
+        done = self.checkpoint.completed_pages()
+        pages = [page for page in self.pages if page not in done]
+        logger.info(
+            f"Backfill de {len(self.pages)} páginas: {len(self.pages) - len(pages)} "
+            f"ya terminadas, {len(pages)} pendientes, lotes de {self.chunk_size}"
+        )
+
+        consumer = threading.Thread(
+            target=self._consume, name="backfill-extractor", daemon=True
+        )
+        consumer.start()
+        try:
+            with pipeline.metrics.stage("backfill") as stage:
+                pending = self.pending_articles()
+                if not pending.empty:
+                    logger.info(
+                        f"Reanudando la extracción de {len(pending)} artículos"
+                    )
+                    self._put(pending)
+
+                buffer = []
+                buffered = 0
+                with ThreadPoolExecutor(max_workers=pipeline.max_workers) as executor:
+                    listing = pipeline._iter_listing_pages(
+                        executor, pages, ahead=pipeline.max_workers
+                    )
+                    for page_num, entries in listing:
+                        if not entries:
+                            # Sin marcar: se vuelve a intentar al reanudar
+                            self.stats["empty_pages"] += 1
+                            continue
+                        df = self.scrape_page(executor, page_num, entries)
+                        self.stats["pages"] += 1
+                        self.stats["articles"] += len(df)
+                        logger.info(
+                            f"Página {page_num} terminada: {len(df)} artículos nuevos"
+                        )
+                        if not df.empty:
+                            buffer.append(df)
+                            buffered += len(df)
+                        if buffered >= self.chunk_size:
+                            self._put(pd.concat(buffer, ignore_index=True))
+                            buffer, buffered = [], 0
+                    listing.close()
+                if buffer:
+                    self._put(pd.concat(buffer, ignore_index=True))
+                stage.items = self.stats["articles"]
+        finally:
+            self._queue.put(None)
+            consumer.join()
+
+        if self.stats["merged_chunks"]:
+            if pipeline.export_json:
+                main_json_path = os.path.join(
+                    pipeline.data_dir, "processed", "datos_electricos_organizados.json"
+                )
+                pipeline.report_store.export_nested(main_json_path)
+            pipeline.retrain_models()
+
+        ok = not self.stats["empty_pages"] and not self.stats["failed_chunks"]
+        logger.info(
+            f"Backfill terminado: {self.stats['pages']} páginas, "
+            f"{self.stats['articles']} artículos, {self.stats['merged_chunks']} "
+            f"lotes incorporados, {self.stats['failed_chunks']} lotes fallidos, "
+            f"{self.stats['empty_pages']} páginas sin respuesta"
+        )
+        pipeline.metrics.write("ok" if ok else "error")
+        return ok
+
+    def close(self):
+        self.checkpoint.close()
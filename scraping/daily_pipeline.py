@@ -4,20 +4,43 @@ Pipeline diario para extraer y procesar información sobre afectaciones eléctri
 """
 import os
 import sys
-import json
-import requests
 import pandas as pd
 import logging
 from datetime import datetime
-from bs4 import BeautifulSoup
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from dotenv import load_dotenv
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(current_dir)
-sys.path.append(project_dir)
-
+# El proyecto va primero para que `scraping` resuelva al paquete y no a scraping.py
+sys.path.insert(0, project_dir)
+
+from models.retraining import DEFAULT_MIN_NEW_ROWS, retrain_all
+from processing.columnar import load_features
+from processing.feature_store import FeatureStore
+from processing.feature_table import FeatureTable
+from processing.records import loads, validate_records
+from processing.report_store import ReportStore
 from scraping import scrape_article_content
+from scraping.backfill import Backfill
+from scraping.http_cache import ResponseCache
+from scraping.http_client import HttpClient
+from scraping.llm_cache import LLMResultCache
+from scraping.llm_extraction import (
+    CachedExtractor,
+    ConcurrentExtractor,
+    find_output_json,
+)
+from scraping.metrics import RunMetrics
+from scraping.parsers import get_parser
+from scraping.rate_limit import HostRateLimiter, TokenBucket
+from scraping.rule_extraction import DEFAULT_THRESHOLD, RuleFirstExtractor
+from scraping.sharded import ShardedExtraction
+from scraping.title_matcher import DEFAULT_RULES_PATH, TitleMatcher
+from scraping.url_store import UrlStore, link_date
 from extract_json import CreateJson
 
 log_dir = os.path.join(project_dir, "logs")
@@ -33,30 +56,103 @@ logging.basicConfig(
 )
 logger = logging.getLogger("daily_pipeline")
 
+LLM_URL = "https://api.fireworks.ai/inference/v1/chat/completions"
+DEFAULT_MODEL = "accounts/fireworks/models/llama-v3p3-70b-instruct"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
 
 class DailyPipeline:
 
     def __init__(
         self,
         api_key,
-        a,
-        b,
+        a=None,
+        b=None,
         model=None,
         template_path=None,
         data_dir="data",
         days_lookback=1,
+        max_workers=4,
+        requests_per_second=None,
+        base_url="http://www.cubadebate.cu",
+        timeout=30,
+        max_retries=3,
+        title_rules_path=DEFAULT_RULES_PATH,
+        cache_dir=None,
+        cache_ttl=3600,
+        cache_max_mb=512,
+        offline=False,
+        parser="auto",
+        extractor="createjson",
+        llm_url=LLM_URL,
+        llm_workers=4,
+        llm_rate=1.0,
+        llm_batch_size=1,
+        llm_cache=True,
+        rule_threshold=DEFAULT_THRESHOLD,
+        shard_workers=1,
+        export_json=True,
+        stop_after_known=None,
+        retrain=True,
+        retrain_min_rows=DEFAULT_MIN_NEW_ROWS,
+        models_dir=None,
+        metrics_dir=None,
+        profile_stage=None,
     ):
         """
         Inicialización del pipeline
 
         Args:
             api_key (str): API key de fireworks.ai
+            a (int): Primera página del listado a recorrer (None para la 1)
+            b (int): Página siguiente a la última (None para recorrer
+                `days_lookback` páginas)
             model (str): Modelo a utilizar
             template_path (str): Ruta al archivo de plantilla para la extracción
             data_dir (str): Directorio para guardar los datos
             days_lookback (int): Número de días hacia atrás para buscar artículos
+            max_workers (int): Número máximo de descargas simultáneas
+            requests_per_second (float): Límite de peticiones por segundo al sitio
+                (None para no limitar)
+            base_url (str): URL base del sitio de noticias
+            timeout (float): Timeout en segundos de cada petición HTTP
+            max_retries (int): Reintentos ante errores de red o respuestas 429/5xx
+            title_rules_path (str): Archivo JSON con las reglas de títulos a extraer
+            cache_dir (str): Directorio del caché HTTP en disco (None lo desactiva)
+            cache_ttl (float): Segundos que una página guardada se usa sin revalidar
+            cache_max_mb (float): Tamaño máximo del caché HTTP en MB
+            offline (bool): Usar solo el caché HTTP, sin acceder a la red
+            parser (str): Backend de parseo HTML: "lxml", "soup" o "auto"
+            extractor (str): "createjson" (un artículo cada `delay` segundos) o
+                "concurrent" (ConcurrentExtractor)
+            llm_url (str): Endpoint de chat-completions del LLM
+            llm_workers (int): Peticiones simultáneas al LLM con el extractor concurrente
+            llm_rate (float): Peticiones por segundo al LLM con el extractor concurrente
+            llm_batch_size (int): Artículos por prompt con el extractor concurrente
+            llm_cache (bool): Reutilizar resultados del LLM guardados en
+                data_dir/cache/llm_results.sqlite (con ambos extractores)
+            rule_threshold (float): Confianza mínima para resolver un artículo
+                con las reglas de rule_extraction sin llamar al LLM (None
+                envía todos los artículos al LLM)
+            shard_workers (int): Fragmentos año-mes extraídos a la vez con
+                analize_all
+            export_json (bool): Regenerar el JSON anidado principal tras cada
+                actualización del almacén de reportes
+            stop_after_known (int): Detener el recorrido del listado tras esta
+                cantidad de páginas seguidas sin artículos nuevos (None recorre
+                todas las páginas)
+            retrain (bool): Reentrenar los modelos guardados tras actualizar los datos
+            retrain_min_rows (int): Filas nuevas mínimas para reentrenar un modelo
+            models_dir (str): Directorio de los modelos (data_dir/models por defecto)
+            metrics_dir (str): Directorio de las métricas por ejecución
+                (data_dir/metrics por defecto)
+            profile_stage (str): Etapa que se perfila con cProfile ("crawl",
+                "extraction", "merge", "feature_update" o "retrain")
         """
-        if a > b:
+        if a is not None and b is not None and a > b:
             raise ValueError("a tiene que ser menor que b")
         self.api_key = api_key
         self.model = model
@@ -65,275 +161,199 @@ class DailyPipeline:
         )
         self.data_dir = data_dir
         self.days_lookback = days_lookback
+        self.max_workers = max_workers
+        if offline and not cache_dir:
+            raise ValueError("El modo sin conexión necesita cache_dir")
+        cache = (
+            ResponseCache(
+                cache_dir,
+                ttl=cache_ttl,
+                max_bytes=int(cache_max_mb * 1024 * 1024),
+                offline=offline,
+            )
+            if cache_dir
+            else None
+        )
+        self.http = HttpClient(
+            headers=HEADERS,
+            timeout=timeout,
+            max_retries=max_retries,
+            pool_size=max_workers,
+            rate_limiter=HostRateLimiter(requests_per_second),
+            cache=cache,
+        )
+        self.base_url = base_url.rstrip("/")
+        self.title_matcher = TitleMatcher.from_file(title_rules_path)
+        self.parser = get_parser(parser)
+        if extractor not in ("createjson", "concurrent"):
+            raise ValueError(f"Extractor desconocido: {extractor}")
+        self.extractor = extractor
+        self.llm_url = llm_url
+        self.llm_workers = llm_workers
+        self.llm_rate = llm_rate
+        # Compartida por todos los extractores concurrentes del pipeline, para
+        # que el ritmo al LLM no crezca con los fragmentos en paralelo
+        self.llm_rate_limiter = TokenBucket(llm_rate, llm_workers)
+        self.llm_batch_size = llm_batch_size
+        self.rule_threshold = rule_threshold
+        self.shard_workers = shard_workers
+        self.llm_cache = (
+            LLMResultCache(os.path.join(data_dir, "cache", "llm_results.sqlite"))
+            if llm_cache
+            else None
+        )
+        self.metrics = RunMetrics(
+            metrics_dir or os.path.join(data_dir, "metrics"),
+            profile_stage=profile_stage,
+        )
+        self.metrics.add_source("http", self.http.snapshot)
+        if self.llm_cache is not None:
+            self.metrics.add_source(
+                "llm_cache",
+                lambda: {"hits": self.llm_cache.hits, "misses": self.llm_cache.misses},
+            )
         self.today = datetime.now()
         self.date_str = self.today.strftime("%Y-%m-%d")
         os.makedirs(os.path.join(data_dir, "daily", self.date_str), exist_ok=True)
         os.makedirs(os.path.join(data_dir, "processed"), exist_ok=True)
-        self.existing_data = self.load_existing_data()
+        self.report_store = ReportStore(os.path.join(data_dir, "processed", "reports"))
+        self.feature_table = FeatureTable(os.path.join(data_dir, "processed"))
+        self.feature_store = FeatureStore(os.path.join(data_dir, "processed"))
+        self.export_json = export_json
+        self.stop_after_known = stop_after_known
+        self.retrain = retrain
+        self.retrain_min_rows = retrain_min_rows
+        self.models_dir = models_dir or os.path.join(data_dir, "models")
+        self.raw_csv_path = os.path.join(
+            data_dir, "raw", "afectaciones_electricas_cubadebate_filter_2025.csv"
+        )
+        self.url_store = self.load_url_store()
         logger.info(f"Inicializado pipeline para fecha: {self.date_str}")
-        if a != 1 and b != 2:
-            self.a = a
-            self.b = b
-        else:
-            self.a = None
-            self.b = None
+        self.a = a
+        self.b = b
 
-    def load_existing_data(self):
+    def close(self):
+        """
+        Cierra las conexiones HTTP y las bases SQLite del pipeline
         """
-        Carga los datos de afectaciones ya procesados
+        self.http.close()
+        if self.http.cache is not None:
+            self.http.cache.close()
+        if self.llm_cache is not None:
+            self.llm_cache.close()
+        self.url_store.close()
+
+    def load_url_store(self):
+        """
+        Abre el registro de enlaces ya vistos; la primera vez lo llena con los
+        enlaces del CSV de artículos y del almacén de reportes
 
         Returns:
-            DataFrame con los datos existentes
+            UrlStore: Registro de enlaces del pipeline
         """
-        logger.info("Cargando datos existentes...")
-        try:
-            df = pd.read_csv(
-                os.path.join(
-                    self.data_dir,
-                    "raw",
-                    "afectaciones_electricas_cubadebate_filter_2025.csv",
-                ),
-                encoding="utf-8-sig",
-            )
-            logger.info(f"Datos existentes cargados: {len(df)} registros")
-            return df
-        except Exception as e:
-            logger.warning(
-                f"Error al cargar datos existentes: {e}. Se utilizará un DataFrame vacío."
-            )
-            return pd.DataFrame()
+        store = UrlStore(os.path.join(self.data_dir, "processed", "seen_urls.sqlite"))
+        if len(store) == 0:
+            try:
+                store.migrate_from_csv(self.raw_csv_path)
+                store.mark_merged(
+                    key for key in self.report_store.keys() if not key.startswith("id:")
+                )
+            except Exception as e:
+                logger.warning(f"Error al migrar los enlaces existentes: {e}")
+        logger.info(f"Registro de enlaces cargado: {len(store)} enlaces conocidos")
+        return store
+
+    @property
+    def pages(self):
+        """
+        Returns:
+            range: Páginas del listado a recorrer: de `a` a `b` si se dieron,
+                si no las `days_lookback` más recientes
+        """
+        return range(
+            1 if self.a is None else self.a,
+            self.days_lookback + 1 if self.b is None else self.b,
+        )
 
     def get_latest_articles(self, max_pages=5):
         """
         Obtiene los artículos más recientes sobre electricidad
 
+        Las páginas del listado y los artículos se descargan en paralelo con
+        `max_workers` hilos, pero el resultado conserva el orden de un
+        recorrido secuencial (página a página y artículo a artículo).
+
+        Con `stop_after_known` el listado se recorre de la página más nueva a
+        la más vieja, descargando solo una página por adelantado, y se detiene
+        tras `stop_after_known` páginas seguidas cuyos artículos ya están
+        registrados o se publicaron antes de la fecha más reciente guardada.
+
         Args:
             max_pages: Número máximo de páginas a recorrer
 
         Returns:
             DataFrame con los artículos encontrados
         """
-        existing_df = self.existing_data
-        existing_urls = (
-            set(existing_df["Enlace"].tolist())
-            if not existing_df.empty and "Enlace" in existing_df.columns
-            else set()
-        )
-
+        pages = self.pages
         articles_data = []
+        watermark = None
+        if self.stop_after_known:
+            latest = self.url_store.latest_fecha()
+            watermark = latest[:10] if latest else None
+            logger.info(f"Parada anticipada activa, marca de agua: {watermark}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Los artículos se encolan en cuanto llega su página, así la descarga
+            # de artículos se solapa con la del resto del listado.
+            pending = []
+            scheduled = {}
+            known_pages = 0
+            listing = self._iter_listing_pages(
+                executor, pages, ahead=1 if self.stop_after_known else len(pages)
+            )
+            for page_num, entries in listing:
+                if self.stop_after_known:
+                    if self._is_known_page(entries, watermark):
+                        known_pages += 1
+                    else:
+                        known_pages = 0
+                    if known_pages >= self.stop_after_known:
+                        logger.info(
+                            f"Página {page_num} sin artículos nuevos, "
+                            "se detiene el recorrido del listado"
+                        )
+                        break
 
-        for page_num in range(
-            1 if self.a is None else self.a,
-            self.days_lookback + 1 if self.b is None else self.b,
-        ):
-            url = f"http://www.cubadebate.cu/page/{page_num}/"
-            logger.info(f"Revisando página: {url}")
-
-            try:
-                response = requests.get(
-                    url,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                    },
-                )
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                articles = soup.find_all("div", class_=["bigimage_post", "image_post"])
-
-                for article in articles:
-                    title = article.find("div", class_="title").get_text(strip=True)
-                    link = article.find("div", class_="title").a["href"]
-
-                    if link in existing_urls:
+                for title, link in entries:
+                    if link in self.url_store:
                         logger.debug(f"Artículo ya procesado: {title}")
                         continue
 
-                    excerpt = (
-                        article.find("div", class_="excerpt").get_text(strip=True)
-                        if article.find("div", class_="excerpt")
-                        else ""
-                    )
-
-                    if (
-                        any(
-                            keyword in title
-                            for keyword in [
-                                "UNE pronóstica déficit en pico nocturno de 1570 MW",
-                                "Pronóstico de la UNE advierte sobre afectaciones de 1 417 megawatts en horario de máxima demanda"
-                                "Unión Eléctrica: Afectación en horario pico nocturno de este 4 de abril asciende a 1680 MW",
-                                "Para este domingo se prevé una afectación estimada de 1 130 MW en el horario pico",
-                                "Felton 1 se reincorpora al SEN: Afectación estimada de 1410 MW en pico nocturno de este martes",
-                                "Unión Eléctrica: Unidad uno de la termoeléctrica Felton en proceso de arranque",
-                                "Unión Eléctrica pronostica",
-                                "Unión Eléctrica estima",
-                                "UNE pronostica",
-                                "UNE estima",
-                                "UNE preve",
-                                "UNE prevé",
-                                "UNE prevé afectación",
-                                "Unión Eléctrica preve",
-                                "Unión Eléctrica prevé",
-                                "Unión Eléctrica: Déficit ",
-                                "Déficit de generación eléctrica",
-                                "UNE: Déficit ",
-                                "Unión Eléctrica proyecta",
-                                "UNE informa",
-                                "Unión Eléctrica Déficit",
-                                "Pronostican afectación de más de",
-                                "Pronostican afectación de mas de",
-                                "Pronostica la UNE afectación ",
-                                "Pronostica la Unión Eléctrica afectación "
-                                "UNE Déficit"
-                                "Pronóstico de la UNE advierte",
-                                "Pronóstico de la Unión Eléctrica advierte",
-                                "UNE: Afectaciones por déficit",
-                                "Unión Eléctrica: Afectaciones por déficit",
-                                "UNE Afectaciones por déficit",
-                                "Unión Eléctrica Afectaciones por déficit",
-                                "La UNE calcula",
-                                "La Unión Eléctrica calcula",
-                                "Déficit en la generación eléctrica",
-                                "La afectación al servicio eléctrico",
-                                "UNE: Prevén afectación",
-                                "UNE Prevén afectación",
-                                "Unión Eléctrica: Prevén afectación",
-                                "Unión Eléctrica Prevén afectación",
-                                "Déficit energético superará",
-                            ]
-                        )
-                        or "Pronóstico de la UNE advierte sobre afectaciones de 1 417 megawatts en horario de máxima demanda"
-                        in title
-                        or "Unión Eléctrica: Afectación en horario pico nocturno de este 4 de abril asciende a 1680 MW"
-                        in title
-                        or "UNE: Se pronostica una afectación de 1490 MW para el horario pico"
-                        in title
-                        or "UNE: Para el horario pico se prevé una afectación estimada de 1314 MW"
-                        in title
-                        or "UNE: Para el horario pico se prevé una afectación estimada de 1311 MW"
-                        in title
-                        or "Prevén afectación de 1 385 megawatts durante el horario pico nocturno de este lunes"
-                        in title
-                        or "UNE: Se pronostica una afectación de 1365 MW para el horario pico"
-                        in title
-                        or "Prevé la UNE déficit de 1 260 megawatts durante el horario pico nocturno de este jueves"
-                        in title
-                        or "UNE: Se pronostica una afectación de 1421 MW en el horario pico"
-                        in title
-                        or "Unión Eléctrica: Afectación de 1420 MW en el horario pico, con mayor incidencia en centro y oriente"
-                        in title
-                        or "Unión Eléctrica: El Sistema Eléctrico Nacional opera de manera estable (+Video)"
-                        in title
-                        or "Unión Eléctrica: Se pronostica una afectación de 1155 MW en el pico nocturno de martes"
-                        in title
-                        or "Afectación eléctrica para el pico nocturno de este lunes superará los 1300 MW, informa la UNE"
-                        in title
-                        or "UNE: Se pronostica una afectación de 1378 MW en el horario pico"
-                        in title
-                        or "Déficit en pico nocturno de este lunes sobrepasa los 1100 MW, informa Unión Eléctrica"
-                        in title
-                        or "Prevén afectación de 835 MW durante el horario pico nocturno de este jueves"
-                        in title
-                        or "Unión eléctrica informa afectación de 850 MW en el horario pico nocturno"
-                        in title
-                        or "El déficit en pico nocturno será de 860 MW este domingo"
-                        in title
-                        or "Estima Unión Eléctrica para la hora pico una afectación de 857 MW en el país"
-                        in title
-                        or "UNE: Se pronostica una afectación de 725 MW en el horario pico"
-                        in title
-                        or "UNE: Se pronostica una afectación de 560 MW en el horario pico de este domingo"
-                        in title
-                        or "Pronostica la UNE un déficit de 540 MW en horario de máxima demanda"
-                        in title
-                        or "UNE: Se pronostica una afectación de 783 MW en el horario pico"
-                        in title
-                        or "UNE: Se pronostica una afectación de 390 MW en el horario pico"
-                        in title
-                        or "UNE no prevé afectaciones en horario diurno y afectación de 210 MW en el pico este lunes"
-                        in title
-                        or "UNE: Pronostican afectación de 196 MW durante el horario pico nocturno"
-                        in title
-                        or "UNE pronostica una afectación de 320 MW en horario pico nocturno"
-                        in title
-                        or "Situación del SEN para el 12 de enero de 2024" in title
-                        or "Situación del SEN para este viernes 9 de febrero" in title
-                        or "Unión Eléctrica informa afectación de 750 MW para el horario pico nocturno"
-                        in title
-                        or "UNE: Se pronostica una afectación de 925 MW para el horario pico"
-                        in title
-                        or "UNE: Se pronostica una afectación de 884 MW en el horario pico"
-                        in title
-                        or "Unión Eléctrica informa afectación de 1280 MW en el horario pico nocturno"
-                        in title
-                        or "Pronostica Unión Eléctrica un déficit de 1416 MW en horario pico de este viernes"
-                        in title
-                        or "SEN prevé afectaciones en el servicio por déficit de capacidad de generación"
-                        in title
-                        or "Unión Eléctrica: Se pronostica una afectación de 1105 MW en el horario pico"
-                        in title
-                        or "UNE: Estiman afectación de 357 MW durante horario pico nocturno de este viernes"
-                        in title
-                        or "Unión Eléctrica informa afectación de 250 MW para el horario pico nocturno"
-                        in title
-                        or "UNE: no se pronostican para el horario pico afectaciones al servicio por déficit de capacidad de generación"
-                        in title
-                        or "UNE: No se pronostican afectaciones durante pico nocturno de este sábado"
-                        in title
-                        or "Unión Eléctrica: No se pronostican afectaciones al servicio este viernes"
-                        in title
-                        or "UNE no prevé afectaciones por déficit de generación eléctrica en horario pico"
-                        in title
-                        or "UNE: Se pronostica una afectación de 535 MW en el horario pico"
-                        in title
-                        or "UNE no pronostica afectaciones por déficit de generación este domingo"
-                        in title
-                        or "UNE no prevé afectaciones durante el pico nocturno de este lunes"
-                        in title
-                        or "Unión Eléctrica no prevé afectaciones durante el pico nocturno de este martes"
-                        in title
-                        or "UNE: Se pronostica una afectación de 355 MW durante horario pico nocturno de este viernes"
-                        in title
-                        or "Unión Eléctrica estima déficit de 337 MW en horario pico nocturno de este 26 de abril"
-                        in title
-                        or "Déficit de más de 1000 MW en horario pico nocturno de este jueves, informa la Unión Eléctrica"
-                        in title
-                        or "Se pronostica una afectación de 980 MW en el horario pico de este miércoles"
-                        in title
-                        or "Unión Eléctrica informa afectación de 530 MW para el horario pico nocturno"
-                        in title
-                        or "UNE: Se pronostica una afectación de 395 MW en el horario pico"
-                        in title
-                        or "Unión Eléctrica no pronostica afectaciones en horario diurno"
-                        in title
-                        or "Unión Eléctrica pronostica déficit de 312 MW en el horario pico nocturno"
-                        in title
-                        or "Termoeléctrica Antonio Guiteras sale de servicio por avería en la caldera: Déficit en horario pico nocturno sobrepasa los 900 MW"
-                        in title
-                        or "Se prevé alto déficit de generación para este viernes"
-                        in title
-                        or "Unión Eléctrica pronostica déficit de 545 MW para el pico nocturno de este domingo"
-                        in title
-                    ):
-                        logger.info(f"Artículo encontrado: {title}")
-
-                        article_content = scrape_article_content(
-                            link,
-                            {
-                                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                            },
-                        )
-                        if article_content:
+                    rule = self.title_matcher.match(title)
+                    if rule is None:
+                        continue
 
-                            article_date = article_content.get("Fecha", "").split("T")[
-                                0
-                            ]
+                    logger.info(f"Artículo encontrado: {title} (regla: {rule.rule})")
+                    if link not in scheduled:
+                        scheduled[link] = executor.submit(self._fetch_article, link)
+                    pending.append((title, scheduled[link]))
+            listing.close()
 
-                            articles_data.append(article_content)
-                            logger.info(f"Artículo agregado: {title} - {article_date}")
+            for title, future in pending:
+                article_content = future.result()
+                if article_content:
 
-            except Exception as e:
-                logger.error(f"Error en página {page_num}: {e}")
-                continue
+                    article_date = article_content.get("Fecha", "").split("T")[0]
+
+                    articles_data.append(article_content)
+                    logger.info(f"Artículo agregado: {title} - {article_date}")
+
+        stats = self.http.snapshot()
+        logger.info(
+            f"HTTP: {stats['requests']} peticiones, {stats['retries']} reintentos, "
+            f"{stats['errors']} errores, {stats['bytes'] / 1024:.1f} KiB descargados, "
+            f"{stats['cache_hits']} aciertos de caché, {stats['not_modified']} sin cambios"
+        )
 
         new_articles_df = pd.DataFrame(articles_data)
 
@@ -342,21 +362,20 @@ class DailyPipeline:
             os.makedirs(daily_dir, exist_ok=True)
 
             daily_file = os.path.join(daily_dir, f"articulos_{self.date_str}.csv")
-            new_articles_df.to_csv(daily_file, index=False, encoding="utf-8-sig")
+            if os.path.exists(daily_file):
+                # Otra consulta del mismo día: se agrega sin repetir la cabecera
+                columns = pd.read_csv(daily_file, nrows=0, encoding="utf-8-sig").columns
+                new_articles_df.reindex(columns=columns).to_csv(
+                    daily_file, mode="a", header=False, index=False, encoding="utf-8"
+                )
+            else:
+                new_articles_df.to_csv(daily_file, index=False, encoding="utf-8-sig")
             logger.info(
                 f"Se encontraron {len(new_articles_df)} artículos nuevos. Guardados en {daily_file}"
             )
 
-            updated_df = pd.concat([new_articles_df, existing_df], ignore_index=True)
-            updated_df.to_csv(
-                os.path.join(
-                    self.data_dir,
-                    "raw",
-                    "afectaciones_electricas_cubadebate_filter_2025.csv",
-                ),
-                index=False,
-                encoding="utf-8-sig",
-            )
+            self.append_raw_articles(new_articles_df)
+            self.url_store.add(new_articles_df["Enlace"], new_articles_df["Fecha"])
             logger.info(
                 f"raw/afectaciones_electricas_cubadebate_filter_2025.csv actualizado"
             )
@@ -365,6 +384,113 @@ class DailyPipeline:
 
         return new_articles_df
 
+    def append_raw_articles(self, articles_df):
+        """
+        Agrega artículos al final del CSV de artículos sin reescribirlo
+
+        Args:
+            articles_df (pandas.DataFrame): Artículos nuevos
+        """
+        if not os.path.exists(self.raw_csv_path):
+            os.makedirs(os.path.dirname(self.raw_csv_path), exist_ok=True)
+            articles_df.to_csv(self.raw_csv_path, index=False, encoding="utf-8-sig")
+            return
+
+        # Mismo orden de columnas que el archivo; sin BOM porque ya lo tiene al inicio
+        columns = pd.read_csv(self.raw_csv_path, nrows=0, encoding="utf-8-sig").columns
+        articles_df.reindex(columns=columns).to_csv(
+            self.raw_csv_path, mode="a", header=False, index=False, encoding="utf-8"
+        )
+
+    def _iter_listing_pages(self, executor, pages, ahead):
+        """
+        Descarga páginas del listado en orden, con `ahead` páginas en vuelo
+
+        Args:
+            executor (ThreadPoolExecutor): Pool compartido con los artículos
+            pages (range): Números de página a recorrer
+            ahead (int): Páginas que se descargan por adelantado
+
+        Yields:
+            tuple: (número de página, pares (título, enlace) de la página)
+        """
+        pages = iter(pages)
+        window = deque(
+            (page, executor.submit(self._fetch_listing_page, page))
+            for page in islice(pages, max(ahead, 1))
+        )
+        try:
+            while window:
+                page_num, future = window.popleft()
+                for page in islice(pages, 1):
+                    future_page = executor.submit(self._fetch_listing_page, page)
+                    window.append((page, future_page))
+                yield page_num, future.result()
+        finally:
+            for _, future in window:
+                future.cancel()
+
+    def _is_known_page(self, entries, watermark):
+        """
+        Indica si una página del listado no tiene artículos nuevos: todos sus
+        enlaces están registrados o se publicaron antes de la marca de agua
+
+        Args:
+            entries (list): Pares (título, enlace) de la página
+            watermark (str): Fecha YYYY-MM-DD más reciente guardada o None
+
+        Returns:
+            bool: True si no hay nada nuevo en la página
+        """
+        if not entries:
+            # Una página vacía suele ser un error de descarga, no el final
+            return False
+        for _, link in entries:
+            if link in self.url_store:
+                continue
+            published = link_date(link)
+            if watermark and published and published < watermark:
+                continue
+            return False
+        return True
+
+    def _fetch_listing_page(self, page_num):
+        """
+        Descarga una página del listado y extrae sus artículos
+
+        Args:
+            page_num (int): Número de la página del listado
+
+        Returns:
+            list: Pares (título, enlace) en el orden de la página, vacía si hay error
+        """
+        url = f"{self.base_url}/page/{page_num}/"
+        logger.info(f"Revisando página: {url}")
+
+        try:
+            with self.metrics.timed("listing_page"):
+                response = self.http.get(url)
+                return self.parser.parse_listing(response.text)
+
+        except Exception as e:
+            logger.error(f"Error en página {page_num}: {e}")
+            return []
+
+    def _fetch_article(self, link):
+        """
+        Descarga un artículo con el cliente HTTP compartido del pipeline
+
+        Args:
+            link (str): URL del artículo
+
+        Returns:
+            Dict: Datos del artículo o None si hay error
+        """
+        with self.metrics.timed("article"):
+            return scrape_article_content(
+                link, HEADERS, client=self.http, parser=self.parser
+            )
+
     def process_new_articles(self, articles_df):
         """
         Procesa los artículos nuevos y los guarda en archivos diarios
@@ -383,99 +509,151 @@ class DailyPipeline:
             return 2
 
         self._process_and_save_day(articles_df)
-
-        self.update_main_json()
+        self.update_main_json(items=len(articles_df))
         return True
 
-    def update_main_json(self):
+    def ingest(self, json_processed, items=0):
+        """
+        Punto de entrada único de los JSON del extractor al almacén de
+        reportes: lo usan el recorrido diario y la re-extracción completa
+        (analize_all). Incorpora el JSON con merge_json, que actualiza la
+        tabla de variables, el registro de enlaces y el JSON principal, y
+        después reentrena los modelos si corresponde
+
+        Args:
+            json_processed (str): JSON año -> mes del extractor
+            items (int): Artículos del JSON, para las métricas de la etapa
+
+        Returns:
+            bool: True si los registros se incorporaron
+        """
+        with self.metrics.stage("merge") as stage:
+            stage.items = items
+            merged = self.merge_json(json_processed)
+        if merged and self.retrain:
+            with self.metrics.stage("retrain") as stage:
+                stage.items = len(self.retrain_models())
+        return merged
+
+    def retrain_models(self):
+        """
+        Reentrena de forma incremental los modelos guardados con los datos
+        nuevos de la tabla de variables
+
+        Returns:
+            list: Objetivos reentrenados
+        """
+        if not self.retrain:
+            return []
+        try:
+            return retrain_all(
+                data_dir=self.data_dir,
+                output_dir=self.models_dir,
+                min_new_rows=self.retrain_min_rows,
+            )
+        except Exception as e:
+            logger.error(f"Error al reentrenar los modelos: {e}")
+            return []
+
+    def update_main_json(self, items=0):
         """
         Actualiza el archivo JSON principal con los nuevos datos extraídos
         de todos los días dentro del rango de days_lookback
+
+        Los registros se insertan o reemplazan por enlace en el almacén
+        particionado (processed/reports), que solo reescribe los meses que
+        cambian; después, si export_json está activo, se regenera el JSON
+        anidado principal de forma atómica.
+
+        Args:
+            items (int): Artículos extraídos, para las métricas de la etapa
+
+        Returns:
+            bool: True si los registros se incorporaron
         """
-        main_json_path = os.path.join(
-            self.data_dir, "processed", "datos_electricos_organizados.json"
-        )
         daily_dir = os.path.join(
             self.data_dir, "daily", self.today.strftime("%Y-%m-%d")
         )
-        json_processed = os.path.join(daily_dir, "datos_electricos_organizados.json")
-
         os.makedirs(os.path.join(self.data_dir, "processed"), exist_ok=True)
 
-        if not os.path.exists(json_processed):
-            logger.warning(
-                f"No se encontró el archivo JSON procesado en {json_processed}"
-            )
-            logger.info("Buscando directamente en el directorio del día actual...")
+        # CreateJson elige el nombre del JSON que deja en el directorio del día
+        json_processed = find_output_json(daily_dir)
+        if json_processed is None:
+            logger.error("No se encontraron archivos JSON para actualizar")
+            return False
 
-            # Buscar si existe el JSON en el directorio del día actual (nombre generado por CreateJson)
-            json_files = [f for f in os.listdir(daily_dir) if f.endswith(".json")]
-            if not json_files:
-                logger.error("No se encontraron archivos JSON para actualizar")
-                return False
+        return self.ingest(json_processed, items)
 
-            # Usar el primer JSON encontrado
-            json_processed = os.path.join(daily_dir, json_files[0])
-            logger.info(f"Se utilizará el archivo: {json_processed}")
+    def merge_json(self, json_processed, export_json=None):
+        """
+        Incorpora al almacén de reportes un JSON anidado generado por el
+        extractor y actualiza la tabla de variables
 
-        # Cargar datos principales si existen
-        if os.path.exists(main_json_path):
-            try:
-                with open(main_json_path, "r", encoding="utf-8") as f:
-                    main_data = json.load(f)
-                logger.info(f"Cargado archivo JSON principal desde {main_json_path}")
-            except Exception as e:
-                logger.error(f"Error al cargar el archivo principal: {e}")
-                main_data = {}
-        else:
-            main_data = {}
-            logger.warning("No se encontró archivo JSON principal. Creando uno nuevo.")
+        Args:
+            json_processed (str): JSON año -> mes del extractor
+            export_json (bool): Regenerar el JSON anidado principal (por
+                defecto el valor de export_json del pipeline)
 
+        Returns:
+            bool: True si los registros se incorporaron
+        """
+        main_json_path = os.path.join(
+            self.data_dir, "processed", "datos_electricos_organizados.json"
+        )
+        if export_json is None:
+            export_json = self.export_json
+        store = self.report_store
         try:
-            with open(json_processed, "r", encoding="utf-8") as f:
-                new_data = json.load(f)
-            logger.info(f"Cargado archivo JSON nuevo desde {json_processed}")
-            existing_df = self.existing_data
-            existing_urls = (
-                set(existing_df["Enlace"].tolist())
-                if not existing_df.empty and "Enlace" in existing_df.columns
-                else set()
+            # Migración única desde los JSON anidados existentes: sin ella la
+            # tabla de variables se regeneraría solo con los reportes nuevos
+            raw_json_path = os.path.join(
+                self.data_dir, "raw", "datos_electricos_organizados.json"
             )
+            store.seed([main_json_path, raw_json_path])
+        except Exception as e:
+            logger.error(f"Error al cargar el archivo principal: {e}")
+
+        try:
+            with open(json_processed, "rb") as f:
+                new_data = loads(f.read())
+            logger.info(f"Cargado archivo JSON nuevo desde {json_processed}")
             items_added = 0
+            items_replaced = 0
+            items_rejected = 0
+            merged_items = []
 
             for year, months in new_data.items():
-                if year not in main_data:
-                    main_data[year] = {}
-
                 for month, items in months.items():
-                    if month not in main_data[year]:
-                        main_data[year][month] = []
-
-                    for item in items:
-                        # Verificar si el enlace ya existe en los datos existentes
-                        if isinstance(item, dict) and "enlace" in item:
-                            if item["enlace"] not in existing_urls:
-                                main_data[year][month].append(item)
-                                items_added += 1
-                        else:
-                            logger.warning(f"Elemento no válido o sin enlace: {item}")
-                            continue
+                    # Se validan y normalizan antes de tocar el almacén
+                    reports, rejected = validate_records(items, require_link=True)
+                    items_rejected += rejected
+                    valid_items = [report.to_record() for report in reports]
+                    if valid_items:
+                        added, replaced = store.upsert(year, month, valid_items)
+                        self.url_store.mark_merged(
+                            item["enlace"] for item in valid_items
+                        )
+                        items_added += added
+                        items_replaced += replaced
+                        merged_items.extend(valid_items)
 
             logger.info(
-                f"Se agregaron {items_added} elementos nuevos al JSON principal"
+                f"Se agregaron {items_added} elementos nuevos y se actualizaron "
+                f"{items_replaced} en {store.root}"
             )
+            if items_rejected:
+                logger.warning(
+                    f"{items_rejected} registros del extractor rechazados por no "
+                    f"cumplir el esquema"
+                )
+            self.update_feature_table(merged_items)
+
+            if not export_json:
+                return True
 
             try:
-                with open(main_json_path, "w", encoding="utf-8") as f:
-                    json.dump(main_data, f, ensure_ascii=False, indent=2)
+                store.export_nested(main_json_path)
                 logger.info(f"Archivo JSON principal actualizado en {main_json_path}")
-
-                processed_path = os.path.join(
-                    self.data_dir, "processed", "datos_electricos_organizados.json"
-                )
-                with open(processed_path, "w", encoding="utf-8") as f:
-                    json.dump(main_data, f, ensure_ascii=False, indent=2)
-                logger.info(f"Copia del JSON guardada en {processed_path}")
                 return True
             except Exception as e:
                 logger.error(f"Error al guardar el archivo JSON principal: {e}")
@@ -484,6 +662,123 @@ class DailyPipeline:
 
         return False
 
+    def update_feature_table(self, records):
+        """
+        Agrega a la tabla de variables (cleaned_energy_data) los reportes
+        nuevos; la primera vez la genera desde todo el almacén de reportes.
+        Después recalcula la cola del almacén de variables por fecha
+
+        Args:
+            records (list): Registros recién incorporados al almacén
+        """
+        try:
+            if not self.feature_table.exists():
+                store = self.report_store
+                records = [
+                    record
+                    for year, month in store.partitions()
+                    for record in store.read_partition(year, month)
+                ]
+            self.feature_table.update(records)
+        except Exception as e:
+            logger.error(f"Error al actualizar la tabla de variables: {e}")
+            return
+        try:
+            with self.metrics.stage("feature_update") as stage:
+                stage.items = self.feature_store.update(load_features(self.data_dir))
+        except Exception as e:
+            logger.error(f"Error al actualizar el almacén de variables: {e}")
+
+    def _make_extractor(self, path_df, a, b):
+        """
+        Crea el extractor JSON configurado para el pipeline: las reglas primero
+        y el LLM para los artículos de baja confianza
+
+        Args:
+            path_df (str): CSV con los artículos a procesar
+            a (int): Año de inicio
+            b (int): Año final
+
+        Returns:
+            RuleFirstExtractor | CreateJson | ConcurrentExtractor: Extractor con
+                método run_pipeline
+        """
+        if self.rule_threshold is None:
+            return self._make_llm_extractor(path_df, a, b)
+        return RuleFirstExtractor(
+            path_df,
+            lambda path: self._make_llm_extractor(path, a, b),
+            a,
+            b,
+            threshold=self.rule_threshold,
+        )
+
+    def _make_llm_extractor(self, path_df, a, b):
+        """
+        Crea el extractor LLM configurado para el pipeline
+
+        Args:
+            path_df (str): CSV con los artículos a procesar
+            a (int): Año de inicio
+            b (int): Año final
+
+        Returns:
+            CreateJson | CachedExtractor | ConcurrentExtractor: Extractor con
+                método run_pipeline
+        """
+        if self.extractor == "concurrent":
+            return ConcurrentExtractor(
+                path_df=path_df,
+                path_template=self.template_path,
+                url_llm=self.llm_url,
+                apikey=self.api_key,
+                model=self.model,
+                a=a,
+                b=b,
+                max_in_flight=self.llm_workers,
+                requests_per_second=self.llm_rate,
+                rate_limiter=self.llm_rate_limiter,
+                batch_size=self.llm_batch_size,
+                cache=self.llm_cache,
+            )
+
+        def create_json(path):
+            return CreateJson(
+                path_df=path,
+                path_template=self.template_path,
+                url_llm=self.llm_url,
+                apikey=self.api_key,
+                model=self.model,
+                a=a,
+                b=b,
+            )
+
+        if self.llm_cache is None:
+            return create_json(path_df)
+        # CreateJson no consulta el caché: solo recibe los artículos sin
+        # resultado guardado
+        return CachedExtractor(
+            path_df,
+            create_json,
+            self.llm_cache,
+            self.template_path,
+            self.model,
+            a,
+            b,
+        )
+
+    def _extractor_sources(self, extractor):
+        """
+        Contadores del LLM del extractor (peticiones, reintentos, tokens), si
+        los lleva; CreateJson no los tiene. Con las reglas incluyen además los
+        artículos resueltos sin LLM (rule_hits) y los enviados al LLM
+        (rule_misses)
+        """
+        client = getattr(extractor, "client", None)
+        if client is None or not hasattr(client, "snapshot"):
+            return {}
+        return {"llm": client.snapshot}
+
     def _process_and_save_day(self, df, date_str=None):
         """
         Procesa los artículos de un día específico usando el extractor JSON
@@ -516,19 +811,19 @@ class DailyPipeline:
             )
             df.to_csv(temp_csv_path, index=False)
 
-            extractor = CreateJson(
-                path_df=temp_csv_path,
-                path_template=self.template_path,
-                url_llm="https://api.fireworks.ai/inference/v1/chat/completions",
-                apikey=self.api_key,
-                model=self.model,
+            extractor = self._make_extractor(
+                temp_csv_path,
                 a=2022,  # Año de inicio
                 b=2025,  # Año final
             )
 
-            result = extractor.run_pipeline(
-                delay=2, output_dir=daily_output_dir, save_individual=False
-            )
+            with self.metrics.stage(
+                "extraction", sources=self._extractor_sources(extractor)
+            ) as stage:
+                stage.items = len(df)
+                result = extractor.run_pipeline(
+                    delay=2, output_dir=daily_output_dir, save_individual=False
+                )
 
             if os.path.exists(temp_csv_path):
                 os.remove(temp_csv_path)
@@ -544,14 +839,38 @@ class DailyPipeline:
             logger.error(f"Error en el procesamiento de artículos de {self.today}: {e}")
             return False
 
-    def run(self, analize_all=False):
+    def run(self, analize_all=False, shards=None, force_shards=False):
         """
-        Ejecuta el pipeline completo
+        Ejecuta el pipeline completo y guarda las métricas de la ejecución
+
+        Args:
+            analize_all (bool): Re-extraer todo el CSV de artículos por
+                fragmentos año-mes en lugar de buscar artículos nuevos
+            shards (list): Con analize_all, extraer solo estos fragmentos
+            force_shards (bool): Con analize_all, re-extraer también los
+                fragmentos cuya entrada no cambió
         """
+        status = "error"
+        try:
+            result = self._run(analize_all, shards, force_shards)
+            if isinstance(result, int) and result == 2:
+                status = "sin_novedades"
+            elif result:
+                status = "ok"
+            return result
+        finally:
+            try:
+                self.metrics.write(status)
+            except Exception as e:
+                logger.error(f"Error al guardar las métricas: {e}")
+
+    def _run(self, analize_all, shards=None, force_shards=False):
         if not analize_all:
             logger.info(f"Iniciando pipeline con lookback de {self.days_lookback} días")
 
-            articles = self.get_latest_articles()
+            with self.metrics.stage("crawl") as stage:
+                articles = self.get_latest_articles()
+                stage.items = len(articles)
 
             if articles.empty:
                 logger.warning(
@@ -576,27 +895,12 @@ class DailyPipeline:
         logger.info(
             "iniciando la Creación de los JSON para todos los articulos filtrados"
         )
-        path = os.path.join(
-            self.data_dir, "raw", "afectaciones_electricas_cubadebate_filter_2025.csv"
-        )
-        extractor = CreateJson(
-            path_df=path,
-            path_template=self.template_path,
-            url_llm="https://api.fireworks.ai/inference/v1/chat/completions",
-            apikey=self.api_key,
-            model=self.model,
-            a=2021,
-            b=2025,
-        )
-        result = extractor.run_pipeline(
-            delay=2, output_dir="data/processed", save_individual=False
-        )
-
-        if result == 0:
-            logger.info(f"Creación JSON completada con éxito para {path}")
+        sharded = ShardedExtraction(self, workers=self.shard_workers)
+        if sharded.run(only=shards, force=force_shards):
+            logger.info(f"Creación JSON completada con éxito para {self.raw_csv_path}")
             return True
 
-        logger.error(f"Error durante la creación JSON para {path}")
+        logger.error(f"Error durante la creación JSON para {self.raw_csv_path}")
         return False
 
 
@@ -608,8 +912,149 @@ if __name__ == "__main__":
     parser.add_argument(
         "--analize_all", type=bool, default=False, help="Analyze all articles if True"
     )
-    parser.add_argument("--a", type=int, default=1, help="range a")
-    parser.add_argument("--b", type=int, default=2, help="range b")
+    parser.add_argument(
+        "--a", type=int, default=None, help="range a (first listing page, default 1)"
+    )
+    parser.add_argument(
+        "--b",
+        type=int,
+        default=None,
+        help="range b (page after the last one, default pages_lookback + 1)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Number of concurrent downloads"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30, help="HTTP timeout in seconds"
+    )
+    parser.add_argument(
+        "--rate_limit",
+        type=float,
+        default=None,
+        help="Maximum requests per second to the news site",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory for the on-disk HTTP cache (disabled if not given)",
+    )
+    parser.add_argument(
+        "--cache_ttl",
+        type=float,
+        default=3600,
+        help="Seconds a cached page is reused without revalidating",
+    )
+    parser.add_argument(
+        "--cache_max_mb", type=float, default=512, help="HTTP cache size limit in MB"
+    )
+    parser.add_argument(
+        "--parser",
+        type=str,
+        default="auto",
+        choices=["auto", "lxml", "soup"],
+        help="HTML parser backend",
+    )
+    parser.add_argument(
+        "--extractor",
+        type=str,
+        default="createjson",
+        choices=["createjson", "concurrent"],
+        help="JSON extraction engine",
+    )
+    parser.add_argument(
+        "--llm_workers", type=int, default=4, help="Concurrent LLM requests"
+    )
+    parser.add_argument(
+        "--llm_rate", type=float, default=1.0, help="LLM requests per second"
+    )
+    parser.add_argument(
+        "--llm_batch_size", type=int, default=1, help="Articles per LLM prompt"
+    )
+    parser.add_argument(
+        "--no_llm_cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached results",
+    )
+    parser.add_argument(
+        "--rule_threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Minimum rule-extraction confidence to skip the LLM for an article",
+    )
+    parser.add_argument(
+        "--no_rules",
+        action="store_true",
+        help="Send every article to the LLM instead of trying the regex rules first",
+    )
+    parser.add_argument(
+        "--shard_workers",
+        type=int,
+        default=1,
+        help="Year-month shards extracted in parallel with --analize_all",
+    )
+    parser.add_argument(
+        "--shards",
+        nargs="+",
+        default=None,
+        help="With --analize_all, only (re)extract these YYYY-MM shards",
+    )
+    parser.add_argument(
+        "--force_shards",
+        action="store_true",
+        help="With --analize_all, re-extract shards whose input did not change",
+    )
+    parser.add_argument(
+        "--no_export_json",
+        action="store_true",
+        help="Only update the partitioned report store, not the nested JSON",
+    )
+    parser.add_argument(
+        "--stop_after_known",
+        type=int,
+        default=None,
+        help="Stop crawling after this many consecutive pages with no new articles",
+    )
+    parser.add_argument(
+        "--no_retrain",
+        action="store_true",
+        help="Do not retrain the saved models after updating the data",
+    )
+    parser.add_argument(
+        "--retrain_min_rows",
+        type=int,
+        default=DEFAULT_MIN_NEW_ROWS,
+        help="Minimum new rows before a model is retrained",
+    )
+    parser.add_argument(
+        "--metrics_dir",
+        type=str,
+        default=None,
+        help="Directory for per-run metrics (data/metrics by default)",
+    )
+    parser.add_argument(
+        "--profile_stage",
+        type=str,
+        default=None,
+        choices=["crawl", "extraction", "merge", "feature_update", "retrain"],
+        help="Run this stage under cProfile and dump its stats next to the metrics",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Resumable backfill of pages --a to --b with overlapped extraction",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=20,
+        help="Articles per extraction batch in backfill mode",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Replay pages from the HTTP cache without touching the network",
+    )
 
     load_dotenv()
     args = parser.parse_args()
@@ -626,13 +1071,43 @@ if __name__ == "__main__":
         api_key=api_key,
         a=args.a,
         b=args.b,
-        model="accounts/fireworks/models/llama-v3p3-70b-instruct",
+        model=DEFAULT_MODEL,
         template_path="template.json",
         data_dir="data",
         days_lookback=args.pages_lookback,
+        max_workers=args.workers,
+        requests_per_second=args.rate_limit,
+        timeout=args.timeout,
+        cache_dir=args.cache_dir,
+        cache_ttl=args.cache_ttl,
+        cache_max_mb=args.cache_max_mb,
+        offline=args.offline,
+        parser=args.parser,
+        extractor=args.extractor,
+        llm_workers=args.llm_workers,
+        llm_rate=args.llm_rate,
+        llm_batch_size=args.llm_batch_size,
+        llm_cache=not args.no_llm_cache,
+        rule_threshold=None if args.no_rules else args.rule_threshold,
+        shard_workers=args.shard_workers,
+        export_json=not args.no_export_json,
+        stop_after_known=args.stop_after_known,
+        retrain=not args.no_retrain,
+        retrain_min_rows=args.retrain_min_rows,
+        metrics_dir=args.metrics_dir,
+        profile_stage=args.profile_stage,
     )
 
-    success = pipeline.run(analize_all=args.analize_all)
+    if args.backfill:
+        backfill = Backfill(pipeline, pipeline.pages, chunk_size=args.chunk_size)
+        success = backfill.run()
+        backfill.close()
+    else:
+        success = pipeline.run(
+            analize_all=args.analize_all,
+            shards=args.shards,
+            force_shards=args.force_shards,
+        )
     if isinstance(success, int) and success == 2:
         logger.info("No hay archivos nuevos para procesar.")
     elif success:
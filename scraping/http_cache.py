@@ -0,0 +1,210 @@
+"""
+Caché en disco de respuestas HTTP para las páginas del listado y los artículos.
+
+Los cuerpos se guardan direccionados por contenido (sha256) en
+`<cache_dir>/objects`, de modo que dos URLs con el mismo HTML comparten
+archivo. Un índice SQLite guarda por URL el hash del cuerpo, ETag,
+Last-Modified, la fecha de descarga y el último acceso, que se usa para
+desalojar por LRU cuando el caché supera su tamaño máximo.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger("http_cache")
+
+
+class CachedResponse(NamedTuple):
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class ResponseCache:
+    """
+    Caché de respuestas HTTP con TTL, validación condicional y desalojo LRU.
+    """
+
+    def __init__(self, cache_dir, ttl=3600, max_bytes=512 * 1024 * 1024, offline=False):
+        """
+        Args:
+            cache_dir (str): Directorio donde se guarda el caché
+            ttl (float): Segundos durante los que una respuesta se usa sin revalidar
+            max_bytes (int): Tamaño máximo de los cuerpos guardados
+            offline (bool): Si es True las respuestas guardadas se usan siempre,
+                aunque hayan caducado, y nunca se accede a la red
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self._db.commit()
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def get(self, url) -> Optional[CachedResponse]:
+        """
+        Busca la respuesta guardada para una URL
+
+        Args:
+            url (str): URL de la petición
+
+        Returns:
+            CachedResponse: Respuesta guardada o None si no existe
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, encoding, etag, last_modified, fetched_at "
+                "FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, encoding, etag, last_modified, fetched_at = row
+            try:
+                with open(self._object_path(digest), "rb") as f:
+                    body = f.read()
+            except OSError:
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self._db.commit()
+        return CachedResponse(url, body, encoding, etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        """
+        Indica si una respuesta guardada puede usarse sin revalidar
+        """
+        return self.offline or time.time() - entry.fetched_at < self.ttl
+
+    def conditional_headers(self, entry):
+        """
+        Cabeceras para revalidar una respuesta guardada con el servidor
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def refresh(self, url):
+        """
+        Marca como recién validada una respuesta (tras un 304 Not Modified)
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._db.commit()
+
+    def put(self, url, body, encoding=None, etag=None, last_modified=None):
+        """
+        Guarda una respuesta y desaloja las menos usadas si se supera el tamaño
+
+        Args:
+            url (str): URL de la petición
+            body (bytes): Cuerpo de la respuesta
+            encoding (str): Codificación del cuerpo
+            etag (str): Cabecera ETag recibida
+            last_modified (str): Cabecera Last-Modified recibida
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT digest FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(body), encoding, etag, last_modified, now, now),
+            )
+            if previous and previous[0] != digest:
+                self._drop_orphan(previous[0])
+            self._evict()
+            self._db.commit()
+
+    def _drop_orphan(self, digest):
+        in_use = self._db.execute(
+            "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if not in_use:
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self):
+        # El tamaño se cuenta por objeto, no por URL, porque los cuerpos se comparten
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT DISTINCT digest, size FROM responses)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT url, digest, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        evicted = 0
+        for url, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            shared = self._db.execute(
+                "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if not shared:
+                total -= size
+                self._drop_orphan(digest)
+            evicted += 1
+        logger.info(f"Caché HTTP: {evicted} respuestas desalojadas")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
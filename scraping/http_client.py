@@ -0,0 +1,209 @@
+"""
+Cliente HTTP compartido por el scraper del listado y el de artículos.
+
+Mantiene un pool de conexiones keep-alive, aplica timeouts, reintenta con
+backoff exponencial ante respuestas 429/5xx y errores de conexión, y lleva
+contadores por ejecución (peticiones, reintentos, bytes y errores). Si se le
+pasa un `ResponseCache` sirve desde disco las respuestas vigentes y revalida
+las caducadas con peticiones condicionales.
+"""
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scraping.rate_limit import HostRateLimiter
+
+logger = logging.getLogger("http_client")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CacheMiss(requests.RequestException):
+    """
+    La URL no está en el caché y el cliente trabaja sin conexión
+    """
+
+
+def _response_from_cache(entry):
+    response = requests.Response()
+    response._content = entry.body
+    response.status_code = 200
+    response.url = entry.url
+    response.encoding = entry.encoding
+    return response
+
+
+class HttpClient:
+    """
+    Envoltorio sobre `requests.Session` seguro para usarse desde varios hilos.
+    """
+
+    def __init__(
+        self,
+        headers=None,
+        timeout=(10, 30),
+        max_retries=3,
+        backoff_factor=1.0,
+        max_backoff=60.0,
+        pool_size=10,
+        rate_limiter=None,
+        cache=None,
+    ):
+        """
+        Args:
+            headers (dict): Cabeceras que se envían en todas las peticiones
+            timeout (float | tuple): Timeout de conexión y lectura en segundos
+            max_retries (int): Reintentos máximos por petición
+            backoff_factor (float): Espera base; el intento n espera factor * 2**n
+            max_backoff (float): Espera máxima entre reintentos
+            pool_size (int): Conexiones que se mantienen abiertas por host
+            rate_limiter (HostRateLimiter): Limitador de peticiones por host
+            cache (ResponseCache): Caché de respuestas en disco (opcional)
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.cache = cache
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "bytes": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "not_modified": 0,
+        }
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _backoff(self, attempt, response=None):
+        """
+        Calcula la espera antes del siguiente intento, respetando Retry-After
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return min(self.backoff_factor * (2**attempt), self.max_backoff)
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        """
+        Realiza una petición GET con reintentos
+
+        Args:
+            url (str): URL a descargar
+            headers (dict): Cabeceras adicionales para esta petición
+            timeout (float | tuple): Timeout para esta petición
+
+        Returns:
+            requests.Response: Respuesta con estado correcto
+
+        Raises:
+            requests.RequestException: Si la petición falla tras agotar los reintentos
+            CacheMiss: Si el caché está en modo sin conexión y no tiene la URL
+        """
+        if self.cache is None:
+            return self._request(url, headers, timeout, **kwargs)
+
+        entry = self.cache.get(url)
+        if entry is not None and self.cache.is_fresh(entry):
+            self._count(cache_hits=1)
+            return _response_from_cache(entry)
+        if self.cache.offline:
+            raise CacheMiss(f"{url} no está en el caché (modo sin conexión)")
+
+        if entry is not None:
+            headers = {**(headers or {}), **self.cache.conditional_headers(entry)}
+        response = self._request(url, headers, timeout, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self._count(not_modified=1)
+            self.cache.refresh(url)
+            return _response_from_cache(entry)
+
+        self.cache.put(
+            url,
+            response.content,
+            encoding=response.encoding,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return response
+
+    def _request(self, url, headers, timeout, **kwargs):
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            self.rate_limiter.wait(url)
+            self._count(requests=1)
+            try:
+                response = self.session.get(
+                    url, headers=headers, timeout=timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._count(errors=1)
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    f"Error de conexión en {url}: {e}. Reintentando en {delay:.1f}s"
+                )
+            else:
+                self._count(bytes=len(response.content))
+                if response.status_code not in RETRY_STATUS or (
+                    attempt >= self.max_retries
+                ):
+                    if not response.ok:
+                        self._count(errors=1)
+                    response.raise_for_status()
+                    return response
+                delay = self._backoff(attempt, response)
+                logger.warning(
+                    f"Respuesta {response.status_code} en {url}. Reintentando en {delay:.1f}s"
+                )
+
+            self._count(retries=1)
+            attempt += 1
+            time.sleep(delay)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Copia de los contadores actuales
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client():
+    """
+    Devuelve el cliente compartido del proceso, creándolo si hace falta
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
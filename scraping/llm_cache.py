@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Caché persistente de resultados del LLM.
+
+Cada resultado se guarda con la clave (hash del contenido del artículo, hash
+de la plantilla, modelo), de modo que una re-extracción completa solo paga
+el LLM por los artículos cuyo texto, plantilla o modelo cambiaron.
+
+Uso como comando para consultar o invalidar el caché:
+
+    python scraping/llm_cache.py --stats
+    python scraping/llm_cache.py --clear
+    python scraping/llm_cache.py --clear --model accounts/fireworks/models/x
+    python scraping/llm_cache.py --clear --template template.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join("data", "cache", "llm_results.sqlite")
+
+
+def content_hash(text):
+    """
+    Hash estable de un texto (contenido de un artículo o plantilla)
+
+    Args:
+        text (str): Texto a resumir
+
+    Returns:
+        str: sha256 en hexadecimal
+    """
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """
+    Caché SQLite de resultados del LLM, seguro para usarse desde varios hilos.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Args:
+            path (str): Archivo SQLite del caché
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                content_hash TEXT NOT NULL,
+                template_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                datos TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, template_hash, model)
+            )
+            """
+        )
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash, template_hash, model):
+        """
+        Busca un resultado guardado
+
+        Returns:
+            dict: Datos extraídos o None si no están en el caché
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT datos FROM results "
+                "WHERE content_hash = ? AND template_hash = ? AND model = ?",
+                (content_hash, template_hash, model or ""),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, content_hash, template_hash, model, datos):
+        """
+        Guarda el resultado de un artículo
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (
+                    content_hash,
+                    template_hash,
+                    model or "",
+                    json.dumps(datos, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def invalidate(self, model=None, template_hash=None):
+        """
+        Borra resultados del caché
+
+        Args:
+            model (str): Borrar solo los de este modelo
+            template_hash (str): Borrar solo los de esta plantilla
+
+        Returns:
+            int: Número de resultados borrados
+        """
+        conditions, params = [], []
+        if model is not None:
+            conditions.append("model = ?")
+            params.append(model)
+        if template_hash is not None:
+            conditions.append("template_hash = ?")
+            params.append(template_hash)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            deleted = self._db.execute(f"DELETE FROM results{where}", params).rowcount
+            self._db.commit()
+        return deleted
+
+    def summary(self):
+        """
+        Returns:
+            dict: Resultados guardados por modelo
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT model, COUNT(*) FROM results GROUP BY model"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the LLM cache.")
+    parser.add_argument("--path", type=str, default=DEFAULT_PATH, help="Cache file")
+    parser.add_argument("--stats", action="store_true", help="Show cached results")
+    parser.add_argument("--clear", action="store_true", help="Delete cached results")
+    parser.add_argument("--model", type=str, default=None, help="Only this model")
+    parser.add_argument(
+        "--template", type=str, default=None, help="Only results for this template file"
+    )
+    args = parser.parse_args()
+
+    cache = LLMResultCache(args.path)
+    if args.clear:
+        template_hash = None
+        if args.template:
+            with open(args.template, "r", encoding="utf-8") as f:
+                template_hash = content_hash(f.read())
+        deleted = cache.invalidate(model=args.model, template_hash=template_hash)
+        print(f"{deleted} resultados borrados de {args.path}")
+    if args.stats or not args.clear:
+        summary = cache.summary()
+        print(f"{sum(summary.values())} resultados en {args.path}")
+        for model, count in summary.items():
+            print(f"  {model}: {count}")
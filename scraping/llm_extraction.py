@@ -0,0 +1,637 @@
+"""
+Motor de extracción concurrente con el LLM para convertir artículos en JSON.
+
+`ConcurrentExtractor` tiene la misma interfaz que `CreateJson` (constructor y
+`run_pipeline`) y produce el mismo JSON anidado año -> mes, pero mantiene
+varias peticiones en vuelo, limita el ritmo con una cubeta de tokens en lugar
+de dormir un tiempo fijo entre artículos, reintenta con backoff exponencial y
+jitter, y opcionalmente envía varios artículos en un mismo prompt. Con un
+`LLMResultCache` solo se envían al LLM los artículos que no se extrajeron
+antes con la misma plantilla y el mismo modelo.
+
+`CachedExtractor` aplica el mismo caché a un extractor que no lo consulta
+por sí mismo (CreateJson): le pasa solo los artículos sin resultado guardado
+y guarda lo que devuelve.
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from processing.records import parse_article_date
+from scraping.llm_cache import content_hash
+from scraping.rate_limit import TokenBucket
+
+logger = logging.getLogger("llm_extraction")
+
+MESES = [
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+]
+
+OUTPUT_FILE = "datos_electricos_organizados.json"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+SYSTEM_PROMPT = (
+    "Eres un asistente que extrae información estructurada de los reportes de "
+    "la Unión Eléctrica (UNE) de Cuba. Responde únicamente con JSON válido, sin "
+    "texto adicional."
+)
+
+
+def find_output_json(output_dir):
+    """
+    JSON anidado que dejó un extractor en su directorio de salida
+
+    ConcurrentExtractor y RuleFirstExtractor lo guardan como OUTPUT_FILE, pero
+    CreateJson elige su propio nombre: si OUTPUT_FILE no está se usa el
+    primer `*.json` del directorio.
+
+    Args:
+        output_dir (str): Directorio de salida del extractor
+
+    Returns:
+        str: Ruta del JSON o None si no hay ninguno
+    """
+    path = os.path.join(output_dir, OUTPUT_FILE)
+    if os.path.exists(path):
+        return path
+    if not os.path.isdir(output_dir):
+        return None
+    json_files = sorted(f for f in os.listdir(output_dir) if f.endswith(".json"))
+    if not json_files:
+        return None
+    logger.info(f"Se utilizará el archivo: {json_files[0]}")
+    return os.path.join(output_dir, json_files[0])
+
+
+def build_prompt(template, articles):
+    """
+    Construye el mensaje de usuario para uno o varios artículos
+
+    Args:
+        template (str): Plantilla JSON que debe completar el modelo
+        articles (list): Filas con `Título` y `Contenido`
+
+    Returns:
+        str: Texto del prompt
+    """
+    if len(articles) == 1:
+        article = articles[0]
+        return (
+            "Completa la siguiente plantilla JSON con la información del artículo. "
+            "Usa null para los datos que no aparezcan.\n\n"
+            f"Plantilla:\n{template}\n\n"
+            f"Artículo:\n{article['Título']}\n{article['Contenido']}"
+        )
+
+    parts = [
+        f"Completa la siguiente plantilla JSON para cada uno de los {len(articles)} "
+        "artículos. Usa null para los datos que no aparezcan. Responde con una "
+        f"lista JSON de {len(articles)} objetos, en el mismo orden que los artículos.\n\n"
+        f"Plantilla:\n{template}\n"
+    ]
+    for i, article in enumerate(articles, 1):
+        parts.append(f"\nArtículo {i}:\n{article['Título']}\n{article['Contenido']}\n")
+    return "".join(parts)
+
+
+def parse_json_response(text):
+    """
+    Extrae el JSON de la respuesta del modelo, tolerando bloques ```json
+
+    Args:
+        text (str): Contenido de la respuesta
+
+    Returns:
+        dict | list: JSON decodificado
+
+    Raises:
+        ValueError: Si la respuesta no contiene JSON válido
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if starts and end > min(starts):
+        try:
+            return json.loads(text[min(starts) : end + 1])
+        except json.JSONDecodeError:
+            pass
+    raise ValueError(f"La respuesta no contiene JSON válido: {text[:200]!r}")
+
+
+def organize_records(articles, extracted, a, b):
+    """
+    Agrupa los resultados en el JSON anidado año -> mes
+
+    Args:
+        articles (list): Filas del CSV
+        extracted (list): Datos extraídos para cada fila (None si falló)
+        a (int): Primer año
+        b (int): Último año
+
+    Returns:
+        dict: {año: {mes: [registros]}}
+    """
+    data = {str(year): {mes: [] for mes in MESES} for year in range(a, b + 1)}
+    for article, datos in zip(articles, extracted):
+        if datos is None:
+            continue
+        fecha = parse_article_date(article.get("Fecha"))
+        if fecha is None or str(fecha.year) not in data:
+            logger.warning(f"Artículo fuera del rango {a}-{b}: {article.get('Enlace')}")
+            continue
+        data[str(fecha.year)][MESES[fecha.month - 1]].append(
+            {
+                "enlace": article.get("Enlace"),
+                "fecha": fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                "datos": datos,
+            }
+        )
+    return data
+
+
+class ChatCompletionClient:
+    """
+    Cliente para un endpoint de chat-completions compatible con OpenAI
+    (Fireworks), seguro para usarse desde varios hilos.
+    """
+
+    def __init__(
+        self,
+        url,
+        api_key,
+        model,
+        rate_limiter=None,
+        max_retries=5,
+        backoff_factor=1.0,
+        max_backoff=60.0,
+        timeout=120,
+        max_tokens=4096,
+        temperature=0,
+        pool_size=10,
+    ):
+        """
+        Args:
+            url (str): URL del endpoint de chat-completions
+            api_key (str): API key del proveedor
+            model (str): Modelo a utilizar
+            rate_limiter (TokenBucket): Limitador del ritmo de peticiones
+            max_retries (int): Reintentos máximos por petición
+            backoff_factor (float): Espera base del backoff exponencial
+            max_backoff (float): Espera máxima entre reintentos
+            timeout (float): Timeout de cada petición en segundos
+            max_tokens (int): Tokens máximos de la respuesta
+            temperature (float): Temperatura de muestreo
+            pool_size (int): Conexiones que se mantienen abiertas
+        """
+        self.url = url
+        self.model = model
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # Full jitter: evita que los hilos reintenten todos a la vez
+        return random.uniform(0, min(self.backoff_factor * (2**attempt), self.max_backoff))
+
+    def complete(self, messages):
+        """
+        Envía una conversación y devuelve el texto de la respuesta
+
+        Args:
+            messages (list): Mensajes en formato {"role", "content"}
+
+        Returns:
+            str: Contenido del primer mensaje de la respuesta
+
+        Raises:
+            requests.RequestException: Si la petición falla tras agotar los reintentos
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self._count(requests=1)
+            response = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    body = response.json()
+                    usage = body.get("usage") or {}
+                    self._count(
+                        prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0),
+                    )
+                    return body["choices"][0]["message"]["content"]
+                reason = f"respuesta {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = str(e)
+            except requests.RequestException:
+                self._count(errors=1)
+                raise
+
+            if attempt >= self.max_retries:
+                self._count(errors=1)
+                if response is not None:
+                    response.raise_for_status()
+                raise requests.ConnectionError(f"Sin respuesta del LLM: {reason}")
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"LLM: {reason}. Reintentando en {delay:.1f}s")
+            self._count(retries=1)
+            attempt += 1
+            time.sleep(delay)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Copia de los contadores actuales
+        """
+        with self._lock:
+            return dict(self.stats)
+
+
+class ConcurrentExtractor:
+    """
+    Extrae los datos de los artículos de un CSV con varias peticiones al LLM en
+    paralelo y los organiza por año y mes.
+    """
+
+    def __init__(
+        self,
+        path_df,
+        path_template,
+        url_llm,
+        apikey,
+        model,
+        a,
+        b,
+        max_in_flight=4,
+        requests_per_second=1.0,
+        burst=None,
+        batch_size=1,
+        max_retries=5,
+        cache=None,
+        rate_limiter=None,
+    ):
+        """
+        Args:
+            path_df (str): CSV con los artículos a procesar
+            path_template (str): Plantilla JSON que debe completar el modelo
+            url_llm (str): URL del endpoint de chat-completions
+            apikey (str): API key del proveedor
+            model (str): Modelo a utilizar
+            a (int): Primer año del JSON de salida
+            b (int): Último año del JSON de salida
+            max_in_flight (int): Peticiones simultáneas al LLM
+            requests_per_second (float): Ritmo sostenido de peticiones al LLM
+            burst (int): Ráfaga máxima de peticiones (por defecto max_in_flight)
+            batch_size (int): Artículos por prompt
+            max_retries (int): Reintentos por petición
+            cache (LLMResultCache): Caché de resultados (opcional)
+            rate_limiter (TokenBucket): Cubeta compartida con otros extractores
+                (reemplaza a requests_per_second y burst)
+        """
+        self.df = pd.read_csv(path_df, encoding="utf-8-sig")
+        with open(path_template, "r", encoding="utf-8") as f:
+            self.template = f.read()
+        self.template_hash = content_hash(self.template)
+        self.model = model
+        self.cache = cache
+        self.a = a
+        self.b = b
+        self.max_in_flight = max_in_flight
+        self.batch_size = max(1, batch_size)
+        self.client = ChatCompletionClient(
+            url_llm,
+            apikey,
+            model,
+            rate_limiter=rate_limiter
+            or TokenBucket(requests_per_second, burst or max_in_flight),
+            max_retries=max_retries,
+            pool_size=max_in_flight,
+        )
+
+    def _ask(self, articles):
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(self.template, articles)},
+        ]
+        return parse_json_response(self.client.complete(messages))
+
+    def _extract_batch(self, articles):
+        """
+        Extrae un lote de artículos; si la respuesta del lote no es válida se
+        reintenta artículo a artículo
+
+        Returns:
+            list: Datos extraídos (dict o None) en el orden de `articles`
+        """
+        if len(articles) > 1:
+            try:
+                result = self._ask(articles)
+                if isinstance(result, list) and len(result) == len(articles):
+                    return [r if isinstance(r, dict) else None for r in result]
+                logger.warning("Respuesta de lote inválida, se procesa artículo a artículo")
+            except Exception as e:
+                logger.warning(f"Error en lote ({e}), se procesa artículo a artículo")
+
+        results = []
+        for article in articles:
+            try:
+                result = self._ask([article])
+                results.append(result if isinstance(result, dict) else None)
+            except Exception as e:
+                logger.error(f"Error extrayendo {article.get('Enlace')}: {e}")
+                results.append(None)
+        return results
+
+    def extract(self, articles):
+        """
+        Extrae los datos de una lista de artículos
+
+        Args:
+            articles (list): Filas del CSV como dicts
+
+        Returns:
+            list: Datos extraídos (dict o None) en el mismo orden que `articles`
+        """
+        extracted = [None] * len(articles)
+        keys = [content_hash(article.get("Contenido")) for article in articles]
+        pending = []
+        for i, key in enumerate(keys):
+            if self.cache is not None:
+                extracted[i] = self.cache.get(key, self.template_hash, self.model)
+            if extracted[i] is None:
+                pending.append(i)
+
+        batches = [
+            pending[i : i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            results = executor.map(
+                lambda batch: self._extract_batch([articles[i] for i in batch]),
+                batches,
+            )
+            for batch, batch_results in zip(batches, results):
+                for i, datos in zip(batch, batch_results):
+                    extracted[i] = datos
+                    if datos is not None and self.cache is not None:
+                        self.cache.put(keys[i], self.template_hash, self.model, datos)
+        return extracted
+
+    def organize(self, articles, extracted):
+        """
+        Agrupa los resultados en el JSON anidado año -> mes
+
+        Args:
+            articles (list): Filas del CSV
+            extracted (list): Datos extraídos para cada fila
+
+        Returns:
+            dict: {año: {mes: [registros]}}
+        """
+        return organize_records(articles, extracted, self.a, self.b)
+
+    def run_pipeline(self, delay=None, output_dir="data/processed", save_individual=False):
+        """
+        Procesa todos los artículos del CSV y guarda el JSON organizado
+
+        Args:
+            delay (float): Se acepta por compatibilidad con CreateJson; el ritmo
+                de peticiones lo marca la cubeta de tokens
+            output_dir (str): Directorio donde se guarda el JSON
+            save_individual (bool): Guardar además un JSON por artículo
+
+        Returns:
+            int: 0 si el proceso terminó correctamente, 1 en caso contrario
+        """
+        articles = self.df.where(pd.notna(self.df), None).to_dict("records")
+        logger.info(
+            f"Extrayendo {len(articles)} artículos con {self.max_in_flight} peticiones "
+            f"simultáneas y lotes de {self.batch_size}"
+        )
+        start = time.perf_counter()
+        if self.cache is not None:
+            hits_before, misses_before = self.cache.hits, self.cache.misses
+        try:
+            extracted = self.extract(articles)
+        except Exception as e:
+            logger.error(f"Error durante la extracción: {e}")
+            return 1
+
+        failed = sum(datos is None for datos in extracted)
+        stats = self.client.snapshot()
+        logger.info(
+            f"Extracción terminada en {time.perf_counter() - start:.1f}s: "
+            f"{len(articles) - failed} correctos, {failed} fallidos, "
+            f"{stats['requests']} peticiones, {stats['retries']} reintentos, "
+            f"{stats['prompt_tokens'] + stats['completion_tokens']} tokens"
+        )
+        if self.cache is not None:
+            hits = self.cache.hits - hits_before
+            misses = self.cache.misses - misses_before
+            logger.info(
+                f"Caché LLM: {hits} aciertos, {misses} fallos "
+                f"({hits / max(hits + misses, 1):.0%} de aciertos)"
+            )
+        if articles and failed == len(articles):
+            return 1
+
+        os.makedirs(output_dir, exist_ok=True)
+        if save_individual:
+            individual_dir = os.path.join(output_dir, "individual")
+            os.makedirs(individual_dir, exist_ok=True)
+            for i, (article, datos) in enumerate(zip(articles, extracted)):
+                if datos is None:
+                    continue
+                with open(
+                    os.path.join(individual_dir, f"articulo_{i}.json"), "w", encoding="utf-8"
+                ) as f:
+                    json.dump(
+                        {"enlace": article.get("Enlace"), "datos": datos},
+                        f,
+                        ensure_ascii=False,
+                        indent=2,
+                    )
+
+        with open(os.path.join(output_dir, OUTPUT_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.organize(articles, extracted), f, ensure_ascii=False, indent=2)
+        return 0
+
+
+class CachedExtractor:
+    """
+    Extractor con la interfaz de CreateJson (`run_pipeline`) que consulta el
+    caché de resultados del LLM antes de delegar en otro extractor.
+    """
+
+    def __init__(self, path_df, make_extractor, cache, path_template, model, a, b):
+        """
+        Args:
+            path_df (str): CSV con los artículos a procesar
+            make_extractor (callable): Recibe la ruta de un CSV y devuelve el
+                extractor LLM (CreateJson)
+            cache (LLMResultCache): Caché de resultados
+            path_template (str): Plantilla JSON del extractor (parte de la clave)
+            model (str): Modelo del extractor (parte de la clave)
+            a (int): Primer año del JSON de salida
+            b (int): Último año del JSON de salida
+        """
+        self.df = pd.read_csv(path_df, encoding="utf-8-sig")
+        self.make_extractor = make_extractor
+        self.cache = cache
+        with open(path_template, "r", encoding="utf-8") as f:
+            self.template_hash = content_hash(f.read())
+        self.model = model
+        self.a = a
+        self.b = b
+        self.llm_extractor = None
+
+    @property
+    def client(self):
+        return getattr(self.llm_extractor, "client", None)
+
+    def _extract_pending(self, articles, delay, output_dir, save_individual):
+        """
+        Extrae con el extractor delegado los artículos sin resultado guardado
+
+        Returns:
+            tuple: (código del extractor, {enlace: datos})
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="llm_", dir=output_dir)
+        try:
+            csv_path = os.path.join(work_dir, "articulos_llm.csv")
+            pd.DataFrame(articles).to_csv(csv_path, index=False, encoding="utf-8-sig")
+            self.llm_extractor = self.make_extractor(csv_path)
+            status = self.llm_extractor.run_pipeline(
+                delay=delay, output_dir=work_dir, save_individual=save_individual
+            )
+            json_path = find_output_json(work_dir)
+            if status != 0 or json_path is None:
+                return status or 1, {}
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return 0, {
+                record.get("enlace"): record.get("datos")
+                for months in data.values()
+                for records in months.values()
+                for record in records
+                if isinstance(record, dict)
+            }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def run_pipeline(
+        self, delay=None, output_dir="data/processed", save_individual=False
+    ):
+        """
+        Procesa el CSV y guarda el JSON organizado año -> mes
+
+        Args:
+            delay (float): Se pasa al extractor delegado
+            output_dir (str): Directorio donde se guarda el JSON
+            save_individual (bool): Se pasa al extractor delegado
+
+        Returns:
+            int: 0 si se guardó el JSON, el código del extractor delegado si falló
+        """
+        articles = self.df.where(pd.notna(self.df), None).to_dict("records")
+        keys = [content_hash(article.get("Contenido")) for article in articles]
+        extracted = [
+            self.cache.get(key, self.template_hash, self.model) for key in keys
+        ]
+        pending = [i for i, datos in enumerate(extracted) if datos is None]
+        logger.info(
+            f"Caché LLM: {len(articles) - len(pending)} de {len(articles)} artículos "
+            "ya extraídos"
+        )
+
+        if pending:
+            status, found = self._extract_pending(
+                [articles[i] for i in pending], delay, output_dir, save_individual
+            )
+            if status != 0:
+                logger.error(f"El extractor LLM falló con {len(pending)} artículos")
+                return status
+            for i in pending:
+                datos = found.get(articles[i].get("Enlace"))
+                if isinstance(datos, dict):
+                    extracted[i] = datos
+                    self.cache.put(keys[i], self.template_hash, self.model, datos)
+        if articles and all(datos is None for datos in extracted):
+            return 1
+
+        os.makedirs(output_dir, exist_ok=True)
+        data = organize_records(articles, extracted, self.a, self.b)
+        with open(os.path.join(output_dir, OUTPUT_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return 0
@@ -0,0 +1,265 @@
+"""
+Métricas por etapa de una ejecución del pipeline.
+
+Cada etapa (`with metrics.stage("crawl") as stage:`) registra su tiempo de
+reloj, los elementos procesados (`stage.items`) y la diferencia de los
+contadores de las fuentes registradas entre el inicio y el fin de la etapa:
+bytes y reintentos del cliente HTTP, tokens y reintentos del LLM. Las tareas
+que corren en varios hilos a la vez (descarga de páginas y artículos) se
+acumulan aparte con `observe`: cantidad, tiempo total y máximo.
+
+Al terminar, `write` guarda un JSON por ejecución y reescribe un archivo de
+texto en formato Prometheus (para el textfile collector de node_exporter).
+Con `profile_stage` la etapa elegida corre bajo cProfile y sus estadísticas
+se guardan en un `.pstats` junto a las métricas:
+
+    python -m pstats data/metrics/profile_extraction_20250509_070000.pstats
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger("metrics")
+
+PROMETHEUS_FILE = "pipeline.prom"
+
+
+class Stage:
+    """
+    Resultado de una etapa; `items` lo completa el código de la etapa.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.wall_s = 0.0
+        self.counters = {}
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "wall_s": round(self.wall_s, 4),
+            "items": self.items,
+            "items_per_s": round(self.items / self.wall_s, 3) if self.wall_s else 0.0,
+            **self.counters,
+        }
+
+
+def _delta(before, after):
+    return {
+        key: value - before.get(key, 0)
+        for key, value in after.items()
+        if isinstance(value, (int, float)) and value != before.get(key, 0)
+    }
+
+
+class RunMetrics:
+    """
+    Métricas de una ejecución: etapas secuenciales, tiempos acumulados de
+    tareas concurrentes y contadores de las fuentes registradas.
+    """
+
+    def __init__(self, output_dir=None, profile_stage=None, run_name="pipeline"):
+        """
+        Args:
+            output_dir (str): Directorio de los JSON, el archivo Prometheus y
+                los perfiles (None para no escribir nada)
+            profile_stage (str): Etapa que se perfila con cProfile (opcional)
+            run_name (str): Prefijo de los archivos y de las métricas
+        """
+        self.output_dir = output_dir
+        self.profile_stage = profile_stage
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.sources = {}
+        self.stages = []
+        self.timers = {}
+        self._lock = threading.Lock()
+
+    def add_source(self, name, snapshot):
+        """
+        Registra una fuente de contadores para todas las etapas
+
+        Args:
+            name (str): Prefijo de sus contadores ("http", "llm")
+            snapshot (callable): Devuelve un dict con los contadores actuales
+        """
+        self.sources[name] = snapshot
+
+    def _snapshot(self, sources):
+        values = {}
+        for name, snapshot in sources.items():
+            try:
+                values[name] = snapshot()
+            except Exception as e:
+                logger.debug(f"No se pudieron leer los contadores de {name}: {e}")
+                values[name] = {}
+        return values
+
+    @contextmanager
+    def stage(self, name, sources=None):
+        """
+        Mide una etapa del pipeline
+
+        Args:
+            name (str): Nombre de la etapa
+            sources (dict): Fuentes de contadores solo para esta etapa
+
+        Yields:
+            Stage: Resultado de la etapa, para completar `items`
+        """
+        sources = {**self.sources, **(sources or {})}
+        result = Stage(name)
+        before = self._snapshot(sources)
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield result
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            result.wall_s = time.perf_counter() - start
+            after = self._snapshot(sources)
+            for source, values in after.items():
+                for key, value in _delta(before[source], values).items():
+                    result.counters[f"{source}_{key}"] = value
+            with self._lock:
+                self.stages.append(result)
+            if profiler is not None:
+                self._dump_profile(name, profiler)
+            logger.info(
+                f"Etapa {name}: {result.wall_s:.2f}s, {result.items} elementos"
+            )
+
+    def observe(self, name, seconds):
+        """
+        Acumula la duración de una tarea que puede correr en paralelo con otras
+
+        Args:
+            name (str): Nombre de la tarea ("article", "listing_page")
+            seconds (float): Duración de esta ejecución
+        """
+        with self._lock:
+            timer = self.timers.setdefault(
+                name, {"count": 0, "total_s": 0.0, "max_s": 0.0}
+            )
+            timer["count"] += 1
+            timer["total_s"] += seconds
+            timer["max_s"] = max(timer["max_s"], seconds)
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def _dump_profile(self, name, profiler):
+        if self.output_dir is None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, f"profile_{name}_{stamp}.pstats")
+        profiler.dump_stats(path)
+        logger.info(f"Perfil de la etapa {name} guardado en {path}")
+
+    def report(self, status=None):
+        """
+        Args:
+            status (str): Resultado de la ejecución ("ok", "sin_novedades", "error")
+
+        Returns:
+            dict: Métricas de la ejecución
+        """
+        with self._lock:
+            timers = {
+                name: {
+                    "count": t["count"],
+                    "total_s": round(t["total_s"], 4),
+                    "mean_s": round(t["total_s"] / t["count"], 4),
+                    "max_s": round(t["max_s"], 4),
+                }
+                for name, t in self.timers.items()
+            }
+            stages = [stage.to_dict() for stage in self.stages]
+        return {
+            "run": self.run_name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._start, 4),
+            "status": status,
+            "stages": stages,
+            "tasks": timers,
+        }
+
+    def prometheus(self, report):
+        """
+        Args:
+            report (dict): Resultado de `report`
+
+        Returns:
+            str: Métricas en el formato de texto de Prometheus
+        """
+        prefix = self.run_name
+        lines = [
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {self.started_at.timestamp():.0f}",
+            f"# TYPE {prefix}_last_run_duration_seconds gauge",
+            f"{prefix}_last_run_duration_seconds {report['wall_s']}",
+            f"# TYPE {prefix}_last_run_success gauge",
+            f"{prefix}_last_run_success {int(report['status'] != 'error')}",
+        ]
+        samples = {}
+        for stage in report["stages"]:
+            for key, value in stage.items():
+                if key != "stage":
+                    samples.setdefault(key, []).append((stage["stage"], value))
+        for key, values in samples.items():
+            metric = f"{prefix}_stage_{key}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(
+                f'{metric}{{stage="{name}"}} {value}' for name, value in values
+            )
+        for key in ("count", "total_s", "max_s"):
+            metric = f"{prefix}_task_{key}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(
+                f'{metric}{{task="{name}"}} {timer[key]}'
+                for name, timer in report["tasks"].items()
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, status=None):
+        """
+        Guarda el JSON de la ejecución y reescribe el archivo Prometheus
+
+        Args:
+            status (str): Resultado de la ejecución
+
+        Returns:
+            dict: Métricas de la ejecución
+        """
+        report = self.report(status)
+        if self.output_dir is None:
+            return report
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(self.output_dir, f"{self.run_name}_{stamp}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        prom_path = os.path.join(self.output_dir, PROMETHEUS_FILE)
+        tmp_path = f"{prom_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(report))
+        os.replace(tmp_path, prom_path)
+        logger.info(f"Métricas de la ejecución guardadas en {json_path}")
+        return report
@@ -0,0 +1,208 @@
+"""
+Backends de parseo HTML para las páginas de Cubadebate.
+
+`SoupParser` es la implementación original con BeautifulSoup y sirve de
+respaldo. `LxmlParser` extrae directamente con XPath sobre el árbol de lxml,
+sin construir el árbol de objetos Python de BeautifulSoup, y es bastante más
+rápido. Ambos devuelven exactamente los mismos campos.
+"""
+import threading
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml es opcional
+    lxml = None
+
+# Elementos que se eliminan del cuerpo del artículo antes de extraer el texto
+REMOVED_TAGS = ["script", "style", "iframe", "ins", "header", "footer", "nav"]
+
+
+class SoupParser:
+    """
+    Parser basado en BeautifulSoup con `html.parser`.
+    """
+
+    name = "soup"
+
+    def parse_listing(self, html):
+        """
+        Extrae los artículos de una página del listado
+
+        Args:
+            html (str): HTML de la página
+
+        Returns:
+            list: Pares (título, enlace) en el orden de la página
+        """
+        soup = BeautifulSoup(html, "html.parser")
+        entries = []
+        for article in soup.find_all("div", class_=["bigimage_post", "image_post"]):
+            title_div = article.find("div", class_="title")
+            entries.append((title_div.get_text(strip=True), title_div.a["href"]))
+        return entries
+
+    def parse_article(self, html):
+        """
+        Extrae los campos de un artículo
+
+        Args:
+            html (str): HTML del artículo
+
+        Returns:
+            dict: Título, fecha, contenido, etiquetas y número de comentarios
+        """
+        soup = BeautifulSoup(html, "html.parser")
+
+        title_tag = soup.find("h2", class_="title")
+        title = title_tag.get_text(strip=True) if title_tag else "No título"
+
+        time_tag = soup.find("time")
+        date = time_tag.get("datetime") if time_tag else "No fecha"
+
+        content_div = soup.find("div", class_="note_content")
+        if content_div:
+            for element in content_div(REMOVED_TAGS):
+                element.decompose()
+            content = " ".join(content_div.stripped_strings)
+        else:
+            content = "No se pudo extraer contenido"
+
+        tags = []
+        taxonomies = soup.find("div", id="taxonomies")
+        if taxonomies:
+            tags = [a.get_text(strip=True) for a in taxonomies.find_all("a")]
+
+        comment_count = soup.find("span", class_="comment_count")
+        num_comments = comment_count.get_text(strip=True) if comment_count else "0"
+
+        return {
+            "title": title,
+            "date": date,
+            "content": content,
+            "tags": tags,
+            "num_comments": num_comments,
+        }
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _strip_join(strings, separator):
+    return separator.join(s.strip() for s in strings if s.strip())
+
+
+class LxmlParser:
+    """
+    Parser basado en lxml que consulta solo los nodos necesarios con XPath.
+    """
+
+    name = "lxml"
+
+    _LISTING = f"//div[{_has_class('bigimage_post')} or {_has_class('image_post')}]"
+    _LISTING_TITLE = f".//div[{_has_class('title')}]"
+    _TITLE = f"//h2[{_has_class('title')}]"
+    _CONTENT = f"//div[{_has_class('note_content')}]"
+    _REMOVED = ".//" + " | .//".join(REMOVED_TAGS)
+    _COMMENTS = f"//span[{_has_class('comment_count')}]"
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError("LxmlParser necesita el paquete lxml")
+        # Los parsers de lxml no deben compartirse entre hilos
+        self._local = threading.local()
+
+    def _document(self, html):
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = lxml.html.HTMLParser(encoding="utf-8")
+        # lxml no acepta str con declaración de codificación, se le pasan bytes
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        return lxml.html.fromstring(html, parser=parser)
+
+    def parse_listing(self, html):
+        """
+        Extrae los artículos de una página del listado
+
+        Args:
+            html (str): HTML de la página
+
+        Returns:
+            list: Pares (título, enlace) en el orden de la página
+        """
+        entries = []
+        for article in self._document(html).xpath(self._LISTING):
+            title_div = article.xpath(self._LISTING_TITLE)[0]
+            link = title_div.xpath(".//a")[0]
+            entries.append((_strip_join(title_div.itertext(), ""), link.get("href")))
+        return entries
+
+    def parse_article(self, html):
+        """
+        Extrae los campos de un artículo
+
+        Args:
+            html (str): HTML del artículo
+
+        Returns:
+            dict: Título, fecha, contenido, etiquetas y número de comentarios
+        """
+        doc = self._document(html)
+
+        title_tag = doc.xpath(self._TITLE)
+        title = _strip_join(title_tag[0].itertext(), "") if title_tag else "No título"
+
+        time_tag = doc.xpath("//time")
+        date = time_tag[0].get("datetime") if time_tag else "No fecha"
+
+        content_div = doc.xpath(self._CONTENT)
+        if content_div:
+            content_div = content_div[0]
+            for element in content_div.xpath(self._REMOVED):
+                element.drop_tree()
+            content = _strip_join(content_div.itertext(), " ")
+        else:
+            content = "No se pudo extraer contenido"
+
+        taxonomies = doc.xpath("//div[@id='taxonomies']")
+        tags = (
+            [_strip_join(a.itertext(), "") for a in taxonomies[0].xpath(".//a")]
+            if taxonomies
+            else []
+        )
+
+        comment_count = doc.xpath(self._COMMENTS)
+        num_comments = (
+            _strip_join(comment_count[0].itertext(), "") if comment_count else "0"
+        )
+
+        return {
+            "title": title,
+            "date": date,
+            "content": content,
+            "tags": tags,
+            "num_comments": num_comments,
+        }
+
+
+PARSERS = {"soup": SoupParser, "lxml": LxmlParser}
+
+
+def get_parser(name="auto"):
+    """
+    Crea el parser indicado
+
+    Args:
+        name (str): "soup", "lxml" o "auto" (lxml si está instalado, si no soup)
+
+    Returns:
+        SoupParser | LxmlParser: Instancia del parser
+    """
+    if name == "auto":
+        name = "lxml" if lxml is not None else "soup"
+    if name not in PARSERS:
+        raise ValueError(f"Parser desconocido: {name}")
+    return PARSERS[name]()
@@ -0,0 +1,86 @@
+"""
+Limitadores de tasa para las peticiones que hace el pipeline.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    """
+    Limita el número de peticiones por segundo hacia cada host.
+
+    Es seguro usarlo desde varios hilos: cada llamada a `wait` reserva el
+    siguiente hueco libre del host y duerme hasta que llegue su turno.
+    """
+
+    def __init__(self, requests_per_second=None):
+        """
+        Args:
+            requests_per_second (float): Peticiones por segundo permitidas por host.
+                None o 0 desactiva el límite.
+        """
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """
+        Bloquea hasta que se pueda hacer una petición a la URL indicada
+
+        Args:
+            url (str): URL de la petición que se va a realizar
+        """
+        if not self.min_interval:
+            return
+
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TokenBucket:
+    """
+    Cubeta de tokens: permite ráfagas de hasta `capacity` peticiones y
+    después un ritmo sostenido de `rate` peticiones por segundo.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Args:
+            rate (float): Tokens que se reponen por segundo
+            capacity (int): Tokens máximos acumulados (tamaño de la ráfaga)
+        """
+        if rate <= 0:
+            raise ValueError("rate tiene que ser mayor que 0")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Bloquea hasta poder consumir `tokens` de la cubeta
+
+        Args:
+            tokens (int): Tokens a consumir
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
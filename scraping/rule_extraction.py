@@ -0,0 +1,415 @@
+"""
+Extracción por reglas de los reportes de la UNE, antes del LLM.
+
+Los partes de la Unión Eléctrica repiten casi siempre las mismas frases ("se
+estima para la hora pico una disponibilidad de X MW y una demanda máxima de
+Y MW, para un déficit de Z MW", "La disponibilidad del SEN a las 07:00 horas
+era de X MW y la demanda Y MW", ...). `extract_report` separa el contenido en
+oraciones, reconoce la del pronóstico, la del estado a las 7:00, la de la
+máxima afectación del día, las listas de averías y mantenimientos, etc., y
+llena la misma estructura que la plantilla del LLM. Las expresiones regulares
+se compilan una sola vez al importar el módulo.
+
+La confianza (0 a 1) es la fracción de los seis campos principales que se
+encontraron (disponibilidad, demanda, déficit y afectación pronosticados,
+disponibilidad y demanda a las 7:00), penalizada si el déficit no cuadra con
+demanda - disponibilidad o si hay una lista de averías o mantenimientos que no
+se pudo separar por planta.
+
+`RuleFirstExtractor` envuelve a CreateJson o ConcurrentExtractor: los
+artículos con confianza suficiente se resuelven aquí y solo el resto se
+envía al LLM.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+
+from processing.records import empty_report
+from scraping.llm_extraction import OUTPUT_FILE, find_output_json, organize_records
+
+logger = logging.getLogger("rule_extraction")
+
+DEFAULT_THRESHOLD = 0.8
+
+# "1 020", "1 020" (espacio duro), "1,020", "1.020" o "1020", seguido de la unidad
+N = r"(\d{1,3}(?:[  .,]\d{3})+(?!\d)|\d+)"
+MW = rf"{N}\s*(?:MW|megawatts?)\b"
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.;])\s+(?=[A-ZÁÉÍÓÚÑ(])")
+_MW = re.compile(MW, re.IGNORECASE)
+_HOUR = re.compile(
+    r"\b(?:a|hasta|desde) las\s+"
+    r"(\d{1,2}(?::\d{2})?\s*(?:a\.\s*m\.|p\.\s*m\.|am|pm|horas)?)",
+    re.IGNORECASE,
+)
+_FORECAST_WORDS = re.compile(r"estima|pronostic|prevé|generaría", re.IGNORECASE)
+_MORNING_HOUR = re.compile(
+    r"^0?[6-8](?::\d{2})?\s*(?:a\.\s*m\.|am|horas)?$", re.IGNORECASE
+)
+_DEMAND = re.compile(rf"demanda(?: máxima)?,?[^\d.]{{0,40}}?{MW}", re.IGNORECASE)
+_DEFICIT = re.compile(rf"déficit[^\d.]{{0,30}}?{MW}", re.IGNORECASE)
+_AFFECTATION = re.compile(rf"afectaci[oó]n[^\d.]{{0,60}}?{MW}", re.IGNORECASE)
+_MIDDAY = re.compile(r"mediodía|horario de la media|horario diurno", re.IGNORECASE)
+_PEAK = re.compile(
+    rf"(?:máxima afectación|afectación máxima)[^\d]{{0,120}}?{MW}"
+    r"(?:[^.]{0,20}?a las\s+(\d{1,2}:\d{2}(?:\s*[ap]\.\s*m\.|\s*horas)?))?",
+    re.IGNORECASE,
+)
+_THERMAL = re.compile(
+    rf"limitaci[oó]n(?:es)?[^.]*?térmic[^\d]{{0,40}}{MW}", re.IGNORECASE
+)
+_DISTRIBUTED = re.compile(
+    rf"(?:{N}\s+)?(?:centrales|motores) de (?:la )?generación distribuida"
+    rf"[^\d]{{0,40}}?{MW}"
+    rf"|generación distribuida[^.]*?indisponibles por avería {MW}",
+    re.IGNORECASE,
+)
+_TOTAL = re.compile(rf"total de {MW}", re.IGNORECASE)
+
+# Inicio de una lista de unidades: "en avería la unidad 5 de la CTE Mariel, ...";
+# no "avería en la red de distribución" ni "avería en el condensador"
+_LIST_START = (
+    r"\s*[:,]?\s*(?:(?:se encuentra(?:n)?|est[aá]n?)\s*:?\s+)?(?:de\s+|en\s+)?[–-]?\s*"
+    r"(?=(?:(?:la|las|el|los)\s+)?(?:unidad|unidades|planta|CTE|termoeléctricas?|\d)\b)"
+)
+_BREAKDOWN = re.compile(rf"aver[ií]as?{_LIST_START}", re.IGNORECASE)
+_MAINTENANCE = re.compile(rf"mantenimientos?{_LIST_START}", re.IGNORECASE)
+# Fin de la lista: punto final (no el de "Carlos M. de Céspedes" ni el que
+# separa elementos, "... CTE Felton. Unidad 3 de la CTE Renté"), ";" que no
+# separa unidades ("las unidades: 8 de la CTE Mariel; 4 de la CTE ...") o la
+# mención de la otra lista ("... y el mantenimiento de ...")
+_LIST_END = re.compile(
+    r"\.(?=\s+(?-i:(?!Unidad)[A-ZÁÉÍÓÚÑ(])|\s*$)|;(?!\s*\d)"
+    r"|(?:,|\s+y)?\s+(?:[\wáéíóú]+\s+){0,3}?(?:mantenimientos?|aver[ií]as?)\b"
+    r"|,\s+(?:por|lo que|que|para)\s|\s+(?-i:Se|Para|Las|Además|Causas)\s",
+    re.IGNORECASE,
+)
+# Una planta por elemento; " y " seguido de un número une unidades ("3 y 4").
+# Algunos partes enumeran sin separadores: "Unidad 8 de la CTE Mariel Unidad 2 ..."
+_ITEM_SPLIT = re.compile(
+    r"[,;]\s*(?:y\s+)?|\.?\s+[–-]\s+|\s+y\s+(?!\d)|\.?\s+(?=(?-i:Unidad))",
+    re.IGNORECASE,
+)
+# Mención de unidades sin una lista reconocible ("En mantenimiento, subrayó la
+# UNE, se encuentra la unidad 2 ...")
+_UNLISTED = {
+    "averia": re.compile(r"aver[ií]as?\b[^.,]{0,30}\bunidad", re.IGNORECASE),
+    "mantenimiento": re.compile(r"mantenimientos?\b[^.,]{0,30}\bunidad", re.IGNORECASE),
+}
+_PLANT_NAME = re.compile(
+    r"(?:CTE\s+)?[A-ZÁÉÍÓÚÑ][\wáéíóúñ]*(?:\s+(?:de\s+)?[A-ZÁÉÍÓÚÑ0-9][\wáéíóúñ]*)*"
+)
+_UNIT_NUMBER = re.compile(r"\b(\d+)\b")
+
+CORE_FIELDS = [
+    ("prediccion", "disponibilidad"),
+    ("prediccion", "demanda_maxima"),
+    ("prediccion", "deficit"),
+    ("prediccion", "afectacion"),
+    ("info_matutina", "disponibilidad"),
+    ("info_matutina", "demanda"),
+]
+
+
+def _number(text):
+    if text is None:
+        return None
+    return int(re.sub(r"[  .,]", "", text))
+
+
+def parse_plants(text):
+    """
+    Separa una enumeración de unidades en una entrada por planta
+
+    Args:
+        text (str): "la unidad 2 de la CTE Felton y las unidades 3 y 4 de la
+            CTE Cienfuegos"
+
+    Returns:
+        list: Entradas {planta, unidad, unidades, tipo}; None si algún
+            elemento no nombra una planta
+    """
+    plants = []
+    pending = ""
+    for item in _ITEM_SPLIT.split(text.strip()):
+        # "las unidades 3, 5 y 6 de la CTE Rente": los números sin planta se
+        # unen al elemento siguiente
+        item = f"{pending} {item}".strip()
+        if not item:
+            continue
+        names = _PLANT_NAME.findall(item)
+        # Descarta "Unidad" al inicio de un elemento ("Unidad 3 de la CTE ...")
+        names = [name for name in names if not name.lower().startswith("unidad")]
+        if not names:
+            pending = item
+            continue
+        pending = ""
+        name = names[-1]
+        units = [int(n) for n in _UNIT_NUMBER.findall(item[: item.rfind(name)])]
+        plants.append(
+            {
+                "planta": name,
+                "unidad": units[0] if len(units) == 1 else None,
+                "unidades": units if len(units) > 1 else [],
+                "tipo": None,
+            }
+        )
+    return None if pending else plants
+
+
+def _after(pattern, sentence, start=0):
+    match = pattern.search(sentence, start)
+    return (_number(match.group(1)), match.end()) if match else (None, start)
+
+
+def _morning(sentence):
+    """Hora, disponibilidad y demanda de "A las 7:00 a.m., la disponibilidad ..." """
+    position = sentence.lower().find("disponibilidad")
+    hours = [
+        match
+        for match in _HOUR.finditer(sentence)
+        if _MORNING_HOUR.match(match.group(1).strip())
+    ]
+    if position < 0 or not hours:
+        return None
+    hour = min(hours, key=lambda match: abs(match.start() - position))
+    rest = _HOUR.sub(" ", sentence[position:])
+    disponibilidad, end = _after(_MW, rest)
+    demanda, _ = _after(_DEMAND, rest, end)
+    if disponibilidad is None:
+        return None
+    return hour.group(1).strip(), disponibilidad, demanda
+
+
+def _plant_list(pattern, text):
+    match = pattern.search(text)
+    if match is None:
+        return []
+    end = _LIST_END.search(text, match.end())
+    return parse_plants(text[match.end() : end.start() if end else len(text)])
+
+
+def extract_report(content):
+    """
+    Extrae por reglas los datos de un reporte de la UNE
+
+    Args:
+        content (str): Contenido del artículo
+
+    Returns:
+        tuple: (datos con la estructura de la plantilla, confianza entre 0 y 1)
+    """
+    datos = empty_report()
+    if not isinstance(content, str) or not content.strip():
+        return datos, 0.0
+    text = " ".join(content.split())
+    sentences = _SENTENCE_SPLIT.split(text)
+    penalty = 0.0
+
+    info = datos["info_matutina"]
+    morning_index = None
+    for i, sentence in enumerate(sentences):
+        morning = _morning(sentence)
+        if morning is not None:
+            morning_index = i
+            info["hora"], info["disponibilidad"], info["demanda"] = morning
+            break
+
+    prediccion = datos["prediccion"]
+    for i, sentence in enumerate(sentences):
+        lower = sentence.lower()
+        if i == morning_index or not _FORECAST_WORDS.search(sentence):
+            continue
+        if "disponibilidad" not in lower or "demanda" not in lower:
+            continue
+        disponibilidad, end = _after(_MW, sentence, lower.find("disponibilidad"))
+        demanda, end = _after(_DEMAND, sentence, end)
+        if disponibilidad is None or demanda is None:
+            continue
+        prediccion["disponibilidad"] = disponibilidad
+        prediccion["demanda_maxima"] = demanda
+        prediccion["deficit"], _ = _after(_DEFICIT, sentence, end)
+        prediccion["afectacion"], _ = _after(_AFFECTATION, sentence, end)
+        following = sentences[i + 1] if i + 1 < len(sentences) else ""
+        if (
+            prediccion["afectacion"] is None
+            and i + 1 != morning_index
+            and not _MIDDAY.search(following)
+            and not _HOUR.search(following)
+        ):
+            prediccion["afectacion"], _ = _after(_AFFECTATION, following)
+        if "nocturn" in lower:
+            prediccion["horario_pico"] = "horario pico nocturno"
+        break
+
+    if prediccion["deficit"] is not None:
+        expected = prediccion["demanda_maxima"] - prediccion["disponibilidad"]
+        if abs(expected - prediccion["deficit"]) > 5:
+            penalty += 0.5
+
+    for sentence in sentences:
+        if not _MIDDAY.search(sentence):
+            continue
+        afectacion, _ = _after(_AFFECTATION, sentence)
+        if afectacion is not None:
+            info["proyeccion_mediodia"] = {
+                "afectacion_estimada": afectacion,
+                "hora_estimada": _MIDDAY.search(sentence).group(0).lower(),
+            }
+            break
+
+    for sentence in sentences:
+        if _FORECAST_WORDS.search(sentence):
+            continue
+        peak = _PEAK.search(sentence)
+        if peak:
+            datos["impacto"]["maximo"]["mw"] = _number(peak.group(1))
+            datos["impacto"]["maximo"]["hora"] = peak.group(2)
+            break
+
+    plantas = datos["plantas"]
+    for key, pattern in (("averia", _BREAKDOWN), ("mantenimiento", _MAINTENANCE)):
+        plants = _plant_list(pattern, text)
+        if plants is None or (not plants and _UNLISTED[key].search(text)):
+            penalty += 0.25
+        else:
+            plantas[key] = plants
+    plantas["limitacion_termica"]["mw_afectados"], _ = _after(_THERMAL, text)
+
+    for sentence in sentences:
+        distributed = _DISTRIBUTED.search(sentence)
+        if distributed is None:
+            continue
+        # "83 centrales de generación distribuida, la patana de Melones ... para
+        # un total de 965 MW": el LLM toma el total de la oración
+        total = _TOTAL.search(sentence, distributed.start())
+        impacto = total.group(1) if total else distributed.group(2)
+        impacto = impacto or distributed.group(3)
+        datos["distribuida"]["motores_con_problemas"] = {
+            "total": _number(distributed.group(1)),
+            "impacto_mw": _number(impacto),
+            "causa": "falta de combustible" if "combustible" in sentence else None,
+        }
+        break
+
+    found = sum(datos[section][field] is not None for section, field in CORE_FIELDS)
+    confidence = max(found / len(CORE_FIELDS) - penalty, 0.0)
+    return datos, round(confidence, 3)
+
+
+class RuleFirstExtractor:
+    """
+    Extractor con la interfaz de CreateJson (`run_pipeline`) que resuelve por
+    reglas los artículos con confianza suficiente y envía el resto al
+    extractor LLM.
+    """
+
+    def __init__(self, path_df, make_llm_extractor, a, b, threshold=DEFAULT_THRESHOLD):
+        """
+        Args:
+            path_df (str): CSV con los artículos a procesar
+            make_llm_extractor (callable): Recibe la ruta de un CSV y devuelve
+                el extractor LLM (CreateJson o ConcurrentExtractor)
+            a (int): Primer año del JSON de salida
+            b (int): Último año del JSON de salida
+            threshold (float): Confianza mínima para no llamar al LLM
+        """
+        self.df = pd.read_csv(path_df, encoding="utf-8-sig")
+        self.make_llm_extractor = make_llm_extractor
+        self.a = a
+        self.b = b
+        self.threshold = threshold
+        self.llm_extractor = None
+        self.stats = {"rule_hits": 0, "rule_misses": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Los contadores se leen como los de un cliente LLM (`snapshot`)"""
+        return self
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Contadores de las reglas y, si se usó, del cliente del LLM
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        client = getattr(self.llm_extractor, "client", None)
+        if client is not None and hasattr(client, "snapshot"):
+            stats.update(client.snapshot())
+        return stats
+
+    def run_pipeline(
+        self, delay=None, output_dir="data/processed", save_individual=False
+    ):
+        """
+        Procesa el CSV y guarda el JSON organizado año -> mes
+
+        Args:
+            delay (float): Se pasa al extractor LLM
+            output_dir (str): Directorio donde se guarda el JSON
+            save_individual (bool): Se pasa al extractor LLM
+
+        Returns:
+            int: 0 si se guardó el JSON, el código del extractor LLM si falló
+        """
+        articles = self.df.where(pd.notna(self.df), None).to_dict("records")
+        fast, fast_datos, slow = [], [], []
+        for article in articles:
+            datos, confidence = extract_report(article.get("Contenido"))
+            if confidence >= self.threshold:
+                fast.append(article)
+                fast_datos.append(datos)
+            else:
+                slow.append(article)
+        with self._lock:
+            self.stats["rule_hits"] += len(fast)
+            self.stats["rule_misses"] += len(slow)
+        logger.info(
+            f"Reglas: {len(fast)} de {len(articles)} artículos resueltos sin LLM "
+            f"(confianza >= {self.threshold})"
+        )
+
+        data = organize_records(fast, fast_datos, self.a, self.b)
+        status = 0
+        if slow:
+            os.makedirs(output_dir, exist_ok=True)
+            llm_dir = tempfile.mkdtemp(prefix="llm_", dir=output_dir)
+            try:
+                llm_csv = os.path.join(llm_dir, "articulos_llm.csv")
+                pd.DataFrame(slow).to_csv(llm_csv, index=False, encoding="utf-8-sig")
+                self.llm_extractor = self.make_llm_extractor(llm_csv)
+                status = self.llm_extractor.run_pipeline(
+                    delay=delay, output_dir=llm_dir, save_individual=save_individual
+                )
+                llm_json = find_output_json(llm_dir)
+                if status == 0 and llm_json is not None:
+                    with open(llm_json, "r", encoding="utf-8") as f:
+                        for year, months in json.load(f).items():
+                            for month, records in months.items():
+                                data.setdefault(year, {}).setdefault(month, [])
+                                data[year][month].extend(records)
+                    for months in data.values():
+                        for records in months.values():
+                            records.sort(key=lambda record: record["fecha"])
+                else:
+                    status = status or 1
+                    logger.error(f"El extractor LLM falló con {len(slow)} artículos")
+            finally:
+                shutil.rmtree(llm_dir, ignore_errors=True)
+
+        if status != 0:
+            # Sin JSON parcial: quien llama reintenta el lote completo y los
+            # artículos resueltos por reglas no cuestan nada
+            return status
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, OUTPUT_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return 0
@@ -1,11 +1,29 @@
 #!/usr/bin/env python3
+"""
+Ejecución programada del pipeline diario.
 
+Sin argumentos ejecuta el pipeline una vez en un proceso aparte (para cron),
+mostrando y guardando su salida a medida que se produce. Con `--daemon` se
+queda corriendo: importa DailyPipeline una sola vez y lo ejecuta en el mismo
+proceso a las horas indicadas, por ejemplo tras el reporte matutino y el
+vespertino de la UNE:
+
+    python scraping/schedule_daily.py --daemon --times 08:00 20:00
+
+En ambos modos un candado de archivo (logs/scheduler.lock) impide que dos
+ejecuciones del pipeline se solapen, aunque vengan de procesos distintos.
+"""
+import argparse
+import fcntl
 import subprocess
+import signal
 import sys
 import os
 import logging
+import threading
 import traceback
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,6 +42,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger("scheduler")
 
+LOCK_PATH = os.path.join(log_dir, "scheduler.lock")
+DEFAULT_TIMES = ["08:00", "20:00"]
+
+# Recorre hasta 10 páginas, pero se detiene en la primera sin novedades
+PAGES_LOOKBACK = 10
+STOP_AFTER_KNOWN = 1
+
+
+class RunLock:
+    """
+    Candado de archivo (flock) que impide dos ejecuciones simultáneas del
+    pipeline; el sistema lo libera solo si el proceso muere.
+    """
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """
+        Returns:
+            bool: True si se obtuvo el candado, False si otra ejecución lo tiene
+        """
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
 def check_environment():
     """
     Verifica que el entorno esté correctamente configurado
@@ -50,66 +110,219 @@ def check_environment():
 
 def run_pipeline():
     """
-    Ejecuta el pipeline diario y registra el resultado
-    
+    Ejecuta el pipeline diario en un proceso aparte y registra el resultado.
+    La salida del proceso se muestra y se agrega a logs/output_AAAAMMDD.log
+    línea a línea, sin acumularla en memoria
+
     Returns:
         bool: True si el pipeline se ejecutó correctamente, False en caso contrario
     """
     if not check_environment():
         return False
-    
+
     pipeline_script = os.path.join(current_dir, "daily_pipeline.py")
     logger.info(f"Usando script: {pipeline_script}")
-    
+
+    lock = RunLock()
+    if not lock.acquire():
+        logger.warning("Otra ejecución del pipeline sigue en curso, se omite esta")
+        return False
 
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         logger.info(f"Iniciando ejecución del pipeline en {timestamp}")
-        
+
 
         os.chdir(project_dir)
-        
-        result = subprocess.run(
-            [sys.executable, pipeline_script],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        if result.returncode == 0:
-            logger.info(f"Pipeline ejecutado correctamente (código de salida: {result.returncode})")
-            
-            output_log = os.path.join(log_dir, f"output_{datetime.now().strftime('%Y%m%d')}.log")
-            with open(output_log, 'w', encoding='utf-8') as f:
-                if result.stdout:
-                    f.write(result.stdout)
-                    
+
+        output_log = os.path.join(log_dir, f"output_{datetime.now().strftime('%Y%m%d')}.log")
+        tail = deque(maxlen=50)
+        with open(output_log, 'a', encoding='utf-8') as f:
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    pipeline_script,
+                    "--pages_lookback",
+                    str(PAGES_LOOKBACK),
+                    "--stop_after_known",
+                    str(STOP_AFTER_KNOWN),
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+            for line in process.stdout:
+                f.write(line)
+                f.flush()
+                sys.stderr.write(line)
+                tail.append(line)
+            returncode = process.wait()
+
+        if returncode == 0:
+            logger.info(f"Pipeline ejecutado correctamente (código de salida: {returncode})")
             return True
         else:
-            logger.error(f"Error ejecutando el pipeline. Código de salida: {result.returncode}")
-            if result.stderr:
-                logger.error(f"Error detallado:\n{result.stderr}")
-                
-                error_log = os.path.join(log_dir, f"error_{datetime.now().strftime('%Y%m%d')}.log")
-                with open(error_log, 'w', encoding='utf-8') as f:
-                    f.write(result.stderr)
-                    if result.stdout:
-                        f.write("\n\n--- Salida estándar ---\n\n")
-                        f.write(result.stdout)
-            
+            logger.error(f"Error ejecutando el pipeline. Código de salida: {returncode}")
+            if tail:
+                logger.error(f"Últimas líneas de la salida ({output_log}):\n{''.join(tail)}")
+
             return False
-            
+
+    except Exception as e:
+        logger.error(f"Excepción ejecutando el pipeline: {e}")
+        logger.error(traceback.format_exc())
+        return False
+    finally:
+        lock.release()
+
+def run_in_process(pipeline_class, model):
+    """
+    Ejecuta el pipeline en este mismo proceso; sus logs salen por los mismos
+    manejadores que los del scheduler a medida que se producen
+
+    Args:
+        pipeline_class (type): DailyPipeline, ya importado
+        model (str): Modelo del LLM
+
+    Returns:
+        bool: True si el pipeline terminó sin errores
+    """
+    if not check_environment():
+        return False
+
+    lock = RunLock()
+    if not lock.acquire():
+        logger.warning("Otra ejecución del pipeline sigue en curso, se omite esta")
+        return False
+
+    pipeline = None
+    try:
+        logger.info("Iniciando ejecución del pipeline en el proceso del scheduler")
+        pipeline = pipeline_class(
+            api_key=os.getenv('FIREWORKS_API_KEY'),
+            model=model,
+            template_path=os.path.join(project_dir, "template.json"),
+            data_dir=os.path.join(project_dir, "data"),
+            days_lookback=PAGES_LOOKBACK,
+            stop_after_known=STOP_AFTER_KNOWN,
+        )
+        result = pipeline.run()
+        if isinstance(result, int) and result == 2:
+            logger.info("No hay artículos nuevos para procesar")
+            return True
+        if result:
+            logger.info("Pipeline ejecutado correctamente")
+            return True
+        logger.error("El pipeline terminó con errores")
+        return False
     except Exception as e:
         logger.error(f"Excepción ejecutando el pipeline: {e}")
         logger.error(traceback.format_exc())
         return False
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        lock.release()
+
+def next_run(times, now):
+    """
+    Próxima hora programada posterior a `now`
+
+    Args:
+        times (list): Horas "HH:MM"
+        now (datetime): Momento actual
+
+    Returns:
+        datetime: Próxima ejecución
+    """
+    candidates = []
+    for value in times:
+        hour, minute = (int(part) for part in value.split(":"))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        candidates.append(candidate)
+    return min(candidates)
+
+def run_daemon(times, run_now=False):
+    """
+    Ejecuta el pipeline a las horas indicadas hasta recibir SIGINT o SIGTERM
+
+    Args:
+        times (list): Horas "HH:MM" de cada consulta diaria
+        run_now (bool): Ejecutar también al arrancar
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(project_dir, ".env"))
+    # El proyecto va primero para que `scraping` resuelva al paquete y no a scraping.py
+    sys.path.insert(0, project_dir)
+    from scraping.daily_pipeline import DEFAULT_MODEL, DailyPipeline
+
+    os.chdir(project_dir)
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Señal {signum} recibida, deteniendo el scheduler")
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    logger.info(f"Scheduler en modo continuo, consultas a las {', '.join(times)}")
+    if run_now:
+        run_in_process(DailyPipeline, DEFAULT_MODEL)
+    while not stop.is_set():
+        target = next_run(times, datetime.now())
+        logger.info(f"Próxima ejecución: {target.strftime('%Y-%m-%d %H:%M')}")
+        if stop.wait(max((target - datetime.now()).total_seconds(), 0)):
+            break
+        run_in_process(DailyPipeline, DEFAULT_MODEL)
+    logger.info("=== Scheduler detenido ===")
+
+def parse_time(value):
+    try:
+        datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Hora inválida: {value} (se espera HH:MM)")
+    return value
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the daily pipeline on a schedule.")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and execute the pipeline in-process at the given times",
+    )
+    parser.add_argument(
+        "--times",
+        nargs="+",
+        type=parse_time,
+        default=DEFAULT_TIMES,
+        help="Daily run times (HH:MM) in daemon mode",
+    )
+    parser.add_argument(
+        "--run_now",
+        action="store_true",
+        help="In daemon mode, also run once at startup",
+    )
+    args = parser.parse_args()
+
+    if args.daemon:
+        try:
+            run_daemon(args.times, run_now=args.run_now)
+            sys.exit(0)
+        except Exception as e:
+            logger.critical(f"Error crítico en el scheduler: {e}")
+            logger.critical(traceback.format_exc())
+            sys.exit(2)
+
     logger.info("=== Iniciando ejecución programada ===")
-    
+
     try:
         success = run_pipeline()
-        
+
         if success:
             logger.info("=== Ejecución completada con éxito ===")
             sys.exit(0)
@@ -119,4 +332,4 @@ if __name__ == "__main__":
     except Exception as e:
         logger.critical(f"Error crítico en el scheduler: {e}")
         logger.critical(traceback.format_exc())
-        sys.exit(2) 
\ No newline at end of file
+        sys.exit(2)
@@ -1,56 +1,41 @@
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict
 
+from scraping.http_client import get_default_client
+from scraping.parsers import get_parser
 
-def scrape_article_content(url, headers) -> Dict[str, str]:
+_default_parser = None
+
+
+def scrape_article_content(url, headers, client=None, parser=None) -> Dict[str, str]:
     """
     Extrae el contenido de un artículo desde una URL específica.
 
     Args:
         url: URL del artículo a extraer
         headers: Cabeceras HTTP para la solicitud
+        client: HttpClient a utilizar; por defecto el cliente compartido del proceso
+        parser: Parser HTML (ver scraping.parsers); por defecto lxml si está
+            instalado y BeautifulSoup si no
 
     Returns:
         Dict: Diccionario con los datos extraídos del artículo o None si hay error
     """
+    global _default_parser
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title = (
-            soup.find("h2", class_="title").get_text(strip=True)
-            if soup.find("h2", class_="title")
-            else "No título"
-        )
-
-        date = soup.find("time").get("datetime") if soup.find("time") else "No fecha"
-
-        content_div = soup.find("div", class_="note_content")
-        if content_div:
-            for element in content_div(
-                ["script", "style", "iframe", "ins", "header", "footer", "nav"]
-            ):
-                element.decompose()
-            content = " ".join(content_div.stripped_strings)
-        else:
-            content = "No se pudo extraer contenido"
-
-        tags = []
-        taxonomies = soup.find("div", id="taxonomies")
-        if taxonomies:
-            tags = [a.get_text(strip=True) for a in taxonomies.find_all("a")]
-
-        comment_count = soup.find("span", class_="comment_count")
-        num_comments = comment_count.get_text(strip=True) if comment_count else "0"
+        client = client or get_default_client()
+        if parser is None:
+            if _default_parser is None:
+                _default_parser = get_parser()
+            parser = _default_parser
+        response = client.get(url, headers=headers)
+        article = parser.parse_article(response.text)
 
         return {
-            "Título": title,
-            "Fecha": date,
-            "Contenido": content,
-            "Etiquetas": ", ".join(tags),
-            "Número de Comentarios": num_comments,
+            "Título": article["title"],
+            "Fecha": article["date"],
+            "Contenido": article["content"],
+            "Etiquetas": ", ".join(article["tags"]),
+            "Número de Comentarios": article["num_comments"],
             "Enlace": url,
         }
 
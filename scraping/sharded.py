@@ -0,0 +1,322 @@
+"""
+Re-extracción completa del CSV de artículos por fragmentos año-mes.
+
+`DailyPipeline.run(analize_all=True)` ya no pasa todo el CSV por un solo
+extractor: los artículos se reparten en fragmentos por mes de publicación
+(data/processed/shards/2024-06/, ...) y los fragmentos se extraen en paralelo.
+Cada fragmento deja su propio JSON y un manifiesto con la huella de su
+entrada (artículos, plantilla, modelo, extractor); un fragmento cuya huella no
+cambió no se vuelve a extraer, así que tras un fallo basta con relanzar el
+comando, o solo los fragmentos fallidos:
+
+    python scraping/daily_pipeline.py --analize_all True --shard_workers 4
+    python scraping/daily_pipeline.py --analize_all True --shards 2024-06 2024-07
+
+Cuando todos los fragmentos están completos se unen, ordenados por mes y por
+fecha y enlace, en data/processed/shards/datos_electricos_organizados.json,
+y ese JSON entra al almacén de reportes con `DailyPipeline.ingest`, como el
+del recorrido diario: se actualizan la tabla de variables y el registro de
+enlaces, y data/processed/datos_electricos_organizados.json se exporta desde
+el almacén.
+
+Los fragmentos corren en hilos: el trabajo de cada uno es esperar al LLM, y
+todos los extractores concurrentes comparten la cubeta de peticiones del
+pipeline, de modo que el ritmo total al LLM no crece con la cantidad de
+fragmentos.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from processing.records import dumps, loads, parse_article_date
+from processing.report_store import atomic_write
+from scraping.llm_cache import content_hash
+from scraping.llm_extraction import MESES, OUTPUT_FILE, find_output_json
+
+logger = logging.getLogger("sharded")
+
+MANIFEST = "shard.json"
+
+
+def shard_id(fecha):
+    """
+    Args:
+        fecha (str): Fecha del artículo
+
+    Returns:
+        str: Fragmento "AAAA-MM" o None si la fecha no se puede interpretar
+    """
+    parsed = parse_article_date(fecha)
+    return parsed.strftime("%Y-%m") if parsed else None
+
+
+class ShardedExtraction:
+    """
+    Extracción del CSV de artículos por fragmentos mensuales reanudables.
+    """
+
+    def __init__(self, pipeline, workers=1, shards_dir=None):
+        """
+        Args:
+            pipeline (DailyPipeline): Pipeline con el extractor configurado
+            workers (int): Fragmentos extraídos a la vez
+            shards_dir (str): Directorio de los fragmentos (por defecto
+                data_dir/processed/shards)
+        """
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.shards_dir = shards_dir or os.path.join(
+            pipeline.data_dir, "processed", "shards"
+        )
+        self.years = (2021, datetime.now().year)
+        self.llm_stats = {}
+        self._lock = threading.Lock()
+
+    def _settings_hash(self):
+        pipeline = self.pipeline
+        template = ""
+        if os.path.exists(pipeline.template_path):
+            with open(pipeline.template_path, "r", encoding="utf-8") as f:
+                template = f.read()
+        settings = [
+            pipeline.extractor,
+            pipeline.model,
+            pipeline.rule_threshold,
+            content_hash(template),
+        ]
+        return json.dumps(settings)
+
+    def plan(self):
+        """
+        Reparte el CSV de artículos en fragmentos y escribe el CSV de cada uno
+
+        Returns:
+            dict: {fragmento: (huella, artículos)}, en orden de fragmento
+        """
+        df = pd.read_csv(self.pipeline.raw_csv_path, encoding="utf-8-sig")
+        df = df.drop_duplicates("Enlace", keep="last")
+        shards = df["Fecha"].map(shard_id)
+        skipped = int(shards.isna().sum())
+        if skipped:
+            logger.warning(f"{skipped} artículos sin fecha válida quedan fuera")
+
+        settings = self._settings_hash()
+        plan = {}
+        for shard, group in df[shards.notna()].groupby(shards[shards.notna()]):
+            shard_dir = os.path.join(self.shards_dir, shard)
+            os.makedirs(shard_dir, exist_ok=True)
+            csv_text = group.to_csv(index=False)
+            csv_path = os.path.join(shard_dir, "articulos.csv")
+            # Solo se reescribe si cambió, para no tocar fragmentos terminados
+            if self._read_csv_text(csv_path) != csv_text:
+                with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+                    f.write(csv_text)
+            plan[shard] = (content_hash(csv_text + settings), len(group))
+        return plan
+
+    @staticmethod
+    def _read_csv_text(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return f.read()
+
+    def manifest(self, shard):
+        """
+        Returns:
+            dict: Manifiesto del fragmento o None si nunca se extrajo
+        """
+        path = os.path.join(self.shards_dir, shard, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def is_done(self, shard, fingerprint):
+        """
+        Returns:
+            bool: True si el fragmento se extrajo con esta misma entrada
+        """
+        manifest = self.manifest(shard)
+        return (
+            manifest is not None
+            and manifest.get("status") == "ok"
+            and manifest.get("fingerprint") == fingerprint
+            and os.path.exists(os.path.join(self.shards_dir, shard, OUTPUT_FILE))
+        )
+
+    def _write_manifest(self, shard, manifest):
+        path = os.path.join(self.shards_dir, shard, MANIFEST)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _count_llm(self, extractor):
+        client = getattr(extractor, "client", None)
+        if client is None or not hasattr(client, "snapshot"):
+            return
+        with self._lock:
+            for key, value in client.snapshot().items():
+                if isinstance(value, (int, float)):
+                    self.llm_stats[key] = self.llm_stats.get(key, 0) + value
+
+    def run_shard(self, shard, fingerprint, articles):
+        """
+        Extrae un fragmento y deja su JSON junto a su CSV
+
+        Args:
+            shard (str): Fragmento "AAAA-MM"
+            fingerprint (str): Huella de la entrada del fragmento
+            articles (int): Artículos del fragmento
+
+        Returns:
+            bool: True si el fragmento se extrajo
+        """
+        shard_dir = os.path.join(self.shards_dir, shard)
+        work_dir = tempfile.mkdtemp(prefix="tmp_", dir=shard_dir)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            extractor = self.pipeline._make_extractor(
+                os.path.join(shard_dir, "articulos.csv"), *self.years
+            )
+            with self.pipeline.metrics.timed("shard"):
+                result = extractor.run_pipeline(
+                    delay=2, output_dir=work_dir, save_individual=False
+                )
+            self._count_llm(extractor)
+            json_path = find_output_json(work_dir)
+            if result == 0 and json_path is not None:
+                os.replace(json_path, os.path.join(shard_dir, OUTPUT_FILE))
+                status = "ok"
+        except Exception as e:
+            logger.error(f"Error al extraer el fragmento {shard}: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        wall_s = time.perf_counter() - start
+        self._write_manifest(
+            shard,
+            {
+                "shard": shard,
+                "fingerprint": fingerprint,
+                "articles": articles,
+                "status": status,
+                "wall_s": round(wall_s, 3),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+            },
+        )
+        if status == "ok":
+            logger.info(f"Fragmento {shard}: {articles} artículos en {wall_s:.1f}s")
+        else:
+            logger.error(f"Fragmento {shard} fallido ({articles} artículos)")
+        return status == "ok"
+
+    def merge(self, shards, output_path):
+        """
+        Une los JSON de los fragmentos en el JSON anidado año -> mes. El
+        resultado no depende del orden en que terminaron los fragmentos
+
+        Args:
+            shards (list): Fragmentos a unir
+            output_path (str): JSON de salida
+
+        Returns:
+            int: Registros escritos
+        """
+        a, b = self.years
+        data = {str(year): {mes: [] for mes in MESES} for year in range(a, b + 1)}
+        for shard in sorted(shards):
+            with open(os.path.join(self.shards_dir, shard, OUTPUT_FILE), "rb") as f:
+                for year, months in loads(f.read()).items():
+                    for month, records in months.items():
+                        data.setdefault(year, {}).setdefault(month, []).extend(records)
+
+        total = 0
+        for months in data.values():
+            for records in months.values():
+                records.sort(
+                    key=lambda record: (
+                        str(record.get("fecha")),
+                        str(record.get("enlace")),
+                    )
+                )
+                total += len(records)
+
+        atomic_write(output_path, lambda f: f.write(dumps(data, indent=True)))
+        return total
+
+    def run(self, only=None, force=False):
+        """
+        Extrae los fragmentos pendientes y, si todos están completos, los une
+        y los incorpora al almacén de reportes
+
+        Args:
+            only (list): Extraer solo estos fragmentos ("AAAA-MM")
+            force (bool): Volver a extraer aunque la entrada no haya cambiado
+
+        Returns:
+            bool: True si todos los fragmentos se incorporaron al almacén
+        """
+        metrics = self.pipeline.metrics
+        plan = self.plan()
+        selected = list(plan)
+        if only:
+            unknown = sorted(set(only) - set(plan))
+            if unknown:
+                logger.warning(f"Fragmentos sin artículos: {', '.join(unknown)}")
+            selected = [shard for shard in plan if shard in set(only)]
+        pending = [
+            shard
+            for shard in selected
+            if force or not self.is_done(shard, plan[shard][0])
+        ]
+        logger.info(
+            f"{len(plan)} fragmentos, {len(selected) - len(pending)} ya extraídos, "
+            f"{len(pending)} pendientes, {self.workers} a la vez"
+        )
+
+        with metrics.stage("extraction") as stage:
+            stage.items = sum(plan[shard][1] for shard in pending)
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="shard"
+            ) as executor:
+                futures = {
+                    shard: executor.submit(self.run_shard, shard, *plan[shard])
+                    for shard in pending
+                }
+                failed = [
+                    shard for shard, future in futures.items() if not future.result()
+                ]
+            stage.counters.update(
+                {f"llm_{key}": value for key, value in self.llm_stats.items()}
+            )
+
+        if failed:
+            logger.error(
+                f"{len(failed)} fragmentos fallidos; para reintentarlos: "
+                f"--analize_all True --shards {' '.join(failed)}"
+            )
+        missing = [shard for shard in plan if not self.is_done(shard, plan[shard][0])]
+        if missing:
+            logger.warning(
+                f"No se une el JSON: faltan {len(missing)} fragmentos "
+                f"({', '.join(missing[:10])}{', ...' if len(missing) > 10 else ''})"
+            )
+            return False
+
+        # Los fragmentos entran al almacén de reportes por el mismo camino que
+        # el recorrido diario; el JSON principal se exporta desde el almacén
+        merged_path = os.path.join(self.shards_dir, OUTPUT_FILE)
+        total = self.merge(list(plan), merged_path)
+        logger.info(f"Fragmentos unidos: {total} registros en {merged_path}")
+        return self.pipeline.ingest(merged_path, total)
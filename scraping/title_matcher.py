@@ -0,0 +1,211 @@
+"""
+Clasificador de títulos de artículos para detectar los reportes de la UNE.
+
+Los patrones se cargan desde `title_rules.json`, se normalizan (minúsculas,
+sin tildes y con los espacios colapsados) y se compilan en un trie que se
+expresa como una única expresión regular: en cada posición del título el
+motor sigue un solo camino del trie en lugar de probar cada patrón por
+separado. La expresión ya tolera mayúsculas, tildes y espacios repetidos, así
+que el título se recorre tal cual y solo se normaliza el fragmento encontrado.
+
+Las siglas de los patrones (palabras de dos o más letras, todas mayúsculas,
+como "UNE" o "SEN") sí distinguen mayúsculas: "une" en minúsculas es también
+un verbo ("se une", "une informa") y no debe confundirse con la Unión
+Eléctrica.
+"""
+import json
+import os
+import re
+import unicodedata
+from typing import NamedTuple, Optional
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "title_rules.json")
+
+_SPACES = re.compile(r"\s+")
+
+
+def _build_fold_table():
+    table = {}
+    for code in range(0xC0, 0x250):
+        char = chr(code)
+        base = "".join(
+            c
+            for c in unicodedata.normalize("NFKD", char)
+            if not unicodedata.combining(c)
+        )
+        if base != char:
+            table[code] = base
+    return table
+
+
+# Tabla para quitar tildes con str.translate sin descomponer todo el texto
+_FOLD = _build_fold_table()
+
+# Letra base -> clase con todas sus variantes acentuadas, p. ej. "e" -> "[eéèêë...]"
+_VARIANTS = {}
+for _code, _base in _FOLD.items():
+    _variant = chr(_code).lower()
+    if len(_base) == 1 and len(_variant) == 1:
+        _VARIANTS.setdefault(_base.lower(), {_base.lower()}).add(_variant)
+
+
+def _char_regex(char):
+    if char == " ":
+        return r"\s+"
+    if char.isupper():
+        # Letra de una sigla: sin IGNORECASE
+        return f"(?-i:{char})"
+    variants = _VARIANTS.get(char)
+    if not variants:
+        return re.escape(char)
+    return "[" + "".join(sorted(variants)) + "]"
+
+
+class TitleMatch(NamedTuple):
+    rule: str
+    pattern: str
+
+
+def normalize_title(text):
+    """
+    Normaliza un texto para comparar títulos
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto en minúsculas, sin tildes y con los espacios colapsados
+    """
+    folded = text.casefold().translate(_FOLD)
+    if not folded.isascii():
+        decomposed = unicodedata.normalize("NFKD", folded)
+        folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SPACES.sub(" ", folded)
+
+
+def _is_acronym(word):
+    letters = [c for c in word if c.isalpha()]
+    return len(letters) >= 2 and all(c.isupper() for c in letters)
+
+
+def _pattern_key(pattern):
+    """
+    Forma normalizada de un patrón para el trie, con las siglas en mayúsculas
+
+    Args:
+        pattern (str): Patrón original
+
+    Returns:
+        str: normalize_title(pattern), salvo las siglas, que quedan en
+            mayúsculas para buscarlas distinguiendo mayúsculas
+    """
+    parts = []
+    for token in re.split(r"(\s+)", pattern):
+        if not token or token.isspace():
+            parts.append(" " if token else "")
+            continue
+        word = normalize_title(token)
+        parts.append(word.upper() if _is_acronym(token) else word)
+    return "".join(parts)
+
+
+def _trie_regex(patterns):
+    """
+    Construye una expresión regular equivalente a un trie de los patrones
+
+    Args:
+        patterns (iterable): Patrones ya normalizados
+
+    Returns:
+        str: Expresión regular sin anclar
+    """
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        branches = [
+            _char_regex(char) + render(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # Opcional y codicioso: si el patrón termina aquí, se prefiere el más largo
+        return group + "?" if "" in node else group
+
+    return render(trie)
+
+
+class TitleMatcher:
+    """
+    Compila las reglas de títulos en un único autómata de búsqueda.
+    """
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (list): Lista de dicts con `nombre` y `patrones`
+        """
+        # Patrón normalizado -> (regla, patrón original). Si dos reglas comparten
+        # un patrón se queda la primera.
+        self._patterns = {}
+        keys = []
+        for rule in rules:
+            for pattern in rule["patrones"]:
+                key = normalize_title(pattern)
+                if key and key not in self._patterns:
+                    self._patterns[key] = (rule["nombre"], pattern)
+                    keys.append(_pattern_key(pattern))
+
+        self._regex = re.compile(r"(?<!\w)" + _trie_regex(keys), re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_PATH):
+        """
+        Carga las reglas desde un archivo JSON
+
+        Args:
+            path (str): Ruta al archivo de reglas
+
+        Returns:
+            TitleMatcher: Clasificador compilado
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["reglas"])
+
+    def match(self, title) -> Optional[TitleMatch]:
+        """
+        Busca la primera regla que coincide con el título
+
+        Args:
+            title (str): Título del artículo
+
+        Returns:
+            TitleMatch: Regla y patrón que coincidieron, o None si no hay coincidencia
+        """
+        found = self._regex.search(title)
+        if found is None:
+            return None
+        rule, pattern = self._patterns[normalize_title(found.group())]
+        return TitleMatch(rule, pattern)
+
+    def __len__(self):
+        return len(self._patterns)
+
+
+_default_matcher = None
+
+
+def get_default_matcher():
+    """
+    Devuelve el clasificador con las reglas por defecto, compilándolo una sola vez
+    """
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = TitleMatcher.from_file()
+    return _default_matcher
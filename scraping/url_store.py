@@ -0,0 +1,202 @@
+"""
+Registro persistente de los enlaces ya vistos por el pipeline.
+
+Sustituye a la carga completa del CSV de artículos en cada ejecución: los
+enlaces se guardan en una tabla SQLite indexada por URL, la consulta de
+pertenencia es una búsqueda por clave primaria y las escrituras solo
+insertan filas nuevas. Cada enlace guarda cuándo se descargó el artículo y
+cuándo se incorporó su reporte al almacén de procesados, de modo que el
+scraper y el merge comparten el mismo registro. La fecha de publicación
+guardada sirve además de marca de agua para cortar el recorrido del listado.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from processing.records import parse_article_date
+
+logger = logging.getLogger("url_store")
+
+LINK_DATE = re.compile(r"/(\d{4})/(\d{2})/(\d{2})/")
+# Valores de `fecha` que empiezan con una fecha YYYY-MM-DD
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+
+def link_date(link):
+    """
+    Fecha de publicación codificada en la ruta de un enlace de Cubadebate
+    (`/noticias/2024/06/30/...`)
+
+    Args:
+        link (str): URL del artículo
+
+    Returns:
+        str: Fecha en formato YYYY-MM-DD o None si el enlace no la tiene
+    """
+    match = LINK_DATE.search(link or "")
+    if match is None:
+        return None
+    return "-".join(match.groups())
+
+
+def publication_date(fecha, link=None):
+    """
+    Fecha de publicación normalizada para guardar en el registro
+
+    Args:
+        fecha: Fecha del artículo ("2024-06-30 09:26:00", ISO con "T", o
+            el texto "No fecha" de los parsers)
+        link (str): URL del artículo, para usar su fecha si `fecha` no sirve
+
+    Returns:
+        str: Fecha "YYYY-MM-DD HH:MM:SS" o "YYYY-MM-DD", o None si no hay
+    """
+    parsed = None if pd.isna(fecha) else parse_article_date(fecha)
+    if parsed is not None:
+        return parsed.isoformat(sep=" ")
+    return link_date(link)
+
+
+class UrlStore:
+    """
+    Conjunto persistente de enlaces, seguro para usarse desde varios hilos.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Archivo SQLite del registro
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                scraped_at REAL,
+                merged_at REAL,
+                fecha TEXT
+            ) WITHOUT ROWID
+            """
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(urls)")]
+        if "fecha" not in columns:
+            self._db.execute("ALTER TABLE urls ADD COLUMN fecha TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS urls_fecha ON urls (fecha)")
+        self._db.commit()
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM urls WHERE url = ? AND scraped_at IS NOT NULL", (url,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM urls WHERE scraped_at IS NOT NULL"
+            ).fetchone()[0]
+
+    def add(self, urls, fechas=None):
+        """
+        Registra enlaces descargados
+
+        Args:
+            urls (iterable): Enlaces a registrar
+            fechas (iterable): Fecha de publicación de cada enlace (opcional).
+                Las que no se pueden interpretar se toman del enlace o se
+                guardan vacías
+        """
+        now = time.time()
+        urls = list(urls)
+        fechas = [None] * len(urls) if fechas is None else list(fechas)
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO urls (url, scraped_at, fecha) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "scraped_at = COALESCE(urls.scraped_at, excluded.scraped_at), "
+                "fecha = COALESCE(excluded.fecha, urls.fecha)",
+                [
+                    (url, now, publication_date(fecha, url))
+                    for url, fecha in zip(urls, fechas)
+                ],
+            )
+            self._db.commit()
+
+    def mark_merged(self, urls):
+        """
+        Registra enlaces cuyo reporte ya está en el almacén de procesados
+
+        Args:
+            urls (iterable): Enlaces incorporados
+        """
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO urls (url, merged_at) VALUES (?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET merged_at = excluded.merged_at",
+                [(url, now) for url in urls],
+            )
+            self._db.commit()
+
+    def is_merged(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM urls WHERE url = ? AND merged_at IS NOT NULL", (url,)
+            ).fetchone()
+        return row is not None
+
+    def latest_fecha(self):
+        """
+        Returns:
+            str: Fecha de publicación más reciente registrada o None. Se
+                ignoran los valores que no son fechas (p. ej. "No fecha" de
+                registros anteriores)
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT MAX(fecha) FROM urls WHERE fecha GLOB ?", (ISO_DATE_GLOB,)
+            ).fetchone()[0]
+
+    def pending_merge(self):
+        """
+        Returns:
+            list: Enlaces descargados cuyo reporte aún no se ha incorporado
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM urls "
+                "WHERE scraped_at IS NOT NULL AND merged_at IS NULL ORDER BY scraped_at"
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def migrate_from_csv(self, csv_path):
+        """
+        Importa una sola vez los enlaces de un CSV de artículos existente
+
+        Args:
+            csv_path (str): CSV con las columnas `Enlace` y `Fecha`
+
+        Returns:
+            int: Enlaces importados
+        """
+        if not os.path.exists(csv_path):
+            return 0
+        links = pd.read_csv(csv_path, usecols=["Enlace", "Fecha"], encoding="utf-8-sig")
+        links = links.dropna(subset=["Enlace"]).drop_duplicates("Enlace")
+        self.add(links["Enlace"], links["Fecha"])
+        logger.info(f"Migrados {len(links)} enlaces desde {csv_path}")
+        return len(links)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from processing.feature_table import FeatureTable
+from processing.report_store import ReportStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORICAL_CSV = os.path.join(ROOT, "data", "processed", "cleaned_energy_data.csv")
+HISTORICAL_JSON = os.path.join(ROOT, "data", "raw", "datos_electricos_organizados.json")
+
+
+def new_report(day):
+    return {
+        "enlace": f"http://www.cubadebate.cu/noticias/2030/01/{day:02d}/reporte/",
+        "fecha": f"2030-01-{day:02d}T08:00:00",
+        "datos": {"prediccion": {"demanda_maxima": "3500 MW", "deficit": "1500 MW"}},
+    }
+
+
+def csv_rows(table):
+    return len(pd.read_csv(table.path("csv"), usecols=[0]))
+
+
+@pytest.fixture
+def processed(tmp_path):
+    shutil.copy(HISTORICAL_CSV, tmp_path / "cleaned_energy_data.csv")
+    return tmp_path
+
+
+def test_historical_csv_is_not_replaced_by_a_subset(processed):
+    table = FeatureTable(str(processed))
+    historical = csv_rows(table)
+
+    with pytest.raises(ValueError):
+        table.update([new_report(1)])
+
+    assert csv_rows(table) == historical
+    assert "clave" not in pd.read_csv(table.path("csv"), nrows=0).columns
+
+
+def test_row_count_only_grows_from_a_seeded_store(processed):
+    table = FeatureTable(str(processed))
+    historical = pd.read_csv(
+        table.path("csv"), usecols=["fecha"], parse_dates=["fecha"]
+    )
+    store = ReportStore(str(processed / "reports"))
+    # Seis artículos aparecen dos veces con el mismo enlace en el histórico
+    unique = historical["fecha"].nunique()
+    assert store.seed([HISTORICAL_JSON]) == len(store.keys()) >= unique
+    assert store.seed([HISTORICAL_JSON]) == 0
+
+    everything = [
+        record
+        for year, month in store.partitions()
+        for record in store.read_partition(year, month)
+    ]
+    table.update(everything)
+    counts = [csv_rows(table)]
+    assert set(historical["fecha"]) <= set(table.load()["fecha"])
+    for day in (1, 2, 2, 3):
+        store.upsert("2030", "enero", [new_report(day)])
+        table.update([new_report(day)])
+        counts.append(csv_rows(table))
+        assert len(table.load()) == counts[-1]
+
+    assert counts == sorted(counts)
+    assert counts[-1] == counts[0] + 3
+    assert set(historical["fecha"]) <= set(table.load()["fecha"])
@@ -0,0 +1,232 @@
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from scraping import http_client
+from scraping.http_cache import ResponseCache
+from scraping.http_client import CacheMiss, HttpClient
+from scraping.rate_limit import HostRateLimiter, TokenBucket
+
+
+def scripted_handler(responses, seen):
+    """
+    Manejador que contesta en orden las respuestas (estado, cabeceras,
+    cuerpo); la última se repite. Guarda las cabeceras de cada petición
+    """
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                seen.append(dict(self.headers))
+                status, headers, body = responses[min(len(seen), len(responses)) - 1]
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def etag_handler(seen, etag='"v1"', body=b"<html>listado</html>"):
+    """
+    Manejador que contesta 304 si la petición trae el ETag vigente
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Las esperas del backoff se anotan en lugar de dormir
+    delays = []
+    monkeypatch.setattr(http_client, "time", types.SimpleNamespace(sleep=delays.append))
+    return delays
+
+
+def test_retries_with_exponential_backoff(local_server, sleeps):
+    seen = []
+    url = local_server(
+        scripted_handler([(503, {}, b""), (502, {}, b""), (200, {}, b"ok")], seen)
+    )
+    client = HttpClient(max_retries=3, backoff_factor=0.5)
+
+    response = client.get(url)
+
+    assert response.text == "ok"
+    assert len(seen) == 3
+    assert sleeps == [0.5, 1.0]
+    stats = client.snapshot()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_gives_up_after_max_retries(local_server, sleeps):
+    seen = []
+    url = local_server(scripted_handler([(500, {}, b"")], seen))
+    client = HttpClient(max_retries=2, backoff_factor=1.0, max_backoff=1.5)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(url)
+
+    assert len(seen) == 3
+    assert sleeps == [1.0, 1.5]
+    assert client.snapshot()["errors"] == 1
+
+
+def test_client_errors_are_not_retried(local_server, sleeps):
+    seen = []
+    url = local_server(scripted_handler([(404, {}, b"")], seen))
+    client = HttpClient(max_retries=3)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(url)
+
+    assert len(seen) == 1
+    assert sleeps == []
+
+
+def test_429_waits_for_retry_after(local_server, sleeps):
+    seen = []
+    url = local_server(
+        scripted_handler(
+            [(429, {"Retry-After": "7"}, b""), (200, {}, b"ok")],
+            seen,
+        )
+    )
+    client = HttpClient(max_retries=3, backoff_factor=0.1, max_backoff=60)
+
+    assert client.get(url).text == "ok"
+    assert sleeps == [7.0]
+    assert client.snapshot()["retries"] == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(local_server, tmp_path):
+    seen = []
+    url = local_server(etag_handler(seen)) + "/listado"
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    client = HttpClient(cache=cache)
+
+    first = client.get(url)
+    second = client.get(url)
+
+    assert first.text == second.text == "<html>listado</html>"
+    assert "If-None-Match" not in seen[0]
+    assert seen[1]["If-None-Match"] == '"v1"'
+    stats = client.snapshot()
+    assert stats["requests"] == 2
+    assert stats["not_modified"] == 1
+    assert stats["bytes"] == len(first.content)
+    cache.close()
+
+
+def test_fresh_entry_is_served_from_disk(local_server, tmp_path):
+    seen = []
+    url = local_server(etag_handler(seen)) + "/articulo"
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    client = HttpClient(cache=cache)
+
+    client.get(url)
+    response = client.get(url)
+
+    assert response.text == "<html>listado</html>"
+    assert len(seen) == 1
+    assert client.snapshot()["cache_hits"] == 1
+    cache.close()
+
+
+def test_offline_cache_never_touches_the_network(local_server, tmp_path):
+    seen = []
+    url = local_server(etag_handler(seen))
+    cache = ResponseCache(str(tmp_path), offline=True)
+    client = HttpClient(cache=cache)
+
+    with pytest.raises(CacheMiss):
+        client.get(url)
+
+    assert seen == []
+    cache.close()
+
+
+def test_host_rate_limiter_paces_requests(local_server):
+    seen = []
+    url = local_server(scripted_handler([(200, {}, b"ok")], seen))
+    client = HttpClient(rate_limiter=HostRateLimiter(requests_per_second=20))
+
+    start = time.monotonic()
+    for _ in range(5):
+        client.get(url)
+    elapsed = time.monotonic() - start
+
+    # La primera sale enseguida y las otras cuatro esperan 1/20 s cada una
+    assert len(seen) == 5
+    assert elapsed >= 4 / 20 - 0.01
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    burst = time.monotonic() - start
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    assert burst < 0.05
+    assert elapsed >= 4 / 20 - 0.01
+
+
+def test_token_bucket_is_shared_between_threads():
+    bucket = TokenBucket(rate=50, capacity=1)
+    acquired = []
+
+    def worker():
+        for _ in range(5):
+            bucket.acquire()
+            acquired.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 tokens con uno disponible al inicio: al menos 19 reposiciones
+    assert len(acquired) == 20
+    assert max(acquired) - start >= 19 / 50 - 0.01
+
+
+def test_token_bucket_rejects_a_zero_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
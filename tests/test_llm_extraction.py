@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pandas as pd
+import pytest
+
+from scraping.llm_extraction import MESES, OUTPUT_FILE, ConcurrentExtractor
+
+
+class ChatServer:
+    """
+    Estado compartido del endpoint de chat-completions simulado
+    """
+
+    def __init__(self, throttled=0, latency=0.05):
+        self.throttled = throttled
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        state = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with state.lock:
+                    state.requests += 1
+                    throttle = state.requests <= state.throttled
+                    state.in_flight += 1
+                    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                try:
+                    if throttle:
+                        self.reply(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                        return
+                    time.sleep(state.latency)
+                    # El "modelo" devuelve el título del artículo como dato
+                    prompt = body["messages"][-1]["content"]
+                    title = prompt.rsplit("Artículo:\n", 1)[1].split("\n", 1)[0]
+                    content = json.dumps({"titulo": title, "deficit": "1500 MW"})
+                    self.reply(
+                        200,
+                        {
+                            "choices": [{"message": {"content": content}}],
+                            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+                        },
+                    )
+                finally:
+                    with state.lock:
+                        state.in_flight -= 1
+
+            def reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def articles(n):
+    return [
+        {
+            "Título": f"Reporte {i}",
+            "Contenido": f"Se estima un déficit de 1500 MW ({i})",
+            "Fecha": f"2024-{1 + i % 3:02d}-{1 + i:02d} 08:00:00",
+            "Enlace": f"http://www.cubadebate.cu/noticias/2024/reporte-{i}/",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    csv_path = tmp_path / "articulos.csv"
+    pd.DataFrame(articles(8)).to_csv(csv_path, index=False, encoding="utf-8-sig")
+    template_path = tmp_path / "template.json"
+    template_path.write_text('{"titulo": null, "deficit": null}', encoding="utf-8")
+    return str(csv_path), str(template_path)
+
+
+def make_extractor(inputs, url, **kwargs):
+    csv_path, template_path = inputs
+    return ConcurrentExtractor(
+        csv_path,
+        template_path,
+        url + "/v1/chat/completions",
+        "clave",
+        "modelo",
+        2024,
+        2024,
+        requests_per_second=1000,
+        **kwargs,
+    )
+
+
+def test_in_flight_requests_never_exceed_the_limit(local_server, inputs, tmp_path):
+    server = ChatServer()
+    extractor = make_extractor(inputs, local_server(server.handler()), max_in_flight=3)
+
+    assert extractor.run_pipeline(output_dir=str(tmp_path / "out")) == 0
+
+    assert server.requests == 8
+    # Con 8 artículos y 50 ms por respuesta llegan a solaparse las 3 peticiones
+    assert server.max_in_flight == 3
+
+
+def test_429_is_retried(local_server, inputs, tmp_path):
+    server = ChatServer(throttled=2)
+    extractor = make_extractor(inputs, local_server(server.handler()), max_in_flight=1)
+
+    assert extractor.run_pipeline(output_dir=str(tmp_path / "out")) == 0
+
+    stats = extractor.client.snapshot()
+    assert server.requests == 10
+    assert stats["requests"] == 10
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+    assert stats["completion_tokens"] == 8 * 5
+
+
+def test_output_is_grouped_by_year_and_month(local_server, inputs, tmp_path):
+    server = ChatServer()
+    extractor = make_extractor(inputs, local_server(server.handler()), max_in_flight=4)
+    output_dir = tmp_path / "out"
+
+    assert extractor.run_pipeline(output_dir=str(output_dir)) == 0
+
+    with open(output_dir / OUTPUT_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    assert list(data) == ["2024"]
+    assert list(data["2024"]) == MESES
+
+    records = [record for month in data["2024"].values() for record in month]
+    assert len(records) == 8
+    for record in records:
+        assert set(record) == {"enlace", "fecha", "datos"}
+    by_link = {record["enlace"]: record for record in records}
+    for article in articles(8):
+        record = by_link[article["Enlace"]]
+        assert record["fecha"] == article["Fecha"]
+        assert record["datos"] == {"titulo": article["Título"], "deficit": "1500 MW"}
+        month = MESES[int(article["Fecha"][5:7]) - 1]
+        assert record in data["2024"][month]
@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from scraping.title_matcher import TitleMatcher, get_default_matcher, normalize_title
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+EXAMPLES_PATH = os.path.join(FIXTURES, "title_examples.json")
+
+with open(EXAMPLES_PATH, encoding="utf-8") as f:
+    EXAMPLES = json.load(f)
+
+
+@pytest.mark.parametrize("title,rule", EXAMPLES["coinciden"])
+def test_matches_une_reports(title, rule):
+    found = get_default_matcher().match(title)
+    assert found is not None
+    assert found.rule == rule
+
+
+@pytest.mark.parametrize("title", EXAMPLES["no_coinciden"])
+def test_ignores_verb_une_and_other_titles(title):
+    assert get_default_matcher().match(title) is None
+
+
+def test_acronyms_are_case_sensitive_but_words_are_not():
+    matcher = TitleMatcher([{"nombre": "r", "patrones": ["UNE informa"]}])
+    assert matcher.match("La UNE INFORMA hoy") is not None
+    assert matcher.match("la une informa hoy") is None
+
+
+def test_normalize_title():
+    assert normalize_title("  Unión   ELÉCTRICA ") == " union electrica "